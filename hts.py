@@ -7,8 +7,13 @@ import yaml
 import RASPA2
 
 import htsohm
+from htsohm.db import engine
+from htsohm.db.migrate import check_indexes as check_database_indexes, migrate as migrate_database
 from htsohm.files import load_config_file
-from htsohm.htsohm import worker_run_loop
+from htsohm.htsohm import seed as seed_run, worker_run_loop
+from htsohm.pseudo_material_archive import convert_yaml_directory
+from htsohm.pseudo_material_archive import export_pseudo_materials as export_run_pseudo_materials
+from htsohm.simulation import helium_void_fraction
 
 @click.group()
 def hts():
@@ -53,5 +58,99 @@ def launch_worker(run_id):
     htsohm._init(run_id)
     worker_run_loop(run_id)
 
+@hts.command()
+@click.argument('run_id')
+@click.option('--count', type=int, required=True,
+        help='number of seed materials to generate.')
+def seed(run_id, count):
+    """Queue seed materials for a run.
+
+    Args:
+        run_id (str): identification string for run.
+        count (int): number of seed materials to generate.
+
+    Generates `count` seed materials at once; workers simulate queued seeds
+    before generating any seeds of their own.
+
+    """
+    htsohm._init(run_id)
+    seed_run(run_id, count)
+
+@hts.command()
+@click.argument('run_id')
+def convert_pseudo_materials(run_id):
+    """Copy a run's YAML pseudo materials into its archive.
+
+    Args:
+        run_id (str): identification string for run.
+
+    Materials are copied into the database instead when the run's
+    `pseudo_material_format` is 'database'. YAML files are left in place, and
+    may be deleted once converted.
+
+    """
+    htsohm._init(run_id)
+    print('Converted %s pseudo materials.' % convert_yaml_directory(run_id))
+
+@hts.command()
+@click.argument('run_id')
+@click.argument('output_path', type=click.Path())
+def export_pseudo_materials(run_id, output_path):
+    """Export a run's stored pseudo materials to one .npz file.
+
+    Args:
+        run_id (str): identification string for run.
+        output_path (str): path to .npz file.
+
+    Materials are read from the archive, or from the database when the run's
+    `pseudo_material_format` is 'database'.
+
+    """
+    htsohm._init(run_id)
+    count = export_run_pseudo_materials(run_id, output_path)
+    print('Exported %s pseudo materials to %s' % (count, output_path))
+
+@hts.command()
+@click.argument('run_id')
+@click.option('--count', type=int, default=100,
+        help='number of simulated materials to compare.')
+def validate_void_fraction(run_id, count):
+    """Compare native helium void fraction estimates with RASPA's.
+
+    Args:
+        run_id (str): identification string for run, whose materials' void
+            fractions were simulated with RASPA.
+        count (int): number of materials to compare.
+
+    """
+    htsohm._init(run_id)
+    helium_void_fraction.validate_native(run_id, count)
+
+@hts.group()
+def db():
+    """Manage the database."""
+    pass
+
+@db.command()
+def migrate():
+    """Add tables, columns and indexes declared since the database was
+    created.
+
+    Then checks, with EXPLAIN, that every hot query uses an index.
+
+    """
+    columns, indexes = migrate_database(engine)
+    print('Added %s columns and %s indexes.' % (len(columns), len(indexes)))
+    check_database_indexes(engine)
+
+@db.command()
+def check_indexes():
+    """EXPLAIN each hot query, and list those that read a table without an
+    index."""
+    unindexed = check_database_indexes(engine)
+    if unindexed:
+        raise click.ClickException('%s queries read tables without an index; '
+                'run `hts.py db migrate`.' % len(unindexed))
+
 if __name__ == '__main__':
     hts()
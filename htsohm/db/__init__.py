@@ -4,7 +4,7 @@
 import os
 from sqlalchemy import create_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import scoped_session, sessionmaker
 import yaml
 
 # Init the database
@@ -16,13 +16,34 @@ if 'sqlite' in connection_string:
         'WARNING: attempting to use SQLite database! Okay for local debugging\n' +
         'but will not work with multiple workers, due to lack of locking features.'
     )
-engine = create_engine(connection_string)
-session = sessionmaker(bind=engine)()
+
+# Connection pool settings (see settings/database.sample.yaml). SQLite databases
+# are opened without a pool of persistent connections, so take no pool size.
+POOL_OPTIONS = ['pool_size', 'max_overflow', 'pool_timeout', 'pool_recycle', 'pool_pre_ping']
+pool_options = {k : v for k, v in dbconfig.get('pool', {}).items() if k in POOL_OPTIONS}
+if 'sqlite' in connection_string:
+    pool_options.pop('pool_size', None)
+    pool_options.pop('max_overflow', None)
+    pool_options.pop('pool_timeout', None)
+engine = create_engine(connection_string, **pool_options)
+
+# One session per thread, used like a single session (`session.query(...)`).
+# Workers end each unit of work with `session.remove()`, which closes the
+# session, returning its connection to the pool and releasing every object
+# it loaded.
+session = scoped_session(sessionmaker(bind=engine))
 
 # Import all models
 from htsohm.db.base import Base
 from htsohm.db.material import Material
 from htsohm.db.mutation_strength import MutationStrength
+from htsohm.db.gas_adsorption_point import GasAdsorptionPoint
+from htsohm.db.pending_seed import PendingSeed
+from htsohm.db.pseudo_material_record import PseudoMaterialRecord
+from htsohm.db.structure_rejection import StructureRejection
+from htsohm.db.convergence_statistics import ConvergenceStatistics
+from htsohm.db.bin_count import BinCount
+from htsohm.db.material_write_buffer import MaterialWriteBuffer
 
 # Create tables in the engine, if they don't exist already.
 Base.metadata.create_all(engine)
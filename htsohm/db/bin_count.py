@@ -0,0 +1,93 @@
+from sqlalchemy import Column, Integer, String, PrimaryKeyConstraint
+import sqlalchemy.exc
+
+from htsohm.db import Base, session
+from htsohm.db.convergence_statistics import ConvergenceStatistics
+
+class BinCount(Base):
+    """Declarative class mapping to table counting materials in each bin.
+
+    Attributes:
+        run_id (str): identification string for run.
+        gas_adsorption_bin (int): value representing a region of gas
+            loading parameter-space.
+        surface_area_bin (int): value representing a region of surface area
+            parameter-space.
+        void_fraction_bin (int): value representing a region of void fraction
+            parameter-space.
+        count (int): number of materials counted towards convergence (see
+            `evaluate_convergence`) in the bin.
+        first_generation (int): generation of the bin's first material.
+
+    """
+    __tablename__ = 'bin_counts'
+    # COLUMN                                                 UNITS
+    run_id = Column(String(50))                            # dimm.
+    gas_adsorption_bin = Column(Integer)                   # dimm.
+    surface_area_bin = Column(Integer)                     # dimm.
+    void_fraction_bin = Column(Integer)                    # dimm.
+    count = Column(Integer, default=0)
+    first_generation = Column(Integer)                     # generation#
+
+    __table_args__ = (
+        PrimaryKeyConstraint('run_id', 'gas_adsorption_bin', 'surface_area_bin', 'void_fraction_bin'),
+    )
+
+    def __init__(self, run_id=None, gas_adsorption_bin=None, surface_area_bin=None,
+                 void_fraction_bin=None, count=0, first_generation=None):
+        self.run_id = run_id
+        self.gas_adsorption_bin = gas_adsorption_bin
+        self.surface_area_bin = surface_area_bin
+        self.void_fraction_bin = void_fraction_bin
+        self.count = count
+        self.first_generation = first_generation
+
+    @classmethod
+    def _increment(cls, material):
+        """Count a material in its bin; the caller commits.
+
+        Returns:
+            count (int): the bin's count, including the material.
+
+        Raises:
+            sqlalchemy.exc.IntegrityError: if another worker created the bin's
+                row first.
+
+        """
+        key = [cls.run_id == material.run_id,
+               cls.gas_adsorption_bin == material.gas_adsorption_bin,
+               cls.surface_area_bin == material.surface_area_bin,
+               cls.void_fraction_bin == material.void_fraction_bin]
+        # the update locks the bin's row until commit, so the count read back
+        # is this material's place in the bin
+        updated = session.query(cls).filter(*key) \
+                .update({cls.count : cls.count + 1}, synchronize_session=False)
+        if updated:
+            return session.query(cls.count).filter(*key).scalar()
+        session.add(cls(material.run_id, *material.bin, count=1,
+                first_generation=material.generation))
+        session.flush()
+        return 1
+
+    @classmethod
+    def record(cls, *materials):
+        """Count binned materials, and update their generations' convergence
+        statistics, in the current transaction; the caller commits.
+
+        Args:
+            materials (Material): binned materials.
+
+        Each material is counted in a savepoint, so that losing the race to
+        create a bin's row retries that material alone.
+
+        """
+        for material in materials:
+            while True:
+                try:
+                    with session.begin_nested():
+                        count = cls._increment(material)
+                        ConvergenceStatistics.record(material.run_id,
+                                material.generation, count)
+                    break
+                except sqlalchemy.exc.IntegrityError:
+                    print("Somebody beat us to counting this bin. That's ok!")
@@ -0,0 +1,94 @@
+from math import sqrt
+
+from sqlalchemy import Column, Integer, String, Float, PrimaryKeyConstraint
+from sqlalchemy.sql import func
+
+from htsohm.db import Base, session
+
+class ConvergenceStatistics(Base):
+    """Declarative class mapping to table of bin-count statistics for each
+    generation.
+
+    Attributes:
+        run_id (str): identification string for run.
+        generation (int): iteration in overall bin-mutate-simulate routine.
+        materials (int): number of the generation's materials counted in bins.
+        new_bins (int): number of bins whose first material is in the
+            generation.
+        count_squares (int): the generation's increase in the sum, over bins,
+            of squared bin counts.
+        variance (float): bin-count standard deviation (see `evaluate_convergence`)
+            of all generations up to and including this one, when convergence
+            was last evaluated.
+        fraction_filled (float): fraction of bins holding materials, likewise.
+
+    Counts are increments, maintained as materials are binned (see
+    `BinCount.record`); totals up to a generation are their sums.
+
+    """
+    __tablename__ = 'convergence_statistics'
+    # COLUMN                                                 UNITS
+    run_id = Column(String(50))                            # dimm.
+    generation = Column(Integer)                           # generation#
+    materials = Column(Integer, default=0)
+    new_bins = Column(Integer, default=0)
+    count_squares = Column(Integer, default=0)
+    variance = Column(Float)
+    fraction_filled = Column(Float)
+
+    __table_args__ = (
+        PrimaryKeyConstraint('run_id', 'generation'),
+    )
+
+    def __init__(self, run_id=None, generation=None, materials=0, new_bins=0, count_squares=0):
+        self.run_id = run_id
+        self.generation = generation
+        self.materials = materials
+        self.new_bins = new_bins
+        self.count_squares = count_squares
+
+    @classmethod
+    def record(cls, run_id, generation, count):
+        """Add a material, which brought its bin's count to `count`, to a
+        generation's statistics; the caller commits.
+
+        Raises:
+            sqlalchemy.exc.IntegrityError: if another worker created the
+                generation's row first.
+
+        """
+        increments = {
+            cls.materials     : cls.materials + 1,
+            cls.new_bins      : cls.new_bins + (1 if count == 1 else 0),
+            cls.count_squares : cls.count_squares + 2 * count - 1
+        }
+        updated = session.query(cls) \
+                .filter(cls.run_id == run_id, cls.generation == generation) \
+                .update(increments, synchronize_session=False)
+        if not updated:
+            session.add(cls(run_id, generation, 1, 1 if count == 1 else 0, 2 * count - 1))
+            session.flush()
+
+    @classmethod
+    def totals(cls, run_id, generation):
+        """Bin-count statistics of generations before `generation`.
+
+        Returns:
+            (materials, bins, count_squares): totals of each count, or None if
+                no materials have been counted.
+
+        """
+        materials, bins, count_squares = session \
+                .query(func.sum(cls.materials), func.sum(cls.new_bins),
+                       func.sum(cls.count_squares)) \
+                .filter(cls.run_id == run_id, cls.generation < generation).one()
+        if not bins:
+            return None
+        return int(materials), int(bins), int(count_squares)
+
+    @staticmethod
+    def standard_deviation(materials, bins, count_squares):
+        """Standard deviation of bin counts, over bins holding materials, from
+        their totals."""
+        mean = materials / bins
+        return sqrt(max(count_squares / bins - mean ** 2, 0.))
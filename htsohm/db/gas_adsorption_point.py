@@ -0,0 +1,72 @@
+from sqlalchemy import Column, ForeignKey, Integer, Float
+
+from htsohm.db import Base
+
+class GasAdsorptionPoint(Base):
+    """Declarative class mapping to table storing one point of a material's
+    gas adsorption isotherm.
+
+    Attributes:
+        id (int): database table primary_key.
+        material_id (int): id of material the point was simulated for.
+        point (int): index of point in the configured list of pressures.
+        external_pressure (float): pressure the point was simulated at.
+        absolute_volumetric_loading (float): absolute volumetric loading.
+        absolute_gravimetric_loading (float): absolute gravimetric loading.
+        absolute_molar_loading (float): absolute molar loading.
+        excess_volumetric_loading (float): excess volumetric loading.
+        excess_gravimetric_loading (float): excess gravimetric loading.
+        excess_molar_loading (float): excess molar loading.
+        host_host_avg (float): average energy of host-host interactions.
+        host_host_vdw (float): energy of host-host van der Waals interactions.
+        host_host_cou (float): energy of host-host electrostatic interactions.
+        adsorbate_adsorbate_avg (float): average energy of adsorbate-adsorbate
+            interactions.
+        adsorbate_adsorbate_vdw (float): energy of adsorbate-adsorbate van der
+            Waals interactions.
+        adsorbate_adsorbate_cou (float): energy of adsorbate-adsorbate
+            electrostatic interactions.
+        host_adsorbate_avg (float): average energy of host-adsorbate
+            interactions.
+        host_adsorbate_vdw (float): energy of host-adsorbate van der Waals
+            interactions.
+        host_adsorbate_cou (float): energy of host-adsorbate electrostatic
+            interactions.
+
+    """
+    __tablename__ = 'gas_adsorption_points'
+    # COLUMN                                                 UNITS
+    id = Column(Integer, primary_key=True)                 # dimm.
+    material_id = Column(Integer, ForeignKey('materials.id'))
+    point = Column(Integer)                                # dimm.
+    external_pressure = Column(Float)                      # Pa
+
+    absolute_volumetric_loading = Column(Float)            # cm^3 / cm^3
+    absolute_gravimetric_loading = Column(Float)           # cm^3 / g
+    absolute_molar_loading = Column(Float)                 # mol / kg
+    excess_volumetric_loading = Column(Float)              # cm^3 / cm^3
+    excess_gravimetric_loading = Column(Float)             # cm^3 / g
+    excess_molar_loading = Column(Float)                   # mol /kg
+    host_host_avg = Column(Float)                          # K
+    host_host_vdw = Column(Float)                          # K
+    host_host_cou = Column(Float)                          # K
+    adsorbate_adsorbate_avg = Column(Float)                # K
+    adsorbate_adsorbate_vdw = Column(Float)                # K
+    adsorbate_adsorbate_cou = Column(Float)                # K
+    host_adsorbate_avg = Column(Float)                     # K
+    host_adsorbate_vdw = Column(Float)                     # K
+    host_adsorbate_cou = Column(Float)                     # K
+
+    def __init__(self, point=None, external_pressure=None, results=None):
+        """Init isotherm point.
+
+        Args:
+            point (int): index of point in the configured list of pressures.
+            external_pressure (float): pressure the point was simulated at.
+            results (dict): parsed simulation results, keyed by column name.
+
+        """
+        self.point = point
+        self.external_pressure = external_pressure
+        if results:
+            self.update_from_dict(results)
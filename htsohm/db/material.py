@@ -2,11 +2,12 @@
 import sys
 import uuid
 
-from sqlalchemy import Column, ForeignKey, Integer, String, Float, Boolean
-from sqlalchemy.sql import text
+from sqlalchemy import Column, ForeignKey, Integer, String, Float, Boolean, Index, or_
+from sqlalchemy.orm import aliased, relationship
+from sqlalchemy.sql import and_, case, func
 
 from htsohm import config
-from htsohm.db import Base, session, engine
+from htsohm.db import Base, session
 
 class Material(Base):
     """Declarative class mapping to table storing material/simulation data.
@@ -21,14 +22,19 @@ class Material(Base):
             to determine when all materials appear in database for a particular
             generation).
         retest_num (int): iteration in re-test routine for statistical errors.
-        retest_methane_loading_sum (float): sum of all absolute volumetric
-            methane loadings calculated in re-test routine.
+        retest_gas_adsorption_0_sum (float): sum of all absolute volumetric
+            loadings at the first pressure calculated in re-test routine.
+        retest_gas_adsorption_1_sum (float): sum of all absolute volumetric
+            loadings at the last pressure calculated in re-test routine, when
+            more than one pressure is simulated.
         retest_surface_area_sum (float): sum of all volumetric surface areas
             calculated in re-test routine.
         retest_void_fraction_sum (float): sum of all helium void fractions
             calculated in re-test routine.
         retest_passed (bool): true if the average of all re-test results is
             within the acceptable range of deviation.
+        failed (bool): true if a simulation of the material failed
+            permanently; failed materials are never selected as parents.
         ga_absolute_volumetric_loading (float): absolute volumetric loading.
         ga_absolute_gravimetric_loading (float): absolute gravimetric loading.
         ga_absolute_molar_loading (float): absolute molar loading.
@@ -57,12 +63,27 @@ class Material(Base):
         sa_gravimetric_surface_area (float): surface area per unit mass.
         vf_helium_void_fraction (float): void fraction measured with helium
             probe.
+        gas_adsorption_points (list): `GasAdsorptionPoint` rows, one per
+            pressure simulated; the first two points are also stored in the
+            `ga0_` and `ga1_` columns.
         methane_loading_bin (int): region of methane loading-space
             corresponding to the material's simulation results.
         surface_area_bin (int): region of surface area-space corresponding to
             the material's simulation results.
         void_fraction_bin (int): region of void fraction-space corresponding to
             the material's simulation results.
+        sd_lattice_a, sd_lattice_b, sd_lattice_c (float): lattice constants.
+        sd_number_density (float): atom-sites per unit volume.
+        sd_mean_epsilon (float): mean epsilon of atom-sites.
+        sd_mean_sigma (float): mean sigma of atom-sites.
+        sd_geometric_void_fraction (float): one less the packing fraction of
+            atom-sites, ignoring overlaps.
+        These structure descriptors are cheap to compute before simulating
+        (see `htsohm.surrogate`).
+        fingerprint (str): hash of the material's structure (see
+            `PseudoMaterial.fingerprint`), indexed per run to find duplicates.
+        ga_henry_loading (float): loading in the Henry regime, computed when
+            the material was prescreened (see `htsohm.htsohm.prescreen`).
 
     """
     __tablename__ = 'materials'
@@ -81,6 +102,7 @@ class Material(Base):
     retest_surface_area_sum = Column(Float, default=0)
     retest_void_fraction_sum = Column(Float, default=0)
     retest_passed = Column(Boolean)                        # will be NULL if retest hasn't been run
+    failed = Column(Boolean, default=False)                # simulation failed permanently
 
     # data collected
     #   gas adsorption 0
@@ -127,6 +149,30 @@ class Material(Base):
     surface_area_bin = Column(Integer)                        # dimm.
     void_fraction_bin = Column(Integer)                       # dimm.
 
+    # structure descriptors
+    sd_lattice_a = Column(Float)                              # angstroms
+    sd_lattice_b = Column(Float)                              # angstroms
+    sd_lattice_c = Column(Float)                              # angstroms
+    sd_number_density = Column(Float)                         # atoms / angstrom ^ 3
+    sd_mean_epsilon = Column(Float)                           # K
+    sd_mean_sigma = Column(Float)                             # angstroms
+    sd_geometric_void_fraction = Column(Float)                # dimm.
+    fingerprint = Column(String(40))
+    ga_henry_loading = Column(Float)                          # cm^3 / cm^3
+
+    # indexes for the hot query paths; `hts.py db migrate` adds any missing
+    # from existing databases
+    __table_args__ = (
+        Index('ix_materials_run_id_fingerprint', 'run_id', 'fingerprint'),
+        Index('ix_materials_run_id_generation', 'run_id', 'generation', 'generation_index'),
+        Index('ix_materials_run_id_bins', 'run_id', 'gas_adsorption_bin', 'surface_area_bin',
+              'void_fraction_bin', 'generation'),
+        Index('ix_materials_parent_id', 'parent_id'),
+        Index('ix_materials_uuid', 'uuid'),
+    )
+
+    gas_adsorption_points = relationship('GasAdsorptionPoint',
+            order_by='GasAdsorptionPoint.point')
 
     def __init__(self, run_id=None, ):
         """Init material-row.
@@ -156,6 +202,42 @@ class Material(Base):
         """
         return [self.gas_adsorption_bin, self.surface_area_bin, self.void_fraction_bin]
 
+    def find_twin(self):
+        """Find a simulated material of the same run with the same fingerprint.
+
+        Returns:
+            twin (Material): earliest such material that has not failed its
+                simulations or retests, or None.
+
+        """
+        return session.query(Material).filter(
+                Material.run_id == self.run_id,
+                Material.fingerprint == self.fingerprint,
+                Material.void_fraction_bin != None,
+                or_(Material.retest_passed == True, Material.retest_passed == None),
+                or_(Material.failed == None, Material.failed == False),
+            ).order_by(Material.id).first()
+
+    def copy_properties(self, twin):
+        """Copy a twin's simulation results and bins onto this material.
+
+        Args:
+            twin (Material): material with the same structure.
+
+        """
+        for column in self.__table__.columns:
+            if column.name.startswith(('ga0_', 'ga1_', 'sa_', 'vf_')) or \
+                    column.name.endswith('_bin'):
+                setattr(self, column.name, getattr(twin, column.name))
+        points = []
+        for twin_point in twin.gas_adsorption_points:
+            point = twin_point.clone()
+            point.id = None
+            point.material_id = None
+            points.append(point)
+        self.gas_adsorption_points = points
+        self.failed = False
+
     def calculate_generation_index(self):
         """Determine material's generation-index.
 
@@ -174,8 +256,42 @@ class Material(Base):
                 Material.run_id==self.run_id,
                 Material.generation==self.generation,
                 Material.id < self.id,
+                or_(Material.failed == None, Material.failed == False),
             ).count()
 
+    @classmethod
+    def children_in_parent_bin_fractions(cls, run_id, generation):
+        """Determine, for every parent bin, the fraction of a generation's
+        children in the same bin as their parent.
+
+        Args:
+            run_id (str): identification string for run.
+            generation (int): generation of the children.
+
+        Returns:
+            fractions (dict): fraction of children in their parent's bin,
+                keyed by the parents' (gas adsorption, surface area, void
+                fraction) bin, for bins whose materials have children in the
+                generation.
+
+        Counts are aggregated in the database by one query grouped by the
+        parents' bins.
+
+        """
+        parent = aliased(cls)
+        bin_columns = [cls.gas_adsorption_bin, cls.surface_area_bin, cls.void_fraction_bin]
+        parent_bin_columns = [parent.gas_adsorption_bin, parent.surface_area_bin,
+                parent.void_fraction_bin]
+        in_bin = and_(*[c == p for c, p in zip(bin_columns, parent_bin_columns)])
+        rows = session \
+            .query(*parent_bin_columns, func.count(cls.id),
+                   func.sum(case([(in_bin, 1)], else_=0))) \
+            .join(parent, cls.parent_id == parent.id) \
+            .filter(cls.run_id == run_id, cls.generation == generation) \
+            .group_by(*parent_bin_columns).all()
+        return {(ga_bin, sa_bin, vf_bin) : in_parent_bin / children
+                for ga_bin, sa_bin, vf_bin, children, in_parent_bin in rows}
+
     def calculate_percent_children_in_bin(self):
         """Determine number of children in the same bin as their parent.
 
@@ -183,37 +299,17 @@ class Material(Base):
             self (class): row in material table.
 
         Returns:
-            Fraction of children in the same bin as parent (self).
+            Fraction of children in the same bin as parent (self), among
+            children in self's generation of parents in self's bin.
+
+        Raises:
+            ZeroDivisionError: if there are no such children.
+
         """
-        sql = text("""
-            select
-                m.gas_adsorption_bin,
-                m.surface_area_bin,
-                m.void_fraction_bin,
-                (
-                    m.gas_adsorption_bin = p.gas_adsorption_bin and
-                    m.surface_area_bin = p.surface_area_bin and
-                    m.void_fraction_bin = p.void_fraction_bin
-                ) as in_bin
-            from materials m
-            join materials p on (m.parent_id = p.id)
-            where m.generation = :gen
-              and m.run_id = :run_id
-              and p.gas_adsorption_bin = :ga_bin
-              and p.surface_area_bin = :sa_bin
-              and p.void_fraction_bin = :vf_bin
-        """)
-
-        rows = engine.connect().execute(
-            sql,
-            gen=self.generation,
-            run_id=self.run_id,
-            ga_bin=self.gas_adsorption_bin,
-            sa_bin=self.surface_area_bin,
-            vf_bin=self.void_fraction_bin
-        ).fetchall()
-
-        return len([ r for r in rows if r.in_bin ]) / len(rows)
+        fractions = Material.children_in_parent_bin_fractions(self.run_id, self.generation)
+        if tuple(self.bin) not in fractions:
+            raise ZeroDivisionError('no children of parents in bin %s' % self.bin)
+        return fractions[tuple(self.bin)]
 
     def calculate_retest_result(self, tolerance):
         """Determine if material has passed re-testing routine.
@@ -226,25 +322,35 @@ class Material(Base):
         Returns:
             (bool) True if material has NOT failed any of all re-tests.
 
+        Gas adsorption is checked at the first and last pressures, the points
+        its binned loading is calculated from (see
+        `gas_adsorption.binned_loading`).
+
         """
         simulations = config['material_properties']
         number_of_bins = config['number_of_convergence_bins']
 
-        if 'gas_adsorption_0' in simulations:
+        if 'gas_adsorption' in simulations:
+            ga_limits = config['gas_adsorption']['limits']
+            ga_width = (ga_limits[1] - ga_limits[0]) / number_of_bins
+            number_of_points = len(config['gas_adsorption']['external_pressures'])
+        else:
+            number_of_points = 0
+
+        if number_of_points > 0:
             ga0_o = self.ga0_absolute_volumetric_loading    # initally-calculated values
             ga0_mean = self.retest_gas_adsorption_0_sum / self.retest_num
-            ga0_limits = config['gas_adsorption_0']['limits']
-            ga0_width = (ga0_limits[1] - ga0_limits[0]) / number_of_bins
+            ga0_width = ga_width
         else:
             ga0_o = 0
             ga0_mean = 0
             ga0_width = 0
 
-        if 'gas_adsorption_1' in simulations:
-            ga1_o = self.ga1_absolute_volumetric_loading    # initally-calculated values
+        if number_of_points > 1:
+            # the last point, which sets the binned loading with the first
+            ga1_o = self.gas_adsorption_points[-1].absolute_volumetric_loading
             ga1_mean = self.retest_gas_adsorption_1_sum / self.retest_num
-            ga1_limits = config['gas_adsorption_1']['limits']
-            ga1_width = (ga1_limits[1] - ga1_limits[0]) / number_of_bins
+            ga1_width = ga_width
         else:
             ga1_o = 0
             ga1_mean = 0
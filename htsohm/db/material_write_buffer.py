@@ -0,0 +1,73 @@
+import time
+
+from htsohm import config
+from htsohm.db import session, BinCount
+
+class MaterialWriteBuffer:
+    """Simulated materials waiting to be saved together.
+
+    Attributes:
+        size (int): number of materials that triggers a flush.
+        interval (float): seconds since the last flush that trigger a flush.
+        materials (list): materials not yet saved.
+
+    Each flush saves its materials, assigns their generation indexes, and
+    counts them in `bin_counts` and `convergence_statistics` in one
+    transaction, however many materials are buffered.
+
+    """
+    def __init__(self, size=1, interval=0.):
+        self.size = size
+        self.interval = interval
+        self.materials = []
+        self.last_flush = time.time()
+
+    def add(self, materials):
+        """Buffer materials, flushing if the buffer is full or stale.
+
+        Returns:
+            uncounted (list): saved materials that failed or exceeded their
+                generation, see `flush`.
+
+        """
+        self.materials.extend(materials)
+        if len(self.materials) >= self.size or time.time() - self.last_flush >= self.interval:
+            return self.flush()
+        return []
+
+    def pending_in_generation(self, generation):
+        """Number of buffered materials that will count towards a generation."""
+        return len([m for m in self.materials if m.generation == generation and not m.failed])
+
+    def flush(self):
+        """Save buffered materials.
+
+        Returns:
+            uncounted (list): saved materials that failed or exceeded their
+                generation, and so will never be selected as parents.
+
+        If saving fails, the materials stay buffered; roll the session back
+        before flushing again.
+
+        """
+        if not self.materials:
+            self.last_flush = time.time()
+            return []
+        session.add_all(self.materials)
+        session.flush()
+        counted, uncounted = [], []
+        for material in self.materials:
+            if material.failed:
+                uncounted.append(material)
+                continue
+            material.generation_index = material.calculate_generation_index()
+            if material.generation_index < config['children_per_generation']:
+                counted.append(material)
+            else:
+                # excess rows are kept but not counted
+                uncounted.append(material)
+        BinCount.record(*counted)
+        session.commit()
+        self.materials = []
+        self.last_flush = time.time()
+        return uncounted
@@ -0,0 +1,199 @@
+from sqlalchemy import inspect
+from sqlalchemy.orm import aliased, sessionmaker
+from sqlalchemy.sql import and_, case, func, or_, text
+
+from htsohm.db import Base, Material, MutationStrength
+
+def missing_indexes(engine):
+    """Find declared indexes absent from a database.
+
+    Args:
+        engine (sqlalchemy.engine.Engine): database to inspect.
+
+    Returns:
+        indexes (list): `sqlalchemy.Index` for each declared index whose name
+            is not found on its table.
+
+    """
+    inspector = inspect(engine)
+    indexes = []
+    for table in Base.metadata.sorted_tables:
+        existing = set(i['name'] for i in inspector.get_indexes(table.name))
+        indexes.extend(i for i in table.indexes if i.name not in existing)
+    return indexes
+
+def missing_columns(engine):
+    """Find declared columns absent from a database's existing tables.
+
+    Args:
+        engine (sqlalchemy.engine.Engine): database to inspect.
+
+    Returns:
+        columns (list): `sqlalchemy.Column` for each declared column whose
+            table exists without it.
+
+    """
+    inspector = inspect(engine)
+    tables = set(inspector.get_table_names())
+    columns = []
+    for table in Base.metadata.sorted_tables:
+        if table.name in tables:
+            existing = set(c['name'] for c in inspector.get_columns(table.name))
+            columns.extend(c for c in table.columns if c.name not in existing)
+    return columns
+
+def add_column(engine, column):
+    """Add a declared column to its existing table, with ALTER TABLE.
+
+    Args:
+        engine (sqlalchemy.engine.Engine): database to alter.
+        column (sqlalchemy.Column): column to add; existing rows hold NULL.
+
+    """
+    preparer = engine.dialect.identifier_preparer
+    engine.execute(text('ALTER TABLE %s ADD COLUMN %s %s' % (
+        preparer.format_table(column.table), preparer.format_column(column),
+        column.type.compile(dialect=engine.dialect))))
+
+def migrate(engine):
+    """Bring a database up to date with the declared models.
+
+    Args:
+        engine (sqlalchemy.engine.Engine): database to migrate.
+
+    Returns:
+        columns (list): names ('table.column') of the columns added.
+        indexes (list): names of the indexes created.
+
+    Adds the columns declared since existing tables were created, then creates
+    missing tables, then the declared indexes that `create_all` does not add
+    to tables that already exist. Added columns are NULL in existing rows,
+    which every query treats as unset (ex: `failed`).
+
+    """
+    columns = []
+    for column in missing_columns(engine):
+        name = '%s.%s' % (column.table.name, column.name)
+        print('Adding column %s...' % name)
+        add_column(engine, column)
+        columns.append(name)
+    Base.metadata.create_all(engine)
+    indexes = []
+    for index in missing_indexes(engine):
+        print('Creating index %s on %s...' % (index.name, index.table.name))
+        index.create(engine)
+        indexes.append(index.name)
+    return columns, indexes
+
+def hot_queries(session):
+    """Queries run for every material, with placeholder parameters.
+
+    Args:
+        session (sqlalchemy.orm.Session): session to build queries with.
+
+    Returns:
+        queries (dict): `sqlalchemy.orm.Query` keyed by the function running
+            it.
+
+    """
+    run_id, generation, limit, bin = 'run_id', 1, 100, [0, 0, 0]
+    bin_columns = [Material.gas_adsorption_bin, Material.surface_area_bin,
+            Material.void_fraction_bin]
+    parent = aliased(Material)
+    parent_bin_columns = [parent.gas_adsorption_bin, parent.surface_area_bin,
+            parent.void_fraction_bin]
+    not_failed = or_(Material.failed == None, Material.failed == False)
+    return {
+        'materials_in_generation' : session.query(func.count(Material.id)).filter(
+                Material.run_id == run_id, Material.generation == generation, not_failed),
+        'select_parent (bin counts)' : session
+            .query(func.count(Material.id), *bin_columns)
+            .filter(Material.run_id == run_id,
+                    or_(Material.retest_passed == True, Material.retest_passed == None),
+                    not_failed, Material.generation <= generation,
+                    Material.generation_index < limit)
+            .group_by(*bin_columns),
+        'select_parent (parents)' : session.query(Material.id).filter(
+                Material.run_id == run_id,
+                *[c == b for c, b in zip(bin_columns, bin)],
+                Material.generation <= generation),
+        'calculate_generation_index' : session.query(func.count(Material.id)).filter(
+                Material.run_id == run_id, Material.generation == generation,
+                Material.id < 1000, not_failed),
+        'children_in_parent_bin_fractions' : session
+            .query(*parent_bin_columns, func.count(Material.id),
+                   func.sum(case([(and_(*[c == p for c, p in zip(bin_columns, parent_bin_columns)]), 1)],
+                           else_=0)))
+            .join(parent, Material.parent_id == parent.id)
+            .filter(Material.run_id == run_id, Material.generation == generation)
+            .group_by(*parent_bin_columns),
+        'find_twin' : session.query(Material).filter(
+                Material.run_id == run_id, Material.fingerprint == 'fingerprint'),
+        'find_children' : session.query(Material.uuid).filter(
+                Material.parent_id == 1),
+        'find_children (parent)' : session.query(Material.id).filter(
+                Material.uuid == 'uuid'),
+        'MutationStrength.get_prior' : session.query(MutationStrength).filter(
+                MutationStrength.run_id == run_id,
+                *[getattr(MutationStrength, c.key) == b for c, b in zip(bin_columns, bin)],
+                MutationStrength.generation <= generation)
+            .order_by(MutationStrength.generation.desc()),
+    }
+
+def explain(connection, query):
+    """Query plan of a query, as lines of text.
+
+    Args:
+        connection (sqlalchemy.engine.Connection): database connection.
+        query (sqlalchemy.orm.Query): query to explain.
+
+    Returns:
+        plan (list): lines of the plan.
+
+    """
+    sql = str(query.statement.compile(dialect=connection.dialect,
+            compile_kwargs={'literal_binds' : True}))
+    if connection.dialect.name == 'sqlite':
+        return [row[-1] for row in connection.execute(text('EXPLAIN QUERY PLAN ' + sql))]
+    return [row[0] for row in connection.execute(text('EXPLAIN ' + sql))]
+
+def scans_table(plan):
+    """True if a query plan reads any table without an index."""
+    for line in plan:
+        # SQLite: 'SCAN materials' (but not 'SCAN materials USING INDEX ...');
+        # PostgreSQL: 'Seq Scan on materials'
+        if line.startswith('SCAN') and 'INDEX' not in line or 'Seq Scan' in line:
+            return True
+    return False
+
+def check_indexes(engine):
+    """EXPLAIN each of the `hot_queries`.
+
+    Args:
+        engine (sqlalchemy.engine.Engine): database to check.
+
+    Returns:
+        unindexed (list): names of the queries that read a table without an
+            index.
+
+    On PostgreSQL, sequential scans are disabled while explaining, so that
+    plans for small tables still show whether an index can be used.
+
+    """
+    connection = engine.connect()
+    try:
+        if connection.dialect.name == 'postgresql':
+            connection.execute(text('SET enable_seqscan = off'))
+        session = sessionmaker(bind=connection)()
+        unindexed = []
+        for name, query in hot_queries(session).items():
+            plan = explain(connection, query)
+            uses_index = not scans_table(plan)
+            print('%-36s %s' % (name, 'ok' if uses_index else 'NO INDEX'))
+            if not uses_index:
+                print('\n'.join('    %s' % line for line in plan))
+                unindexed.append(name)
+        session.close()
+        return unindexed
+    finally:
+        connection.close()
@@ -1,7 +1,7 @@
 import os
 
 import yaml
-from sqlalchemy import Column, ForeignKey, Integer, String, Float, Boolean, PrimaryKeyConstraint
+from sqlalchemy import Column, ForeignKey, Integer, String, Float, Boolean, Index, PrimaryKeyConstraint
 
 from htsohm import config
 from htsohm.db import Base, session
@@ -33,6 +33,9 @@ class MutationStrength(Base):
 
     __table_args__ = (
         PrimaryKeyConstraint('run_id', 'generation', 'gas_adsorption_bin', 'surface_area_bin', 'void_fraction_bin'),
+        # for `get_prior`, which searches a bin's generations
+        Index('ix_mutation_strengths_run_id_bins', 'run_id', 'gas_adsorption_bin',
+              'surface_area_bin', 'void_fraction_bin', 'generation'),
     )
 
     def __init__(self, run_id=None, generation=None, gas_adsorption_bin=None,
@@ -0,0 +1,27 @@
+from sqlalchemy import Column, Integer, String
+
+from htsohm.db import Base
+
+class PendingSeed(Base):
+    """Declarative class mapping to table of seed materials awaiting simulation.
+
+    Attributes:
+        id (int): database table primary_key.
+        run_id (str): identification string for run.
+        uuid (str): uuid of the seed's pseudo material, dumped when the seed
+            was queued.
+
+    Rows are written in bulk by `hts.py seed` and deleted by the worker that
+    claims them; the claimed seed's `materials` row is written once it has
+    been simulated, like any other material.
+
+    """
+    __tablename__ = 'pending_seeds'
+    # COLUMN                                                 UNITS
+    id = Column(Integer, primary_key=True)                 # dimm.
+    run_id = Column(String(50))                            # dimm.
+    uuid = Column(String(40))
+
+    def __init__(self, run_id=None, uuid=None):
+        self.run_id = run_id
+        self.uuid = uuid
@@ -0,0 +1,27 @@
+from sqlalchemy import Column, LargeBinary, String
+
+from htsohm.db import Base
+
+class PseudoMaterialRecord(Base):
+    """Declarative class mapping to table of pseudo material structures.
+
+    Attributes:
+        uuid (str): uuid of the material, as in the `materials` table.
+        run_id (str): identification string for run.
+        data (bytes): structure, encoded as one pseudo material archive record
+            (see `htsohm/pseudo_material_archive.py`).
+
+    Rows are written before the material is simulated, so they are keyed by
+    the material's uuid rather than its `materials` id.
+
+    """
+    __tablename__ = 'pseudo_materials'
+    # COLUMN                                                 UNITS
+    uuid = Column(String(40), primary_key=True)
+    run_id = Column(String(50))                            # dimm.
+    data = Column(LargeBinary)
+
+    def __init__(self, uuid=None, run_id=None, data=None):
+        self.uuid = uuid
+        self.run_id = run_id
+        self.data = data
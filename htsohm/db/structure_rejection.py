@@ -0,0 +1,50 @@
+from sqlalchemy import Column, Integer, String, PrimaryKeyConstraint
+import sqlalchemy.exc
+
+from htsohm.db import Base, session
+
+class StructureRejection(Base):
+    """Declarative class mapping to table counting structures screened out
+    before simulation.
+
+    Attributes:
+        run_id (str): identification string for run.
+        reason (str): why structures were rejected (ex: 'packing_fraction',
+            or 'prescreen' for children predicted to adsorb into a saturated
+            bin), or 'repaired' for structures whose overlapping atom-sites
+            were removed.
+        count (int): number of structures.
+
+    """
+    __tablename__ = 'structure_rejections'
+    # COLUMN                                                 UNITS
+    run_id = Column(String(50))                            # dimm.
+    reason = Column(String(50))
+    count = Column(Integer, default=0)
+
+    __table_args__ = (
+        PrimaryKeyConstraint('run_id', 'reason'),
+    )
+
+    def __init__(self, run_id=None, reason=None, count=0):
+        self.run_id = run_id
+        self.reason = reason
+        self.count = count
+
+    @classmethod
+    def record(cls, run_id, reason, count=1):
+        """Add `count` structures to the run's count for `reason`, in the
+        current transaction; the caller commits."""
+        while True:
+            updated = session.query(cls) \
+                    .filter(cls.run_id == run_id, cls.reason == reason) \
+                    .update({cls.count : cls.count + count}, synchronize_session=False)
+            if updated:
+                return
+            try:
+                # a savepoint, so that losing the race keeps the transaction
+                with session.begin_nested():
+                    session.add(cls(run_id, reason, count))
+                return
+            except sqlalchemy.exc.IntegrityError:
+                print("Somebody beat us to counting this rejection. That's ok!")
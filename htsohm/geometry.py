@@ -0,0 +1,90 @@
+from itertools import product
+
+import numpy as np
+
+# offsets of a cell's 27 neighbours (including itself) in a cell list
+NEIGHBOR_CELL_OFFSETS = np.array(list(product([-1, 0, 1], repeat=3)))
+
+def periodic_distances(fractional_coordinates, lattice, i, j):
+    """Distances between atom-sites i and j across periodic boundaries.
+
+    Args:
+        fractional_coordinates (numpy.ndarray): positions, shape (N, 3).
+        lattice (numpy.ndarray): orthorhombic lattice constants, shape (3,).
+        i (numpy.ndarray): indices of first atom-site of each pair.
+        j (numpy.ndarray): indices of second atom-site of each pair.
+
+    Returns:
+        distances (numpy.ndarray): minimum-image distance of each pair,
+            Angstroms.
+
+    """
+    df = fractional_coordinates[j] - fractional_coordinates[i]
+    df -= np.round(df)
+    return np.sqrt(((df * lattice) ** 2).sum(axis=1))
+
+def _brute_force_pairs(fractional_coordinates):
+    """Every pair (i < j) of atom-sites."""
+    return np.triu_indices(len(fractional_coordinates), k=1)
+
+def _cell_list_pairs(fractional_coordinates, cells):
+    """Pairs (i < j) of atom-sites in the same or neighbouring cells of a
+    periodic cell list with `cells` cells along each axis (at least 3)."""
+    cell_index = np.minimum((fractional_coordinates % 1. * cells).astype(int), cells - 1)
+    cell_id = np.ravel_multi_index(cell_index.T, cells)
+    order = np.argsort(cell_id, kind='stable')
+    counts = np.bincount(cell_id, minlength=np.prod(cells))
+    starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+
+    first, second = [], []
+    for offset in NEIGHBOR_CELL_OFFSETS:
+        neighbor_cell = np.ravel_multi_index(((cell_index + offset) % cells).T, cells)
+        neighbor_counts = counts[neighbor_cell]
+        # each atom-site i paired with every atom-site in its neighbour cell
+        i = np.repeat(np.arange(len(cell_id)), neighbor_counts)
+        within_cell = np.arange(len(i)) - np.repeat(
+                np.cumsum(neighbor_counts) - neighbor_counts, neighbor_counts)
+        j = order[np.repeat(starts[neighbor_cell], neighbor_counts) + within_cell]
+        keep = i < j
+        first.append(i[keep])
+        second.append(j[keep])
+    return np.concatenate(first), np.concatenate(second)
+
+def neighbor_pairs(fractional_coordinates, lattice, cutoff):
+    """Find all pairs of atom-sites closer than `cutoff`.
+
+    Args:
+        fractional_coordinates (numpy.ndarray): positions, shape (N, 3).
+        lattice (numpy.ndarray): orthorhombic lattice constants, shape (3,).
+        cutoff (float): search radius, Angstroms; at most half the smallest
+            lattice constant.
+
+    Returns:
+        i, j, distances (numpy.ndarray): indices (i < j) and minimum-image
+            distance of each pair within `cutoff`.
+
+    Uses a periodic cell list with cells at least `cutoff` wide, or checks
+    every pair when the unit cell is less than three cells wide. Cells are
+    widened until there are no more of them than atom-sites (or 27), so a
+    small cutoff in a large unit cell does not allocate a huge, mostly empty
+    cell list.
+
+    """
+    cells = np.floor(np.asarray(lattice) / cutoff)
+    max_cells = max(len(fractional_coordinates), len(NEIGHBOR_CELL_OFFSETS))
+    if cells.prod() > max_cells:
+        cells = np.floor(cells * (max_cells / cells.prod()) ** (1 / 3))
+    cells = cells.astype(int)
+    if len(fractional_coordinates) < 2 or (cells < 3).any():
+        i, j = _brute_force_pairs(fractional_coordinates)
+    else:
+        i, j = _cell_list_pairs(fractional_coordinates, cells)
+    distances = periodic_distances(fractional_coordinates, lattice, i, j)
+    within = distances < cutoff
+    return i[within], j[within], distances[within]
+
+def packing_fraction(pseudo_material):
+    """Fraction of the unit cell filled by atom-sites, as spheres of diameter
+    sigma (ignoring overlaps)."""
+    sigmas = pseudo_material.atom_type_parameters['sigma'][pseudo_material.type_indices]
+    return (np.pi / 6 * sigmas ** 3).sum() / pseudo_material.volume()
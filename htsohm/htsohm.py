@@ -1,19 +1,24 @@
 import os
+import signal
 import sys
-from math import sqrt
 from datetime import datetime
 
 import numpy as np
-from sqlalchemy.sql import func, or_
-from sqlalchemy.orm.exc import FlushError
+from sqlalchemy.sql import and_, func, or_
 import sqlalchemy.exc
-import yaml
 
 import htsohm
 from htsohm import config
-from htsohm.db import session, Material, MutationStrength
-from htsohm.material_files import generate_pseudo_material, mutate_pseudo_material
+from htsohm.db import session, Material, MutationStrength, PendingSeed, StructureRejection
+from htsohm.db import BinCount, ConvergenceStatistics, MaterialWriteBuffer
+from htsohm.material_files import generate_pseudo_material, generate_pseudo_materials
+from htsohm.material_files import mutate_pseudo_materials
+from htsohm.pseudo_material_archive import dump_pseudo_materials, load_pseudo_material
 from htsohm import simulation
+from htsohm.surrogate import BinSurrogate, DESCRIPTOR_COLUMNS, HenryCalibration
+from htsohm.surrogate import structure_descriptors
+from htsohm.simulation.execution import PermanentSimulationError
+from htsohm.simulation.staging import remove_staging_directory
 
 def materials_in_generation(run_id, generation):
     """Count number of materials in a generation.
@@ -29,7 +34,8 @@ def materials_in_generation(run_id, generation):
     """
     return session.query(Material).filter(
         Material.run_id == run_id,
-        Material.generation == generation
+        Material.generation == generation,
+        or_(Material.failed == None, Material.failed == False)
     ).count()
 
 def last_generation(run_id):
@@ -101,6 +107,7 @@ def select_parent(run_id, max_generation, generation_limit):
         .filter(
             Material.run_id == run_id,
             or_(Material.retest_passed == True, Material.retest_passed == None),
+            or_(Material.failed == None, Material.failed == False),
             Material.generation <= max_generation,
             Material.generation_index < generation_limit,
         ) \
@@ -124,6 +131,7 @@ def select_parent(run_id, max_generation, generation_limit):
         .filter(
             Material.run_id == run_id,
             or_(Material.retest_passed == True, Material.retest_passed == None),
+            or_(Material.failed == None, Material.failed == False),
             *parent_queries,
             Material.generation <= max_generation,
             Material.generation_index < generation_limit,
@@ -131,6 +139,186 @@ def select_parent(run_id, max_generation, generation_limit):
     potential_parents = [i[0] for i in parent_query]
     return int(np.random.choice(potential_parents))
 
+def gas_adsorption_bin_counts(run_id, generation_limit):
+    """Count materials in each gas adsorption bin.
+
+    Args:
+        run_id (str): identification string for run.
+        generation_limit (int): number of materials counted in each generation.
+
+    Returns:
+        counts (dict): number of materials, keyed by gas adsorption bin.
+
+    """
+    return dict(session \
+        .query(Material.gas_adsorption_bin, func.count(Material.id)) \
+        .filter(
+            Material.run_id == run_id,
+            or_(Material.retest_passed == True, Material.retest_passed == None),
+            or_(Material.failed == None, Material.failed == False),
+            Material.gas_adsorption_bin != None,
+            Material.generation_index < generation_limit,
+        ) \
+        .group_by(Material.gas_adsorption_bin).all())
+
+# one Henry loading calibration per run, per process, with the generation it
+# was fitted in
+_henry_calibrations = {}
+
+def prescreen(run_id, generation, material, pseudo_material):
+    """Decide whether to simulate a child predicted to adsorb like many others.
+
+    Args:
+        run_id (str): identification string for run.
+        generation (int): iteration in overall bin-mutate-simulate rountine.
+        material (Material): unsimulated child; its `ga_henry_loading` is set.
+        pseudo_material (PseudoMaterial): the child's structure.
+
+    Returns:
+        bool: False if the child was screened out.
+
+    The child's loading in the Henry regime is computed from `samples`
+    (default 2000) Widom insertions (see `gas_adsorption.henry_loading`), and
+    mapped to a gas adsorption bin by a `HenryCalibration` refit once per
+    generation to the run's simulated children. If that bin holds more than
+    `saturation` times the mean count of occupied bins, the child is kept only
+    with probability `keep_probability` (default 0) and otherwise counted as a
+    'prescreen' rejection. Every child is simulated until `min_training`
+    (default 100) children have been. Runs without a `prescreen` section in
+    `gas_adsorption` config simulate every child.
+
+    """
+    settings = config['gas_adsorption'].get('prescreen')
+    if 'gas_adsorption' not in config['material_properties'] or settings is None:
+        return True
+    material.ga_henry_loading = simulation.gas_adsorption.henry_loading(
+            pseudo_material, settings.get('samples', 2000))
+
+    fitted_generation, calibration = _henry_calibrations.get(run_id, (None, None))
+    if fitted_generation != generation:
+        calibration = HenryCalibration(run_id)
+        calibration.update()
+        _henry_calibrations[run_id] = (generation, calibration)
+    if calibration.count < settings.get('min_training', 100):
+        return True
+    counts = gas_adsorption_bin_counts(run_id, config['children_per_generation'])
+    if not counts:
+        return True
+    predicted_bin = calibration.predict(material.ga_henry_loading)
+    mean_count = sum(counts.values()) / len(counts)
+    print('Henry loading :\t%s (predicted bin %s)' % (material.ga_henry_loading, predicted_bin))
+    if counts.get(predicted_bin, 0) <= settings.get('saturation', 2.0) * mean_count:
+        return True
+    if np.random.random() < settings.get('keep_probability', 0.):
+        return True
+    print('Predicted bin is saturated; skipping child.')
+    StructureRejection.record(run_id, 'prescreen')
+    return False
+
+# one online-trained surrogate per run, per process
+_surrogates = {}
+
+def bin_counts(run_id, generation_limit):
+    """Count materials in each bin.
+
+    Args:
+        run_id (str): identification string for run.
+        generation_limit (int): number of materials counted in each generation.
+
+    Returns:
+        counts (dict): number of materials, keyed by (gas adsorption, surface
+            area, void fraction) bin.
+
+    """
+    rows = session \
+        .query(Material.gas_adsorption_bin, Material.surface_area_bin,
+               Material.void_fraction_bin, func.count(Material.id)) \
+        .filter(
+            Material.run_id == run_id,
+            or_(Material.retest_passed == True, Material.retest_passed == None),
+            or_(Material.failed == None, Material.failed == False),
+            Material.generation_index < generation_limit,
+        ) \
+        .group_by(Material.gas_adsorption_bin, Material.surface_area_bin,
+                  Material.void_fraction_bin).all()
+    return {tuple(row[:3]) : row[3] for row in rows}
+
+def choose_children(run_id, children, count):
+    """Pick the candidate children predicted to land in the least-populated
+    bins.
+
+    Args:
+        run_id (str): identification string for run.
+        children (list): (material, pseudo_material) candidates.
+        count (int): number of children to pick.
+
+    Returns:
+        children (list): the chosen candidates.
+
+    Bins are predicted by a `BinSurrogate` trained on the run's materials, once
+    it has trained on `min_training` (default 100) materials; until then the
+    first candidates are chosen.
+
+    """
+    settings = config.get('surrogate')
+    if settings is None or len(children) <= count:
+        return children[:count]
+    if run_id not in _surrogates:
+        _surrogates[run_id] = BinSurrogate(run_id, settings.get('ridge', 1.0))
+    surrogate = _surrogates[run_id]
+    surrogate.update()
+    if surrogate.count < settings.get('min_training', 100):
+        return children[:count]
+
+    descriptors = [[structure_descriptors(p)[c] for c in DESCRIPTOR_COLUMNS]
+            for m, p in children]
+    predicted_bins = [tuple(b) for b in surrogate.predict(descriptors).tolist()]
+    counts = bin_counts(run_id, config['children_per_generation'])
+    predicted_counts = [counts.get(b, 0) for b in predicted_bins]
+    print('Predicted bins :\t%s' % predicted_bins)
+    return [children[i] for i in np.argsort(predicted_counts, kind='stable')[:count]]
+
+def simulation_batch_size():
+    """Number of materials whose helium void fraction and surface area are
+    simulated together in one RASPA invocation (see `batch_size` in the
+    `helium_void_fraction` and `surface_area` config sections).
+
+    """
+    simulations = config['material_properties']
+    batch_sizes = [config[s].get('batch_size', 1) for s in
+            ['helium_void_fraction', 'surface_area'] if s in simulations]
+    return max(batch_sizes + [1])
+
+def run_in_batches(simulation_module, run_id, pseudo_materials, batch_size):
+    """Run a simulation for materials in groups of `batch_size`.
+
+    Args:
+        simulation_module (module): simulation with a `run_batch` function.
+        run_id (str): identification string for run.
+        pseudo_materials (list): materials to simulate.
+        batch_size (int): maximum number of materials per RASPA invocation.
+
+    Returns:
+        results (dict): simulation results keyed by material uuid. Materials
+            whose simulation failed permanently are left out.
+
+    If a batch fails permanently, its materials are simulated one at a time so
+    that only the material(s) at fault are left out.
+
+    """
+    results = {}
+    for i in range(0, len(pseudo_materials), batch_size):
+        batch = pseudo_materials[i:i + batch_size]
+        try:
+            results.update(simulation_module.run_batch(run_id, batch))
+        except PermanentSimulationError as err:
+            if len(batch) == 1:
+                print('Simulation of %s failed permanently: %s' % (batch[0].uuid, err))
+                continue
+            print('Batch failed permanently; simulating one material at a time.')
+            results.update(run_in_batches(simulation_module, run_id, batch, 1))
+    return results
+
 def run_all_simulations(material, pseudo_material):
     """Simulate helium void fraction, gas loading, and surface area.
 
@@ -141,63 +329,88 @@ def run_all_simulations(material, pseudo_material):
     void fraction, gas loading, heat of adsorption, surface area, and
     corresponding bins to row in database corresponding to the input-material.
         
+    """
+    run_batch_simulations([material], [pseudo_material])
+
+def run_batch_simulations(materials, pseudo_materials):
+    """Simulate helium void fraction, gas loading, and surface area for several
+    materials, batching the helium void fraction and surface area simulations.
+
+    Args:
+        materials (list): materials to be analyzed.
+        pseudo_materials (list): structure of each material, in the same order.
+
+    See `run_all_simulations`. Materials whose simulations fail permanently are
+    marked `failed` and not simulated further.
+
     """
     simulations = config['material_properties']
+    run_id = materials[0].run_id
+    for material in materials:
+        material.failed = False
+
+    def active():
+        return [(m, p) for m, p in zip(materials, pseudo_materials) if not m.failed]
+
+    def run_batched(simulation_module, batch_size):
+        all_results = run_in_batches(simulation_module, run_id,
+                [p for m, p in active()], batch_size)
+        for material, pseudo_material in active():
+            if pseudo_material.uuid not in all_results:
+                material.failed = True
+        return all_results
 
     ############################################################################
     # run helium void fraction simulation
     if 'helium_void_fraction' in simulations:
-        results = simulation.helium_void_fraction.run(
-            material.run_id, pseudo_material)
-        material.update_from_dict(results)
-        material.void_fraction_bin = calc_bin(
-            material.vf_helium_void_fraction,
-            *config['helium_void_fraction']['limits'],
-            config['number_of_convergence_bins']
-        )
+        all_results = run_batched(simulation.helium_void_fraction,
+                config['helium_void_fraction'].get('batch_size', 1))
+        for material, pseudo_material in active():
+            material.update_from_dict(all_results[pseudo_material.uuid])
+            material.void_fraction_bin = calc_bin(
+                material.vf_helium_void_fraction,
+                *config['helium_void_fraction']['limits'],
+                config['number_of_convergence_bins']
+            )
     else:
-        material.void_fraction_bin = 0
+        for material in materials:
+            material.void_fraction_bin = 0
     ############################################################################
     # run gas loading simulation
-    if 'gas_adsorption_0' in simulations and 'gas_adsorption_1' not in simulations:
-        arguments = [material.run_id, pseudo_material]
-        if 'helium_void_fraction' in simulations:
-            arguments.append(material.vf_helium_void_fraction)
-        results = simulation.gas_adsorption_0.run(*arguments)
-        material.update_from_dict(results)
-        material.gas_adsorption_bin = calc_bin(
-            material.ga0_absolute_volumetric_loading,
-            *config['gas_adsorption_0']['limits'],
-            config['number_of_convergence_bins']
-        )
-    elif 'gas_adsorption_0' in simulations and 'gas_adsorption_1' in simulations:
-        arguments = [material.run_id, pseudo_material]
-        if 'helium_void_fraction' in simulations:
-            arguments.append(material.vf_helium_void_fraction)
-        results = simulation.gas_adsorption_0.run(*arguments)
-        material.update_from_dict(results)
-        results = simulation.gas_adsorption_1.run(*arguments)
-        material.update_from_dict(results)
-        material.gas_adsorption_bin = calc_bin(
-            abs(material.ga0_absolute_volumetric_loading - material.ga1_absolute_volumetric_loading),
-            *config['gas_adsorption_0']['limits'],
-            config['number_of_convergence_bins']
-        )
-    elif 'gas_adsorption_0' not in simulations:
-        material.gas_adsorption_bin = 0
+    for material, pseudo_material in active():
+        if 'gas_adsorption' in simulations:
+            arguments = [material.run_id, pseudo_material]
+            if 'helium_void_fraction' in simulations:
+                arguments.append(material.vf_helium_void_fraction)
+            try:
+                results = simulation.gas_adsorption.run(*arguments)
+            except PermanentSimulationError as err:
+                print('Simulation of %s failed permanently: %s' % (pseudo_material.uuid, err))
+                material.failed = True
+                continue
+            material.update_from_dict(results)
+            material.gas_adsorption_bin = calc_bin(
+                simulation.gas_adsorption.binned_loading(material),
+                *config['gas_adsorption']['limits'],
+                config['number_of_convergence_bins']
+            )
+        else:
+            material.gas_adsorption_bin = 0
     ############################################################################
     # run surface area simulation
     if 'surface_area' in simulations:
-        results = simulation.surface_area.run(
-                material.run_id, pseudo_material)
-        material.update_from_dict(results)
-        material.surface_area_bin = calc_bin(
-            material.sa_volumetric_surface_area,
-            *config['surface_area']['limits'],
-            config['number_of_convergence_bins']
-        )
+        all_results = run_batched(simulation.surface_area,
+                config['surface_area'].get('batch_size', 1))
+        for material, pseudo_material in active():
+            material.update_from_dict(all_results[pseudo_material.uuid])
+            material.surface_area_bin = calc_bin(
+                material.sa_volumetric_surface_area,
+                *config['surface_area']['limits'],
+                config['number_of_convergence_bins']
+            )
     else:
-        material.surface_area_bin = 0
+        for material in materials:
+            material.surface_area_bin = 0
 
 def retest(m_orig, retests, tolerance, pseudo_material):
     """Reproduce simulations  to prevent statistical errors.
@@ -222,11 +435,17 @@ def retest(m_orig, retests, tolerance, pseudo_material):
     # requery row from database, in case someone else has changed it, and lock it
     # if the row is presently locked, this method blocks until the row lock is released
     session.refresh(m_orig, lockmode='update')
-    if m_orig.retest_num < retests:
-        if 'gas_adsorption_0' in simulations:
+    if m.failed:
+        print('\nRETEST FAILED PERMANENTLY; material will not be selected again.')
+        m_orig.failed = True
+        m_orig.retest_passed = False
+        remove_staging_directory(m_orig.run_id, m_orig.uuid)
+    elif m_orig.retest_num < retests:
+        if 'gas_adsorption' in simulations:
             m_orig.retest_gas_adsorption_0_sum += m.ga0_absolute_volumetric_loading
-        if 'gas_adsorption_1' in simulations:
-            m_orig.retest_gas_adsorption_1_sum += m.ga1_absolute_volumetric_loading
+            if len(m.gas_adsorption_points) > 1:
+                m_orig.retest_gas_adsorption_1_sum += \
+                        m.gas_adsorption_points[-1].absolute_volumetric_loading
         if 'surface_area' in simulations:
             m_orig.retest_surface_area_sum += m.sa_volumetric_surface_area
         if 'helium_void_fraction' in simulations:
@@ -236,10 +455,11 @@ def retest(m_orig, retests, tolerance, pseudo_material):
 
         if m_orig.retest_num == retests:
             try:
-                m_orig.retest_passed = m.calculate_retest_result(tolerance)
+                m_orig.retest_passed = m_orig.calculate_retest_result(tolerance)
                 print('\nRETEST_PASSED :\t%s' % m_orig.retest_passed)
             except ZeroDivisionError as e:
                 print('WARNING: ZeroDivisionError - material.calculate_retest_result(tolerance)')
+            remove_staging_directory(m_orig.run_id, m_orig.uuid)
 
     else:
         pass
@@ -247,52 +467,151 @@ def retest(m_orig, retests, tolerance, pseudo_material):
 
     session.commit()
 
-def mutate(run_id, generation, parent):
-    """Query mutation_strength for bin and adjust as necessary.
+def adjusted_strength(strength, fraction_in_parent_bin):
+    """Adjust a bin's mutation strength by how many children stayed in it.
+
+    Args:
+        strength (float): bin's mutation strength in the previous generation.
+        fraction_in_parent_bin (float): fraction of the previous generation's
+            children of parents in the bin that landed in the same bin.
+
+    Returns:
+        strength (float): if the fraction is LESS THAN 10% the mutation
+            strength is REDUCED BY HALF. If the fraction is GREATER THAN 50%
+            the mutation strength is INCREASED BY 200% (up to 1).
+
+    """
+    if fraction_in_parent_bin < 0.1:
+        return strength * 0.5
+    elif fraction_in_parent_bin > 0.5 and strength <= 0.5:
+        return strength * 2
+    return strength
+
+def calculate_mutation_strengths(run_id, generation):
+    """Calculate mutation strengths for every occupied bin for a generation.
 
     Args:
         run_id (str): identification string for run.
         generation (int): iteration in bin-mutate-simulate routine.
-        parent (sqlalchemy.orm.query.Query): parent-material corresponding to
-            the bin being queried.
 
     Returns:
-        mutation_strength.strength (float): mutation strength to be used for
-        parents in the bin being queried. If the fraction of children from
-        previous generation which populate the SAME bin as their parent is LESS
-        THAN 10% then the mutation strength is REDUCED BY HALF. If the fraction
-        of these children populating the SAME bin as their parent is GREATER
-        THAN 50% then the mutation strength is INCREASED BY 200%.
+        strengths (dict): mutation strength keyed by (gas adsorption, surface
+            area, void fraction) bin, for every bin holding a material from an
+            earlier generation.
+
+    Each bin's most recent strength (or `initial_mutation_strength`), read
+    with one query grouped by bin, is adjusted by `adjusted_strength`, with the fraction of the previous
+    generation's children in their parents' bins (see
+    `Material.children_in_parent_bin_fractions`).
 
     """
-    mutation_strength_key = [run_id, generation] + parent.bin
-    mutation_strength = session.query(MutationStrength).get(mutation_strength_key)
+    bin_columns = [Material.gas_adsorption_bin, Material.surface_area_bin,
+            Material.void_fraction_bin]
+    occupied_bins = session.query(*bin_columns).filter(
+            Material.run_id == run_id,
+            Material.generation < generation,
+            Material.void_fraction_bin != None,
+            or_(Material.failed == None, Material.failed == False),
+        ).distinct().all()
+
+    strengths = {tuple(b) : config['initial_mutation_strength'] for b in occupied_bins}
+    strength_bin_columns = [MutationStrength.gas_adsorption_bin,
+            MutationStrength.surface_area_bin, MutationStrength.void_fraction_bin]
+    latest = session \
+        .query(*strength_bin_columns,
+               func.max(MutationStrength.generation).label('generation')) \
+        .filter(
+            MutationStrength.run_id == run_id,
+            MutationStrength.generation < generation,
+        ) \
+        .group_by(*strength_bin_columns).subquery()
+    priors = session \
+        .query(*strength_bin_columns, MutationStrength.strength) \
+        .join(latest, and_(
+            *[c == getattr(latest.c, c.key) for c in strength_bin_columns],
+            MutationStrength.generation == latest.c.generation)) \
+        .filter(MutationStrength.run_id == run_id).all()
+    for ga_bin, sa_bin, vf_bin, strength in priors:
+        strengths[(ga_bin, sa_bin, vf_bin)] = strength
+
+    fractions = Material.children_in_parent_bin_fractions(run_id, generation - 1)
+    for parent_bin, fraction_in_parent_bin in fractions.items():
+        if parent_bin in strengths:
+            strengths[parent_bin] = adjusted_strength(strengths[parent_bin],
+                    fraction_in_parent_bin)
+    return {b : strengths[b] for b in map(tuple, occupied_bins)}
+
+# mutation strengths keyed by (run_id, generation), per process
+_mutation_strengths = {}
+
+def mutation_strengths(run_id, generation):
+    """Mutation strengths of every occupied bin for a generation.
 
-    if mutation_strength:
-        print("Mutation strength already calculated for this bin and generation.")
-    else:
-        print("Calculating mutation strength...")
-        mutation_strength = MutationStrength.get_prior(*mutation_strength_key).clone()
-        mutation_strength.generation = generation
+    Args:
+        run_id (str): identification string for run.
+        generation (int): iteration in bin-mutate-simulate routine.
 
-        try:
-            fraction_in_parent_bin = parent.calculate_percent_children_in_bin()
-            if fraction_in_parent_bin < 0.1:
-                mutation_strength.strength *= 0.5
-            elif fraction_in_parent_bin > 0.5 and mutation_strength.strength <= 0.5:
-                mutation_strength.strength *= 2
-        except ZeroDivisionError:
-            print("No prior generation materials in this bin with children.")
+    Returns:
+        strengths (dict): mutation strength keyed by bin.
 
+    The first worker to reach a generation calculates every bin's strength (see
+    `calculate_mutation_strengths`) and stores them in bulk; other workers
+    load the stored rows. Each process then keeps them in memory.
+
+    """
+    key = (run_id, generation)
+    if key in _mutation_strengths:
+        return _mutation_strengths[key]
+
+    rows = session.query(MutationStrength).filter(
+            MutationStrength.run_id == run_id,
+            MutationStrength.generation == generation).all()
+    if not rows:
+        print("Calculating mutation strengths...")
+        strengths = calculate_mutation_strengths(run_id, generation)
         try:
-            session.add(mutation_strength)
+            session.bulk_insert_mappings(MutationStrength, [
+                {
+                    'run_id'             : run_id,
+                    'generation'         : generation,
+                    'gas_adsorption_bin' : b[0],
+                    'surface_area_bin'   : b[1],
+                    'void_fraction_bin'  : b[2],
+                    'strength'           : strength
+                } for b, strength in strengths.items()])
             session.commit()
-        except (FlushError, sqlalchemy.exc.IntegrityError) as e:
-            print("Somebody beat us to saving a row with this generation. That's ok!")
+        except sqlalchemy.exc.IntegrityError:
+            print("Somebody beat us to saving this generation's mutation strengths. That's ok!")
             session.rollback()
             # it's ok b/c this calculation should always yield the exact same result!
-    sys.stdout.flush()
-    return mutation_strength.strength
+    else:
+        strengths = {(r.gas_adsorption_bin, r.surface_area_bin, r.void_fraction_bin) : r.strength
+                for r in rows}
+    _mutation_strengths[key] = strengths
+    return strengths
+
+def mutate(run_id, generation, parent):
+    """Look up the mutation strength for a parent's bin.
+
+    Args:
+        run_id (str): identification string for run.
+        generation (int): iteration in bin-mutate-simulate routine.
+        parent (sqlalchemy.orm.query.Query): parent-material corresponding to
+            the bin being queried.
+
+    Returns:
+        mutation_strength.strength (float): mutation strength to be used for
+        parents in the bin being queried; see `calculate_mutation_strengths`.
+        Bins first occupied after the generation's strengths were calculated
+        use their most recent strength.
+
+    """
+    strengths = mutation_strengths(run_id, generation)
+    strength = strengths.get(tuple(parent.bin))
+    if strength is None:
+        strength = MutationStrength.get_prior(run_id, generation, *parent.bin).strength
+        strengths[tuple(parent.bin)] = strength
+    return strength
 
 def evaluate_convergence(run_id, generation):
     '''Determines convergence by calculating variance of bin-counts.
@@ -304,29 +623,249 @@ def evaluate_convergence(run_id, generation):
     Returns:
         bool: True if variance is less than or equal to cutt-off criteria (so
             method will continue running).
+
+    Bin-count totals are read from `convergence_statistics`, maintained as
+    materials are binned, so the cost does not grow with the number of
+    materials or bins. The standard deviation and fraction of bins filled are
+    saved with the previous generation's statistics.
     '''
     simulations = config['material_properties']
-    query_group = []
-    if 'gas_adsorption' in simulations:
-        query_group.append( getattr(Material, 'gas_adsorption_bin') )
-    if 'surface_area' in simulations:
-        query_group.append( getattr(Material, 'surface_area_bin') )
-    if 'helium_void_fraction' in simulations:
-        query_group.append( getattr(Material, 'void_fraction_bin') )
-
-    bin_counts = session \
-        .query(func.count(Material.id)) \
-        .filter(
-            Material.run_id == run_id, Material.generation < generation,
-            Material.generation_index < config['children_per_generation']
-        ) \
-        .group_by(*query_group).all()
-    bin_counts = [i[0] for i in bin_counts]    # convert SQLAlchemy result to list
-    variance = sqrt( sum([(i - (sum(bin_counts) / len(bin_counts)))**2 for i in bin_counts]) / len(bin_counts))
+    totals = ConvergenceStatistics.totals(run_id, generation)
+    if totals is None:
+        print('\nCONVERGENCE:\tno binned materials\n')
+        return False
+
+    materials, bins, count_squares = totals
+    variance = ConvergenceStatistics.standard_deviation(materials, bins, count_squares)
+    number_of_properties = len([s for s in simulations if s in
+            ['gas_adsorption', 'surface_area', 'helium_void_fraction']])
+    fraction_filled = bins / config['number_of_convergence_bins'] ** number_of_properties
+    session.query(ConvergenceStatistics) \
+            .filter(ConvergenceStatistics.run_id == run_id,
+                    ConvergenceStatistics.generation == generation - 1) \
+            .update({ConvergenceStatistics.variance : variance,
+                     ConvergenceStatistics.fraction_filled : fraction_filled},
+                    synchronize_session=False)
+    session.commit()
     print('\nCONVERGENCE:\t%s\n' % variance)
+    print('BINS FILLED:\t%s\n' % fraction_filled)
     sys.stdout.flush()
     return variance <= config['convergence_cutoff_criteria']
 
+def rebuild_convergence_statistics(run_id):
+    """Fill `bin_counts` and `convergence_statistics` for a run that started
+    before they were kept.
+
+    Args:
+        run_id (str): identification string for run.
+
+    Does nothing if the run already has statistics.
+
+    """
+    if session.query(ConvergenceStatistics.run_id) \
+            .filter(ConvergenceStatistics.run_id == run_id).first() is not None:
+        return
+    bin_columns = [Material.gas_adsorption_bin, Material.surface_area_bin,
+            Material.void_fraction_bin]
+    rows = session \
+        .query(Material.generation, *bin_columns, func.count(Material.id)) \
+        .filter(
+            Material.run_id == run_id,
+            Material.generation_index < config['children_per_generation'],
+            or_(Material.failed == None, Material.failed == False)
+        ) \
+        .group_by(Material.generation, *bin_columns) \
+        .order_by(Material.generation).all()
+    if not rows:
+        return
+
+    print("Counting bins of materials simulated before statistics were kept...")
+    bin_counts, first_generations, statistics = {}, {}, {}
+    for generation, ga_bin, sa_bin, vf_bin, count in rows:
+        key = (ga_bin, sa_bin, vf_bin)
+        previous = bin_counts.get(key, 0)
+        bin_counts[key] = previous + count
+        first_generations.setdefault(key, generation)
+        row = statistics.setdefault(generation, {'run_id' : run_id, 'generation' : generation,
+                'materials' : 0, 'new_bins' : 0, 'count_squares' : 0})
+        row['materials'] += count
+        row['new_bins'] += 1 if previous == 0 else 0
+        row['count_squares'] += bin_counts[key] ** 2 - previous ** 2
+    try:
+        session.bulk_insert_mappings(BinCount, [
+            {
+                'run_id'             : run_id,
+                'gas_adsorption_bin' : key[0],
+                'surface_area_bin'   : key[1],
+                'void_fraction_bin'  : key[2],
+                'count'              : count,
+                'first_generation'   : first_generations[key]
+            } for key, count in bin_counts.items()])
+        session.bulk_insert_mappings(ConvergenceStatistics, list(statistics.values()))
+        session.commit()
+    except sqlalchemy.exc.IntegrityError:
+        print("Somebody beat us to counting this run's bins. That's ok!")
+        session.rollback()
+
+def seed(run_id, count):
+    """Generate seed materials in bulk and queue them for simulation.
+
+    Args:
+        run_id (str): identification string for run.
+        count (int): number of seed materials to generate.
+
+    Pseudo materials are dumped and one `pending_seeds` row per material is
+    inserted in a single statement. Workers simulating generation 0 claim
+    queued seeds (see `claim_seed`) before generating seeds of their own.
+
+    """
+    pseudo_materials = generate_pseudo_materials(
+            run_id, config['number_of_atom_types'], count)
+    dump_pseudo_materials(pseudo_materials)
+    session.bulk_insert_mappings(PendingSeed,
+            [{'run_id' : run_id, 'uuid' : p.uuid} for p in pseudo_materials])
+    session.commit()
+    print('Queued %s seed materials.' % count)
+
+def claim_seed(run_id):
+    """Take a seed material queued by `seed`, if any remain.
+
+    Args:
+        run_id (str): identification string for run.
+
+    Returns:
+        (material, pseudo_material): the seed, as a new generation 0 material,
+            or None if no seeds are queued.
+
+    """
+    while True:
+        pending_seed = session.query(PendingSeed.id, PendingSeed.uuid) \
+                .filter(PendingSeed.run_id == run_id) \
+                .order_by(PendingSeed.id).first()
+        if pending_seed is None:
+            return None
+        seed_id, uuid = pending_seed
+        # only one worker's delete can succeed
+        claimed = session.query(PendingSeed) \
+                .filter(PendingSeed.id == seed_id) \
+                .delete(synchronize_session=False)
+        session.commit()
+        if claimed:
+            break
+        print("Somebody beat us to claiming this seed. That's ok!")
+
+    material = Material(run_id)
+    material.uuid = uuid
+    material.generation = 0
+    return material, load_pseudo_material(run_id, uuid)
+
+def new_materials(run_id, gen):
+    """Create unsimulated materials for a generation.
+
+    Args:
+        run_id (str): identification string for run.
+        gen (int): iteration in bin-mutate-simulate routine.
+
+    Returns:
+        children (list): (material, pseudo_material) for a random seed in
+            generation 0, otherwise for a brood of up to `brood_size` (default
+            1) mutated children of one parent selected from previous
+            generations. Empty if the selected parent failed its retests, or
+            every child's structure was rejected or screened out (see
+            `prescreen`). With a `surrogate` in config, `candidates` times as
+            many children are mutated and the brood is chosen by
+            `choose_children`.
+
+    The parent's selection, structure, retests and mutation strength are shared
+    by the whole brood, whose children are mutated together (see
+    `mutate_pseudo_materials`).
+
+    """
+    if gen == 0:
+        queued_seed = claim_seed(run_id)
+        if queued_seed is not None:
+            print("simulating queued seed...")
+            return [queued_seed]
+        print("writing new seed...")
+        return [generate_pseudo_material(run_id, config['number_of_atom_types'])]
+
+    print("selecting a parent / running retests on parent / mutating / simulating")
+    parent_id = select_parent(run_id, max_generation=(gen - 1),
+                                      generation_limit=config['children_per_generation'])
+
+    parent_material = session.query(Material).get(parent_id)
+    parent_pseudo_material = load_pseudo_material(run_id, parent_material.uuid)
+
+    # run retests until we've run enough
+    while parent_material.retest_passed is None:
+        print("running retest...")
+        print("Date :\t%s" % datetime.now().date().isoformat())
+        print("Time :\t%s" % datetime.now().time().isoformat())
+        retest(
+                parent_material, config['retests']['number'],
+                config['retests']['tolerance'], parent_pseudo_material
+            )
+        session.refresh(parent_material)
+
+    if not parent_material.retest_passed:
+        print("parent failed retest. restarting with parent selection.")
+        return []
+
+    mutation_strength = mutate(run_id, gen, parent_material)
+    brood_size = config.get('brood_size', 1)
+    candidates = config.get('surrogate', {}).get('candidates', 1)
+    children = mutate_pseudo_materials(parent_material, parent_pseudo_material,
+            mutation_strength, gen, brood_size * candidates)
+    children = choose_children(run_id, children, brood_size)
+    return [child for child in children if prescreen(run_id, gen, *child)]
+
+def store_pseudo_materials(materials, pseudo_materials):
+    """Dump new materials' structures, then describe them as stored.
+
+    Args:
+        materials (list): unsimulated materials; their structure descriptors
+            and fingerprints are set.
+        pseudo_materials (list): the materials' structures.
+
+    Dumping may snap a structure to the values stored (see
+    `encode_delta_record`), so descriptors and fingerprints are computed
+    afterwards, from the structure that is simulated and later reloaded.
+
+    """
+    dump_pseudo_materials(pseudo_materials)
+    for material, pseudo_material in zip(materials, pseudo_materials):
+        material.update_from_dict(structure_descriptors(pseudo_material))
+        material.fingerprint = pseudo_material.fingerprint()
+
+def reuse_twin_properties(material):
+    """Copy simulation results from an already-simulated duplicate.
+
+    Args:
+        material (Material): unsimulated material, with its fingerprint.
+
+    Returns:
+        bool: True if a twin was found (see `Material.find_twin`) and its
+            results copied, when `reuse_duplicate_properties` is set in config.
+
+    """
+    if not config.get('reuse_duplicate_properties', False):
+        return False
+    twin = material.find_twin()
+    if twin is None:
+        return False
+    print("Structure duplicates material %s; reusing its properties." % twin.id)
+    material.copy_properties(twin)
+    return True
+
+def remove_staging_directories(run_id, materials):
+    """Remove the staging areas of materials that will not be simulated again."""
+    for material in materials:
+        remove_staging_directory(run_id, material.uuid)
+
+def _exit_on_sigterm(signum, frame):
+    """Turn SIGTERM into SystemExit, so that buffered materials are saved."""
+    sys.exit(128 + signum)
+
 def worker_run_loop(run_id):
     """
     Args:
@@ -336,71 +875,60 @@ def worker_run_loop(run_id):
     bin-mutate-simualte routine until convergence cutt-off or maximum
     number of generations is reached.
 
+    Simulated materials are saved through a `MaterialWriteBuffer`, flushed
+    every `write_buffer` `size` materials (default 1) or `interval` seconds
+    (default 0), at the end of each generation, and when the worker exits.
+
     """
     gen = last_generation(run_id) or 0
-
-    converged = False
-    while not converged:
-        print(
-                (
-                    '=======================================================\n'
-                    'GENERATION {0}\n'
-                    '=======================================================\n'
-                ).format(gen)
-            )
-        size_of_generation = config['children_per_generation']
-
-        while materials_in_generation(run_id, gen) < size_of_generation:
-            if gen == 0:
-                print("writing new seed...")
-                material, pseudo_material = generate_pseudo_material(
-                        run_id, config['number_of_atom_types'])
-                pseudo_material.dump()
-            else:
-                print("selecting a parent / running retests on parent / mutating / simulating")
-                parent_id = select_parent(run_id, max_generation=(gen - 1),
-                                                  generation_limit=config['children_per_generation'])
-
-                parent_material = session.query(Material).get(parent_id)
-
-                # run retests until we've run enough
-                while parent_material.retest_passed is None:
-                    print("running retest...")
-                    print("Date :\t%s" % datetime.now().date().isoformat())
-                    print("Time :\t%s" % datetime.now().time().isoformat())
-                    parent_pseudo_material_path = os.path.join(
-                            os.path.dirname(os.path.dirname(htsohm.__file__)),
-                            run_id, 'pseudo_materials', '{0}.yaml'.format(
-                                parent_material.uuid)
-                        )
-                    with open(parent_pseudo_material_path) as parent_file:
-                        parent_pseudo_material = yaml.load(parent_file)
-                    retest(
-                            parent_material, config['retests']['number'],
-                            config['retests']['tolerance'], parent_pseudo_material
-                        )
-                    session.refresh(parent_material)
-
-                if not parent_material.retest_passed:
-                    print("parent failed retest. restarting with parent selection.")
-                    continue
-
-                mutation_strength = mutate(run_id, gen, parent_material)
-                material, pseudo_material = mutate_pseudo_material(
-                        parent_material, parent_pseudo_material, mutation_strength, gen)
-                pseudo_material.dump()
-            run_all_simulations(material, pseudo_material)
-            session.add(material)
-            session.commit()
-
-            material.generation_index = material.calculate_generation_index()
-            if material.generation_index < config['children_per_generation']:
-                session.add(material)
-            else:
-                # delete excess rows
-                # session.delete(material)
-                pass
-            session.commit()
-            sys.stdout.flush()
-        gen += 1
-        converged = evaluate_convergence(run_id, gen)
+    rebuild_convergence_statistics(run_id)
+    buffer_settings = config.get('write_buffer', {})
+    write_buffer = MaterialWriteBuffer(buffer_settings.get('size', 1),
+            buffer_settings.get('interval', 0.))
+    signal.signal(signal.SIGTERM, _exit_on_sigterm)
+
+    try:
+        converged = False
+        while not converged:
+            print(
+                    (
+                        '=======================================================\n'
+                        'GENERATION {0}\n'
+                        '=======================================================\n'
+                    ).format(gen)
+                )
+            size_of_generation = config['children_per_generation']
+            if gen > 0:
+                mutation_strengths(run_id, gen)
+
+            while materials_in_generation(run_id, gen) + \
+                    write_buffer.pending_in_generation(gen) < size_of_generation:
+                materials, pseudo_materials = [], []
+                while len(materials) < simulation_batch_size():
+                    children = new_materials(run_id, gen)
+                    # save the structure rejection counts recorded while making
+                    # these children, so their rows are not locked while the
+                    # next parent is retested
+                    session.commit()
+                    for material, pseudo_material in children:
+                        materials.append(material)
+                        pseudo_materials.append(pseudo_material)
+                store_pseudo_materials(materials, pseudo_materials)
+
+                to_simulate = [(m, p) for m, p in zip(materials, pseudo_materials)
+                        if not reuse_twin_properties(m)]
+                if to_simulate:
+                    run_batch_simulations(*zip(*to_simulate))
+                remove_staging_directories(run_id, write_buffer.add(materials))
+                # end the unit of work, so the session's identity map does not
+                # grow with the run; buffered materials are not yet in it
+                session.remove()
+                sys.stdout.flush()
+            remove_staging_directories(run_id, write_buffer.flush())
+            session.remove()
+            gen += 1
+            converged = evaluate_convergence(run_id, gen)
+    finally:
+        # discard any transaction left open by an error before saving
+        session.rollback()
+        remove_staging_directories(run_id, write_buffer.flush())
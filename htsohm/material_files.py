@@ -1,7 +1,6 @@
 # standard library imports
 import sys
 import os
-from random import choice, random, randrange, uniform
 import shutil
 from uuid import uuid4
 
@@ -12,10 +11,13 @@ import yaml
 # local application/library specific imports
 import htsohm
 from htsohm import config
-from htsohm.pseudo_material import PseudoMaterial
-from htsohm.db import session, Material
+from htsohm.pseudo_material import ATOM_TYPE_DTYPE, PseudoMaterial
+from htsohm.db import session, Material, StructureRejection
+from htsohm.geometry import neighbor_pairs, packing_fraction
 
-def random_number_density(number_density_limits, lattice_constants):
+_rng = np.random.default_rng()
+
+def random_number_density(number_density_limits, lattice_constants, rng=None):
     """Produces random number for atom-sites in a unit cell, constrained by
     some number density limits.
 
@@ -26,37 +28,46 @@ def random_number_density(number_density_limits, lattice_constants):
             {"a" : (float),
              "b" : (float),
              "c" : (float)}
+            or an array of shape (..., 3), one row per unit cell.
+        rng (numpy.random.Generator): random number source (default: a
+            generator shared by the process).
     
     Returns:
-        atoms (int): some random number of atom-sites under the imposed limits.
+        atoms (int): some random number of atom-sites under the imposed limits,
+            or an array of them if `lattice_constants` is an array.
 
         If the minimum number density results in a unit cell with less than 2
         atom-sites with the given lattice constants, a minimum number density
         of TWO ATOM SITES PER UNIT CELL is imposed.
     
     """
+    if rng is None:
+        rng = _rng
+    if isinstance(lattice_constants, dict):
+        return int(random_number_density(number_density_limits,
+            np.array([lattice_constants[i] for i in ['a', 'b', 'c']]), rng))
     min_ND = number_density_limits[0]
     max_ND = number_density_limits[1]
-    v = lattice_constants["a"] * lattice_constants["b"] * lattice_constants["c"]
-    min_atoms = int(min_ND * v)
-    max_atoms = int(max_ND * v)
-    if min_atoms < 2:
-        min_atoms = int(2)
-    atoms = randrange(min_atoms, max_atoms + 1, 1)
-    return atoms
-
-def generate_pseudo_material(run_id, number_of_atomtypes):
+    v = np.prod(lattice_constants, axis=-1)
+    min_atoms = np.maximum((min_ND * v).astype(int), 2)
+    max_atoms = (max_ND * v).astype(int)
+    return rng.integers(min_atoms, max_atoms + 1)
+
+def generate_pseudo_material(run_id, number_of_atomtypes, rng=None):
     """Write .def and .cif files for a randomly-generated porous material.
 
     Args:
         run_id (str): identification string for run.
         number_of_atomtypes (int): number of different chemical species used to
             populate the unit cell.
+        rng (numpy.random.Generator): random number source (default: a
+            generator shared by the process).
 
     Returns:
         material (sqlalchemy.orm.query.Query): database row for storing 
             simulation data specific to the material. See
             `htsohm/db/material.py` for more information.
+        pseudo_material (PseudoMaterial): the material's structure.
 
     Atom-sites and unit-cell dimensions are stored in a .cif-file within RASPA's
     structures library: `$(raspa-dir)/structures/cif`. Force field parameters
@@ -68,365 +79,536 @@ def generate_pseudo_material(run_id, number_of_atomtypes):
     `force_field.def`, but by default no interactions are overwritten in this file.
  
     """
+    pseudo_material = generate_pseudo_materials(run_id, number_of_atomtypes, 1, rng)[0]
+    material = Material(run_id)
+    material.uuid = pseudo_material.uuid
+    material.generation = 0
+    return material, pseudo_material
+
+def generate_pseudo_materials(run_id, number_of_atomtypes, count, rng=None):
+    """Randomly generate many seed pseudo materials at once.
+
+    Args:
+        run_id (str): identification string for run.
+        number_of_atomtypes (int): number of different chemical species used to
+            populate each unit cell.
+        count (int): number of pseudo materials to generate.
+        rng (numpy.random.Generator): random number source (default: a
+            generator shared by the process).
+
+    Returns:
+        pseudo_materials (list): `count` new PseudoMaterials, each with a new
+            uuid, drawn from the same distributions as `generate_pseudo_material`.
+
+    Every random parameter of every material is drawn in one call per
+    parameter; the materials' coordinate and type-index arrays are views of
+    one array each. Materials rejected by `validate_pseudo_material` are
+    replaced, and counted in the `structure_rejections` table; the caller
+    commits the counts.
+
+    Raises:
+        ValueError: if `MAX_CANDIDATES_PER_MATERIAL` times `count` candidates
+            are drawn without accepting `count` of them.
+
+    """
+    if rng is None:
+        rng = _rng
+    pseudo_materials = []
+    outcomes = {}
+    drawn = 0
+    while len(pseudo_materials) < count:
+        if drawn >= MAX_CANDIDATES_PER_MATERIAL * count:
+            raise ValueError('Only %s of %s generated structures were accepted (%s); '
+                    'check structure_validation in config.' % (
+                        len(pseudo_materials), drawn, outcomes))
+        candidates = _random_pseudo_materials(run_id, number_of_atomtypes,
+                count - len(pseudo_materials), rng)
+        drawn += len(candidates)
+        for pseudo_material in candidates:
+            outcome = validate_pseudo_material(pseudo_material)
+            if outcome is not None:
+                outcomes[outcome] = outcomes.get(outcome, 0) + 1
+            if outcome is None or outcome == REPAIRED:
+                pseudo_materials.append(pseudo_material)
+    for outcome, outcome_count in outcomes.items():
+        StructureRejection.record(run_id, outcome, outcome_count)
+    return pseudo_materials
+
+def _random_pseudo_materials(run_id, number_of_atomtypes, count, rng):
+    """Draw `count` random pseudo materials; see `generate_pseudo_materials`."""
     lattice_limits          = config["lattice_constant_limits"]
     number_density_limits   = config["number_density_limits"]
     epsilon_limits          = config["epsilon_limits"]
     sigma_limits            = config["sigma_limits"]
-    max_charge              = config["charge_limit"]
-    elem_charge             = config["elemental_charge"]
 
-    ########################################################################
-    material = Material(run_id)
-    material.generation = 0
-    pseudo_material = PseudoMaterial(material.uuid)
-    
-    pseudo_material.run_id = run_id
-
-    pseudo_material.atom_types = []
-    for chemical_id in range(number_of_atomtypes):
-        pseudo_material.atom_types.append({
-            "chemical-id" : "A_%s" % chemical_id,
-            "charge"      : 0.,    # See NOTE above.
-            "epsilon"     : uniform(*epsilon_limits),
-            "sigma"       : uniform(*sigma_limits)
-        })
-
-    pseudo_material.lattice_constants = {}
-    for i in ['a', 'b', 'c']:
-        pseudo_material.lattice_constants[i] = uniform(*lattice_limits)
-
-    pseudo_material.number_of_atoms   = random_number_density(
-        number_density_limits, pseudo_material.lattice_constants)
-
-    pseudo_material.atom_sites = []
-    for atom in range(pseudo_material.number_of_atoms):
-        atom_site = {"chemical-id" : choice(pseudo_material.atom_types)["chemical-id"]}
-        for i in ['x-frac', 'y-frac', 'z-frac']:
-            atom_site[i] = random()
-        pseudo_material.atom_sites.append(atom_site)
+    shape = (count, number_of_atomtypes)
+    epsilons = rng.uniform(*epsilon_limits, size=shape)
+    sigmas = rng.uniform(*sigma_limits, size=shape)
+    lattices = rng.uniform(*lattice_limits, size=(count, 3))
+    numbers_of_atoms = random_number_density(number_density_limits, lattices, rng)
+
+    total_atoms = int(numbers_of_atoms.sum())
+    coordinates = rng.random((total_atoms, 3))
+    type_indices = rng.integers(number_of_atomtypes, size=total_atoms)
+    splits = np.cumsum(numbers_of_atoms)[:-1]
+
+    chemical_ids = ["A_%s" % chemical_id for chemical_id in range(number_of_atomtypes)]
+    pseudo_materials = []
+    for i, (material_coordinates, material_type_indices) in enumerate(zip(
+            np.split(coordinates, splits), np.split(type_indices, splits))):
+        pseudo_material = PseudoMaterial(str(uuid4()))
+        pseudo_material.run_id = run_id
+        atom_types = np.zeros(number_of_atomtypes, dtype=ATOM_TYPE_DTYPE)
+        atom_types['chemical-id'] = chemical_ids
+        atom_types['charge'] = 0.    # See NOTE in `write_pseudo_atoms`.
+        atom_types['epsilon'] = epsilons[i]
+        atom_types['sigma'] = sigmas[i]
+        pseudo_material.atom_type_parameters = atom_types
+        pseudo_material.lattice = lattices[i]
+        pseudo_material.fractional_coordinates = material_coordinates
+        pseudo_material.type_indices = material_type_indices
+        pseudo_materials.append(pseudo_material)
+    return pseudo_materials
+
+REPAIRED = 'repaired'
+
+# generating seeds gives up after drawing this many candidates per material
+MAX_CANDIDATES_PER_MATERIAL = 100
+
+def validate_pseudo_material(pseudo_material):
+    """Screen a structure for overlapping atom-sites and overfilled unit cells.
 
-    return material, pseudo_material
+    Args:
+        pseudo_material (PseudoMaterial): structure to screen; repaired in
+            place.
+
+    Returns:
+        outcome (str): None if the structure is unchanged, `REPAIRED` if
+            overlapping atom-sites were removed, otherwise why the structure
+            was rejected: 'overlap', 'too_few_atoms' or 'packing_fraction'.
+
+    Two atom-sites overlap when they are closer than `overlap_fraction`
+    (default 0.1) of their Lorentz-Berthelot sigma; one of each overlapping
+    pair is removed, unless that removes more than `max_repaired_fraction`
+    (default 0.05) of the atom-sites. Structures whose atom-sites (as spheres
+    of diameter sigma) fill more than `max_packing_fraction` of the unit cell
+    are rejected, if set. Settings are read from `structure_validation` in
+    config.
+
+    """
+    settings = config.get('structure_validation', {})
+    overlap_fraction = settings.get('overlap_fraction', 0.1)
+    max_repaired_fraction = settings.get('max_repaired_fraction', 0.05)
+    max_packing_fraction = settings.get('max_packing_fraction')
+
+    outcome = None
+    sigmas = pseudo_material.atom_type_parameters['sigma'][pseudo_material.type_indices]
+    if len(sigmas) > 1:
+        i, j, distances = neighbor_pairs(pseudo_material.fractional_coordinates,
+                pseudo_material.lattice, overlap_fraction * sigmas.max())
+        overlapping = distances < overlap_fraction * (sigmas[i] + sigmas[j]) / 2
+        if overlapping.any():
+            removed = np.zeros(len(sigmas), dtype=bool)
+            for a, b in zip(i[overlapping].tolist(), j[overlapping].tolist()):
+                if not (removed[a] or removed[b]):
+                    removed[b] = True
+            if removed.sum() > max_repaired_fraction * len(sigmas):
+                return 'overlap'
+            kept = ~removed
+            pseudo_material.fractional_coordinates = pseudo_material.fractional_coordinates[kept]
+            pseudo_material.type_indices = pseudo_material.type_indices[kept]
+            parent_site_indices = pseudo_material.parent_site_indices
+            if parent_site_indices is not None:
+                pseudo_material.parent_site_indices = \
+                        parent_site_indices[kept[:len(parent_site_indices)]]
+            outcome = REPAIRED
+
+    if pseudo_material.number_of_atoms < 2:
+        return 'too_few_atoms'
+    if max_packing_fraction is not None and \
+            packing_fraction(pseudo_material) > max_packing_fraction:
+        return 'packing_fraction'
+    return outcome
 
 def closest_distance(x, y):
     """Finds closest distance between two points across periodic boundaries.
 
     Args:
-        x (float): value in range [0,1].
-        y (float): value in range [0,1].
+        x (float or numpy.ndarray): value(s) in range [0,1].
+        y (float or numpy.ndarray): value(s) in range [0,1].
 
     Returns:
-        D (float): closest distance measured between `x` and `y`, with
-            periodic boundaries at 0 and 1. For example, the disance between
-            x = 0.2 and y = 0.8 would be 0.4, and not 0.6.
+        D (float or numpy.ndarray): closest distance measured between `x` and
+            `y`, with periodic boundaries at 0 and 1. For example, the disance
+            between x = 0.2 and y = 0.8 would be 0.4, and not 0.6.
 
     """
-    a = 1 - y + x
-    b = abs(y - x)
-    c = 1 - x + y
-    return min(a, b, c)
+    return np.abs(periodic_displacement(x, y))
+
+def periodic_displacement(x, y):
+    """Finds signed displacement from `x` to the closest periodic image of `y`.
+
+    Args:
+        x (float or numpy.ndarray): value(s) in range [0,1].
+        y (float or numpy.ndarray): value(s) in range [0,1].
+
+    Returns:
+        dx (float or numpy.ndarray): displacement in range [-0.5, 0.5]; for
+            example, from x = 0.2 to y = 0.8 it is -0.4.
+
+    """
+    dx = np.subtract(y, x)
+    return dx - np.round(dx)
 
 def random_position(x_o, x_r, strength):
     """Produces a point along the closest path between two points.
 
     Args:
-        x_o (float): value in range [0,1].
-        x_r (float): value in range [0,1].
+        x_o (float or numpy.ndarray): value(s) in range [0,1].
+        x_r (float or numpy.ndarray): value(s) in range [0,1].
         strength (float): refers to mutation strength. Value determines
             fractional distance to `x_r` from `x_o`.
 
     Returns:
-        xfrac (float): a value between `x_o` and `x_r` across the closest
-            distance accross periodic boundaries at 0 and 1.
+        xfrac (float or numpy.ndarray): a value between `x_o` and `x_r` across
+            the closest distance accross periodic boundaries at 0 and 1.
 
     """
-    dx = closest_distance(x_o, x_r)
-    if (x_o > x_r
-            and (x_o - x_r) > 0.5):
-        xfrac = (x_o + strength * dx) % 1.
-    if (x_o < x_r
-            and (x_r - x_o) > 0.5):
-        xfrac = (x_o - strength * dx) % 1.
-    if (x_o >= x_r
-            and (x_o - x_r) < 0.5):
-        xfrac = x_o - strength * dx
-    if (x_o < x_r
-            and (x_r - x_o) < 0.5):
-        xfrac = x_o + strength * dx
-    return xfrac
-
-def mutate_pseudo_material(parent_material, parent_pseudo_material, mutation_strength, generation):
+    return (x_o + strength * periodic_displacement(x_o, x_r)) % 1.
+
+def mutate_pseudo_material(parent_material, parent_pseudo_material, mutation_strength,
+        generation, rng=None):
     """Modifies a "parent" material's definition files by perturbing each
     parameter by some factor, dictated by the `mutation_strength`.
     
     Args:
-        run_id (str): identification string for run.
-        parent_id (str): uuid, identifying parent material in database.
-        generation (int): iteration count for overall bin-mutate-simulate routine.
+        parent_material (sqlalchemy.orm.query.Query): parent's database row.
+        parent_pseudo_material (PseudoMaterial): parent's structure.
         mutation_strength (float): perturbation factor [0, 1].
+        generation (int): iteration count for overall bin-mutate-simulate routine.
+        rng (numpy.random.Generator): random number source (default: a
+            generator shared by the process).
 
     Returns:
         new_material (sqlalchemy.orm.query.Query): database row for storing 
             simulation data specific to the material. See
             `htsohm/db/material.py` for more information.
+        new_pseudo_material (PseudoMaterial): child's structure.
+        Returns None instead if the child's structure is rejected by
+        `validate_pseudo_material`.
 
     Todo:
         * Add methods for assigning and mutating charges.
 
     """
-    
+    children = mutate_pseudo_materials(parent_material, parent_pseudo_material,
+            mutation_strength, generation, 1, rng)
+    return children[0] if children else None
+
+def mutate_pseudo_materials(parent_material, parent_pseudo_material, mutation_strength,
+        generation, count, rng=None):
+    """Mutate a brood of children from one parent at one mutation strength.
+
+    Args:
+        parent_material (sqlalchemy.orm.query.Query): parent's database row.
+        parent_pseudo_material (PseudoMaterial): parent's structure.
+        mutation_strength (float): perturbation factor [0, 1].
+        generation (int): iteration count for overall bin-mutate-simulate routine.
+        count (int): number of children to mutate.
+        rng (numpy.random.Generator): random number source (default: a
+            generator shared by the process).
+
+    Returns:
+        children (list): (new_material, new_pseudo_material) for each child
+            whose structure was not rejected by `validate_pseudo_material`;
+            see `mutate_pseudo_material`.
+
+    Each random parameter of every child is drawn in one call, and every
+    child's atom-site positions are perturbed together.
+
+    """
+    if rng is None:
+        rng = _rng
+
     ########################################################################
     # load boundaries from config-file
     lattice_limits          = config["lattice_constant_limits"]
     number_density_limits   = config["number_density_limits"]
-
-    ########################################################################
-    # create material object
-    child_material = Material(parent_material.run_id)
-    child_material.parent_id = parent_material.id
-    child_material.generation = generation
-    child_pseudo_material = PseudoMaterial(child_material.uuid)
-
-    child_pseudo_material.run_id = parent_pseudo_material.run_id
+    parent_atom_types = parent_pseudo_material.atom_type_parameters
+    parent_number_of_atoms = parent_pseudo_material.number_of_atoms
 
     ########################################################################
     # perturb LJ-parameters
-    child_pseudo_material.atom_types = parent_pseudo_material.atom_types.copy()
-    for atom_type in child_pseudo_material.atom_types:    
-        for x in ['epsilon', 'sigma']:
-            old_x = atom_type[x]
-            random_x = uniform(*config["{0}_limits".format(x)])
-            atom_type[x] += mutation_strength * (random_x - old_x)
+    shape = (count, len(parent_atom_types))
+    lj_parameters = {}
+    for x in ['epsilon', 'sigma']:
+        random_x = rng.uniform(*config["{0}_limits".format(x)], size=shape)
+        lj_parameters[x] = parent_atom_types[x] + mutation_strength * (
+                random_x - parent_atom_types[x])
 
     ########################################################################
     # calculate new lattice constants
-    child_pseudo_material.lattice_constants = parent_pseudo_material.\
-            lattice_constants.copy()
-    for i in ['a', 'b', 'c']:
-        old_x = parent_pseudo_material.lattice_constants[i]
-        random_x = uniform(*lattice_limits)
-        child_pseudo_material.lattice_constants[i] += mutation_strength * (
-                random_x - old_x)
+    random_x = rng.uniform(*lattice_limits, size=(count, 3))
+    lattices = parent_pseudo_material.lattice + \
+            mutation_strength * (random_x - parent_pseudo_material.lattice)
 
     ########################################################################
     #perturb number density, calculate number of atoms
     child_ND = parent_pseudo_material.number_density()
-    random_ND = uniform(*number_density_limits)
-    child_ND += mutation_strength * (random_ND - child_ND)
-    child_number_of_atoms = (
-            int(child_ND * child_pseudo_material.volume()))
+    random_ND = rng.uniform(*number_density_limits, size=count)
+    child_ND = child_ND + mutation_strength * (random_ND - child_ND)
+    numbers_of_atoms = (child_ND * lattices.prod(axis=1)).astype(int)
 
     ########################################################################
-    # remove excess atom-sites, if any
-    child_pseudo_material.atom_sites = np.random.choice(
-            parent_pseudo_material.atom_sites,
-            min(child_number_of_atoms,
-                len(parent_pseudo_material.atom_sites)),
-            replace=False).tolist()
-    
+    # remove excess atom-sites, if any: each child keeps the first sites of
+    # its own random permutation of the parent's sites
+    permutations = rng.random((count, parent_number_of_atoms)).argsort(axis=1)
+    numbers_kept = np.minimum(numbers_of_atoms, parent_number_of_atoms)
+
     ########################################################################
     # perturb atom-site positions
-    for atom_site in child_pseudo_material.atom_sites:
-        for i in ['x-frac', 'y-frac', 'z-frac']:
-            atom_site[i] = random_position(
-                    atom_site[i], random(), mutation_strength)
+    coordinates = random_position(
+            parent_pseudo_material.fractional_coordinates[permutations],
+            rng.random((count, parent_number_of_atoms, 3)), mutation_strength)
 
     ########################################################################
     # add atom-sites, if needed
-    if child_number_of_atoms > len(child_pseudo_material.atom_sites):
-        for new_sites in range(child_number_of_atoms -
-                len(child_pseudo_material.atom_sites)):
-            new_atom_site = {'chemical-id' : choice(
-                child_pseudo_material.atom_types)['chemical-id']}
-            for i in ['x-frac', 'y-frac', 'z-frac']:
-                new_atom_site[i] = random()
-            child_pseudo_material.atom_sites.append(new_atom_site)
+    numbers_new = np.maximum(numbers_of_atoms - numbers_kept, 0)
+    new_type_indices = rng.integers(len(parent_atom_types), size=numbers_new.sum())
+    new_coordinates = rng.random((numbers_new.sum(), 3))
+    splits = np.cumsum(numbers_new)[:-1]
+
+    children = []
+    outcomes = {}
+    for i, (type_indices, added_coordinates) in enumerate(zip(
+            np.split(new_type_indices, splits), np.split(new_coordinates, splits))):
+        ####################################################################
+        # create material object
+        child_material = Material(parent_material.run_id)
+        child_material.parent_id = parent_material.id
+        child_material.generation = generation
+        child_pseudo_material = PseudoMaterial(child_material.uuid)
+        child_pseudo_material.run_id = parent_pseudo_material.run_id
+
+        atom_types = parent_atom_types.copy()
+        atom_types['epsilon'] = lj_parameters['epsilon'][i]
+        atom_types['sigma'] = lj_parameters['sigma'][i]
+        child_pseudo_material.atom_type_parameters = atom_types
+        child_pseudo_material.lattice = lattices[i]
+
+        kept_sites = permutations[i, :numbers_kept[i]]
+        child_pseudo_material.type_indices = np.concatenate([
+                parent_pseudo_material.type_indices[kept_sites], type_indices])
+        child_pseudo_material.fractional_coordinates = np.concatenate([
+                coordinates[i, :numbers_kept[i]], added_coordinates])
+        child_pseudo_material.parent_uuid = parent_pseudo_material.uuid
+        child_pseudo_material.parent_site_indices = kept_sites
+
+        ####################################################################
+        # screen out, or repair, implausible structures
+        outcome = validate_pseudo_material(child_pseudo_material)
+        if outcome is not None:
+            outcomes[outcome] = outcomes.get(outcome, 0) + 1
+            if outcome != REPAIRED:
+                print("child structure rejected (%s)." % outcome)
+                continue
+        children.append((child_material, child_pseudo_material))
+
+    for outcome, outcome_count in outcomes.items():
+        StructureRejection.record(parent_pseudo_material.run_id, outcome, outcome_count)
+    return children
+
+# Constant parts of the framework files, rendered once.
+CIF_SYMMETRY = (
+    "\nloop_\n" +
+    "_symmetry_equiv_pos_as_xyz\n" +
+    "  x,y,z\n"
+)
+CIF_ATOM_SITE_HEADER = (
+    "_cell_angle_alpha  90.0000\n" +
+    "_cell_angle_beta   90.0000\n" +
+    "_cell_angle_gamma  90.0000\n" +
+    "loop_\n" +
+    "_atom_site_label\n" +
+    "_atom_site_type_symbol\n" +
+    "_atom_site_fract_x\n" +
+    "_atom_site_fract_y\n" +
+    "_atom_site_fract_z\n"
+)
+# (name, epsilon, sigma) of adsorbate pseudo atoms
+ADSORBATE_LJ_ATOMS = [
+        ['N_n2',    36.0,       3.31],
+        ['C_co2',   27.0,       2.80],
+        ['O_co2',   79.0,       3.05],
+        ['CH4_sp3', 158.5,      3.72],
+        ['He',      10.9,       2.64],
+        ['H_com',   36.7,       2.958],
+        ['Kr',      167.06,     3.924],
+        ['Xe',      110.704,    3.690]
+]
+ADSORBATE_NONE_ATOMS = ['N_com', 'H_h2']
+NUMBER_OF_ADSORBATE_ATOMS = len(ADSORBATE_LJ_ATOMS) + len(ADSORBATE_NONE_ATOMS)
+MIXING_RULES_HEADER = (
+    "# general rule for shifted vs truncated\n" +
+    "shifted\n" +
+    "# general rule tailcorrections\n" +
+    "no\n" +
+    "# number of defined interactions\n"
+)
+MIXING_RULES_INTERACTIONS_HEADER = (
+    "# type interaction, parameters.    " +
+    "IMPORTANT: define shortest matches first, so" +
+    " that more specific ones overwrites these\n"
+)
+MIXING_RULES_ADSORBATES = (
+    "".join("{0:12} lennard-jones {1:8f} {2:8f}\n".format(*at) for at in ADSORBATE_LJ_ATOMS) +
+    "".join("{0:12} none\n".format(at) for at in ADSORBATE_NONE_ATOMS) +
+    "# general mixing rule for Lennard-Jones\n" +
+    "Lorentz-Berthelot"
+)
+PSEUDO_ATOMS_HEADER = (
+    "#type  print   as  chem    oxidation   mass    charge  polarization    B-factor    radii   " +
+         "connectivity  anisotropic anisotrop-type  tinker-type\n"
+)
+PSEUDO_ATOMS_ADSORBATES = (
+    "N_n2     yes  N   N   0   14.00674   -0.4048   0.0  1.0  0.7    0  0  relative  0\n" +
+    "N_com    no   N   -   0    0.0        0.8096   0.0  1.0  0.7    0  0  relative  0\n" +
+    "C_co2    yes  C   C   0   12.0        0.70     0.0  1.0  0.720  0  0  relative  0\n" +
+    "O_co2    yes  O   O   0   15.9994    -0.35     0.0  1.0  0.68   0  0  relative  0\n" +
+    "CH4_sp3  yes  C   C   0   16.04246    0.0      0.0  1.0  1.00   0  0  relative  0\n" +
+    "He       yes  He  He  0    4.002602   0.0      0.0  1.0  1.0    0  0  relative  0\n" +
+    "H_h2     yes  H   H   0    1.00794    0.468    0.0  1.0  0.7    0  0  relative  0\n" +
+    "H_com    no   H   H   0    0.0        0.936    0.0  1.0  0.7    0  0  relative  0\n" +
+    "Xe       yes  Xe  Xe  0  131.293      0.0      0.0  1.0  2.459  0  0  relative  0\n" +
+    "Kr       yes  Kr  Kr  0   83.798      0.0      0.0  1.0  2.27   0  0  relative  0\n"
+)
+FORCE_FIELD = (
+    "# rules to overwrite\n" +
+    "0\n" +
+    "# number of defined interactions\n" +
+    "0\n" +
+    "# mixing rules to overwrite\n" +
+    "0"
+).encode('ascii')
+
+def render_cif_file(material):
+    """Renders .cif file for structural information.
+
+    Args:
+        material (PseudoMaterial): material to render.
+
+    Returns:
+        cif (bytes): contents of the .cif file; identical materials always
+            render identically.
 
-    return child_material, child_pseudo_material
+    Coordinates are rounded to four decimal places (and printed with six).
+
+    """
+    chemical_ids = np.array(material.chemical_ids, dtype=object)
+    rows = np.empty((material.number_of_atoms, 4), dtype=object)
+    rows[:, 0] = chemical_ids[material.type_indices]
+    rows[:, 1:] = material.fractional_coordinates
+    return (
+        CIF_SYMMETRY +
+        "".join("_cell_length_{}    {}\n".format(i, round(x, 4))
+            for i, x in zip(['a', 'b', 'c'], material.lattice.tolist())) +
+        CIF_ATOM_SITE_HEADER +
+        ("%-5s C %.4f00 %.4f00 %.4f00\n" * len(rows)) % tuple(rows.ravel().tolist())
+    ).encode('ascii')
 
 def write_cif_file(material, simulation_path):
     """Writes .cif file for structural information.
 
     Args:
-        file_name (str): path to .cif-file, for example:
-            `$(raspa-dir)/structures/cif/(run_id)-(uuid).cif`.
-        lattice_constants (dict): crystal lattice constants, for example:
-            {"a" : (float),
-             "b" : (float),
-             "c" : (float)}
-        atom_sites (list): dictionaries for each atom-site describing position
-            and chemical species, for example:
-            {"chemical-id" : chemical_id,
-             "x-frac"      : x,
-             "y-frac"      : y,
-             "z-frac"      : z}
-
-    Writes .cif file in RASPA's library:
-        `$(raspa-dir)/structures/cif/(run_id)-(uuid).cif`
+        material (PseudoMaterial): material to write, see `render_cif_file`.
+        simulation_path (str): directory to write `(uuid).cif` in.
 
     """
     file_name = os.path.join(simulation_path, '%s.cif' % material.uuid)
-    with open(file_name, "w") as cif_file:
-        cif_file.write(
-            "\nloop_\n" +
-            "_symmetry_equiv_pos_as_xyz\n" +
-            "  x,y,z\n"
-        )
-        for i in ['a', 'b', 'c']:
-            cif_file.write(
-            "_cell_length_{}    {}\n".format(i, 
-                round(material.lattice_constants[i], 4))
-        )
-        cif_file.write(
-            "_cell_angle_alpha  90.0000\n" +
-            "_cell_angle_beta   90.0000\n" +
-            "_cell_angle_gamma  90.0000\n" +
-            "loop_\n" +
-            "_atom_site_label\n" +
-            "_atom_site_type_symbol\n" +
-            "_atom_site_fract_x\n" +
-            "_atom_site_fract_y\n" +
-            "_atom_site_fract_z\n"
-        )
-        for atom_site in material.atom_sites:
-            cif_file.write(
-            "{0:5} C {1:4f} {2:4f} {3:4f}\n".format(
-                atom_site["chemical-id"],
-                round(atom_site["x-frac"], 4),
-                round(atom_site["y-frac"], 4),
-                round(atom_site["z-frac"], 4)
-            ))
+    with open(file_name, "wb") as cif_file:
+        cif_file.write(render_cif_file(material))
+
+def render_mixing_rules(material):
+    """Renders .def file for forcefield information.
+
+    Args:
+        material (PseudoMaterial): material whose atom-types' LJ-type
+            interactions are defined, along with every adsorbate's.
+
+    Returns:
+        mixing_rules (bytes): contents of `force_field_mixing_rules.def`.
+
+    """
+    return (
+        MIXING_RULES_HEADER +
+        "{}\n".format(len(material.atom_type_parameters) + NUMBER_OF_ADSORBATE_ATOMS) +
+        MIXING_RULES_INTERACTIONS_HEADER +
+        "".join("{0:12} lennard-jones {1:8f} {2:8f}\n".format(
+                chemical_id, round(epsilon, 4), round(sigma, 4))
+            for chemical_id, epsilon, sigma in zip(material.chemical_ids,
+                material.atom_type_parameters['epsilon'].tolist(),
+                material.atom_type_parameters['sigma'].tolist())) +
+        MIXING_RULES_ADSORBATES
+    ).encode('ascii')
 
 def write_mixing_rules(material, simulation_path):
     """Writes .def file for forcefield information.
 
     Args:
-        file_name (str): path to mixing-rules file, for example:
-            `$(raspa-dir)/forcefield/(run_id)-(uuid)/force_field_mixing_rules.def`
-        atom_types (list): dictionaries for each atom-type describing LJ-type
-            interactions, for example:
-            {"chemical-id" : chemical_ids[i],
-             "charge"      : 0.,
-             "epsilon"     : epsilon,
-             "sigma"       : sigma}
-
-    Writes file within RASPA's library:
-        `$(raspa-dir)/forcefield/(run_id)-(uuid)/force_field_mixing_rules.def`
+        material (PseudoMaterial): material to write, see `render_mixing_rules`.
+        simulation_path (str): directory to write
+            `force_field_mixing_rules.def` in.
 
     """
-    adsorbate_LJ_atoms = [
-            ['N_n2',    36.0,       3.31],
-            ['C_co2',   27.0,       2.80],
-            ['O_co2',   79.0,       3.05],
-            ['CH4_sp3', 158.5,      3.72],
-            ['He',      10.9,       2.64],
-            ['H_com',   36.7,       2.958],
-            ['Kr',      167.06,     3.924],
-            ['Xe',      110.704,    3.690]
-    ]
- 
-    adsorbate_none_atoms = ['N_com', 'H_h2']
-
     file_name = os.path.join(simulation_path, 'force_field_mixing_rules.def')
-    with open(file_name, "w") as mixing_rules_file:
-        mixing_rules_file.write(
-            "# general rule for shifted vs truncated\n" +
-            "shifted\n" +
-            "# general rule tailcorrections\n" +
-            "no\n" +
-            "# number of defined interactions\n" +
-            "{}\n".format(len(material.atom_types) + 10) +
-            "# type interaction, parameters.    " +
-            "IMPORTANT: define shortest matches first, so" +
-            " that more specific ones overwrites these\n"
-        )
-        for atom_type in material.atom_types:
-            mixing_rules_file.write(
-                "{0:12} lennard-jones {1:8f} {2:8f}\n".format(
-                    atom_type["chemical-id"],
-                    round(atom_type["epsilon"], 4),
-                    round(atom_type["sigma"], 4)
-                )
-            )
-        for at in adsorbate_LJ_atoms:
-            mixing_rules_file.write(
-                "{0:12} lennard-jones {1:8f} {2:8f}\n".format(at[0], at[1], at[2])
-            )
-        for at in adsorbate_none_atoms:
-            mixing_rules_file.write(
-                "{0:12} none\n".format(at)
-            )
-        mixing_rules_file.write(
-            "# general mixing rule for Lennard-Jones\n" +
-            "Lorentz-Berthelot")
+    with open(file_name, "wb") as mixing_rules_file:
+        mixing_rules_file.write(render_mixing_rules(material))
 
-def write_pseudo_atoms(material, simulation_path):
-    """Writes .def file for chemical information.
+def render_pseudo_atoms(material):
+    """Renders .def file for chemical information.
 
     Args:
-        file_name (str): path to pseudo atoms definitions file, for example:
-            `$(raspa-dir)/forcefield/(run_id)-(uuid)/pseudo_atoms.def`
-        atom_types (list): dictionaries for each chemical species, including
-            an identification string and charge, for example:
-            interactions, for example:
-            {"chemical-id" : chemical_ids[i],
-             "charge"      : 0.,
-             "epsilon"     : epsilon,
-             "sigma"       : sigma}
+        material (PseudoMaterial): material whose atom-types are defined, along
+            with every adsorbate's pseudo atoms.
 
     Returns:
-        Writes file within RASPA's library,
-        `$(raspa-dir)/forcefield/(run_id)-(uuid)/pseudo_atoms.def`
+        pseudo_atoms (bytes): contents of `pseudo_atoms.def`.
 
         NOTE: ALL CHARGES ARE 0. IN THIS VERSION.
 
     """
-    temporary_charge = 0.
+    return (
+        "#number of pseudo atoms\n" +
+        "%s\n" % (len(material.atom_type_parameters) + NUMBER_OF_ADSORBATE_ATOMS) +
+        PSEUDO_ATOMS_HEADER +
+        "".join(
+            "{0:7}  yes  C   C   0   12.0       {0:8}  0.0  1.0  1.0    0  0  absolute  0\n".format(
+                chemical_id)
+            for chemical_id in material.chemical_ids) +
+        PSEUDO_ATOMS_ADSORBATES
+    ).encode('ascii')
+
+def write_pseudo_atoms(material, simulation_path):
+    """Writes .def file for chemical information.
+
+    Args:
+        material (PseudoMaterial): material to write, see `render_pseudo_atoms`.
+        simulation_path (str): directory to write `pseudo_atoms.def` in.
 
+    """
     file_name = os.path.join(simulation_path, 'pseudo_atoms.def')
-    with open(file_name, "w") as pseudo_atoms_file:
-        pseudo_atoms_file.write(
-            "#number of pseudo atoms\n" +
-            "%s\n" % (len(material.atom_types) + 10) +
-            "#type  print   as  chem    oxidation   mass    charge  polarization    B-factor    radii   " +
-                 "connectivity  anisotropic anisotrop-type  tinker-type\n")
-        for atom_type in material.atom_types:
-            pseudo_atoms_file.write(
-                "{0:7}  yes  C   C   0   12.0       {0:8}  0.0  1.0  1.0    0  0  absolute  0\n".format(
-                    atom_type['chemical-id'], 0.0
-                )
-            )
-        pseudo_atoms_file.write(
-            "N_n2     yes  N   N   0   14.00674   -0.4048   0.0  1.0  0.7    0  0  relative  0\n" +
-            "N_com    no   N   -   0    0.0        0.8096   0.0  1.0  0.7    0  0  relative  0\n" +
-            "C_co2    yes  C   C   0   12.0        0.70     0.0  1.0  0.720  0  0  relative  0\n" +
-            "O_co2    yes  O   O   0   15.9994    -0.35     0.0  1.0  0.68   0  0  relative  0\n" +
-            "CH4_sp3  yes  C   C   0   16.04246    0.0      0.0  1.0  1.00   0  0  relative  0\n" +
-            "He       yes  He  He  0    4.002602   0.0      0.0  1.0  1.0    0  0  relative  0\n" +
-            "H_h2     yes  H   H   0    1.00794    0.468    0.0  1.0  0.7    0  0  relative  0\n" +
-            "H_com    no   H   H   0    0.0        0.936    0.0  1.0  0.7    0  0  relative  0\n" +
-            "Xe       yes  Xe  Xe  0  131.293      0.0      0.0  1.0  2.459  0  0  relative  0\n" +
-            "Kr       yes  Kr  Kr  0   83.798      0.0      0.0  1.0  2.27   0  0  relative  0\n"
-        )
+    with open(file_name, "wb") as pseudo_atoms_file:
+        pseudo_atoms_file.write(render_pseudo_atoms(material))
 
 def write_force_field(simulation_path):
     """Writes .def file to overwrite LJ-type interactions.
 
     Args:
-        file_name (str): path to .def-file, for example:
-            `$(raspa-dir)/forcefield/(run_id)-(uuid)/force_field.def`
-
-    Writes file within RASPA's library:
-        `$(raspa-dir)/forcefield/(run_id)-(uuid)/force_field.def`
+        simulation_path (str): directory to write `force_field.def` in.
 
     NOTE: NO INTERACTIONS ARE OVERWRITTEN BY DEFAULT.
 
     """
     file_name = os.path.join(simulation_path, 'force_field.def')
-    with open(file_name, "w") as force_field_file:
-        force_field_file.write(
-            "# rules to overwrite\n" +
-            "0\n" +
-            "# number of defined interactions\n" +
-            "0\n" +
-            "# mixing rules to overwrite\n" +
-            "0")
+    with open(file_name, "wb") as force_field_file:
+        force_field_file.write(FORCE_FIELD)
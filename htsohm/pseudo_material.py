@@ -1,9 +1,22 @@
+import hashlib
 import os
 
+import numpy as np
 import yaml
 
 import htsohm
 
+# decimal places kept by the framework file writers, and so by `fingerprint`
+FINGERPRINT_DECIMALS = 4
+
+# Lennard-Jones parameters and partial charge for each atom-type.
+ATOM_TYPE_DTYPE = np.dtype([
+    ('chemical-id', 'U32'),
+    ('charge',      'f8'),
+    ('epsilon',     'f8'),
+    ('sigma',       'f8')
+])
+
 class PseudoMaterial:
     """Class for storing pseudomaterial structural data.
 
@@ -11,6 +24,22 @@ class PseudoMaterial:
         uuid (str) : Version 4 UUID used to identify pseudomaterial record in
             `materials` database.
         run_id (str) : identification string distinguishing runs.
+        lattice (numpy.ndarray) : crystal lattice parameters a, b and c,
+            shape (3,).
+        atom_type_parameters (numpy.ndarray) : one `ATOM_TYPE_DTYPE` record
+            (chemical-id, charge, epsilon, sigma) per atom-type, shape (T,).
+        fractional_coordinates (numpy.ndarray) : atom-site locations as
+            fractions of the lattice parameters, shape (N, 3).
+        type_indices (numpy.ndarray) : index into `atom_type_parameters` of
+            each atom-site's atom-type, shape (N,).
+        parent_uuid (str) : uuid of the pseudomaterial this one was mutated
+            from, or None for seeds.
+        parent_site_indices (numpy.ndarray) : for mutated pseudomaterials, the
+            parent's atom-sites that the first atom-sites were moved from; the
+            remaining atom-sites are new. Neither is saved with `dump`.
+
+    For existing callers and YAML files, `lattice_constants`, `atom_types` and
+    `atom_sites` present the arrays in their original dictionary form:
         lattice_constants (dict) : crystal lattice parameters:
                 {
                     'a' : float,
@@ -35,12 +64,18 @@ class PseudoMaterial:
                         "z-frac"       : float
                     }
                 ]
+    These views are built on every access; changes to them must be assigned
+    back (ex: `pseudo_material.atom_sites = atom_sites`) to take effect.
+
     """
+    __slots__ = ['uuid', 'run_id', 'lattice', 'atom_type_parameters',
+                 'fractional_coordinates', 'type_indices', 'parent_uuid',
+                 'parent_site_indices']
 
     def __init__(self, uuid):
-        """Instantiates PseudoMaterial object with real uuid and null values for
-        all other attributes.
-        
+        """Instantiates PseudoMaterial object with real uuid and empty values
+        for all other attributes.
+
         Args:
             uuid (str) : Version 4 UUID identifying pseudomaterial record in
                 `materials` database.
@@ -51,27 +86,12 @@ class PseudoMaterial:
         """
         self.uuid = uuid
         self.run_id = None
-        self.lattice_constants = {
-                "a" : None,
-                "b" : None, 
-                "c" : None
-                }
-        self.atom_types= [
-                {
-                    "chemical-id"  : None,
-                    "charge"       : None,
-                    "epsilon"      : None,
-                    "sigma"        : None
-                    }
-                ]
-        self.atom_sites = [
-                {
-                    "chemical-id"  : None,
-                    "x-frac"       : None,
-                    "y-frac"       : None,
-                    "z-frac"       : None
-                    }
-                ]
+        self.lattice = np.full(3, np.nan)
+        self.atom_type_parameters = np.zeros(0, dtype=ATOM_TYPE_DTYPE)
+        self.fractional_coordinates = np.zeros((0, 3))
+        self.type_indices = np.zeros(0, dtype=np.int64)
+        self.parent_uuid = None
+        self.parent_site_indices = None
 
     def __repr__(self):
         return ('{0.__class__.__name__!s}('
@@ -81,11 +101,127 @@ class PseudoMaterial:
                 '{0.atom_types!r}, '
                 '{0.atom_sites!r})').format(self)
 
+    @property
+    def lattice_constants(self):
+        return dict(zip(['a', 'b', 'c'], self.lattice.tolist()))
+
+    @lattice_constants.setter
+    def lattice_constants(self, lattice_constants):
+        self.lattice = np.array(
+                [lattice_constants[i] for i in ['a', 'b', 'c']], dtype=float)
+
+    @property
+    def chemical_ids(self):
+        return self.atom_type_parameters['chemical-id'].tolist()
+
+    @property
+    def atom_types(self):
+        return [
+                {
+                    "chemical-id"  : str(atom_type['chemical-id']),
+                    "charge"       : float(atom_type['charge']),
+                    "epsilon"      : float(atom_type['epsilon']),
+                    "sigma"        : float(atom_type['sigma'])
+                }
+                for atom_type in self.atom_type_parameters
+            ]
+
+    @atom_types.setter
+    def atom_types(self, atom_types):
+        self.atom_type_parameters = np.array(
+                [(t["chemical-id"], t["charge"], t["epsilon"], t["sigma"])
+                    for t in atom_types],
+                dtype=ATOM_TYPE_DTYPE)
+
+    @property
+    def atom_sites(self):
+        chemical_ids = self.chemical_ids
+        return [
+                {
+                    "chemical-id"  : chemical_ids[type_index],
+                    "x-frac"       : x,
+                    "y-frac"       : y,
+                    "z-frac"       : z
+                }
+                for type_index, (x, y, z) in zip(
+                    self.type_indices.tolist(),
+                    self.fractional_coordinates.tolist())
+            ]
+
+    @atom_sites.setter
+    def atom_sites(self, atom_sites):
+        """Atom-sites' chemical-ids must name one of `atom_types`."""
+        type_index = {chemical_id : i for i, chemical_id in enumerate(self.chemical_ids)}
+        self.type_indices = np.array(
+                [type_index[s["chemical-id"]] for s in atom_sites], dtype=np.int64)
+        self.fractional_coordinates = np.array(
+                [[s["x-frac"], s["y-frac"], s["z-frac"]] for s in atom_sites],
+                dtype=float).reshape(-1, 3)
+
+    def __getstate__(self):
+        """Pickle/YAML state, in the original dictionary form."""
+        return {
+                'uuid'              : self.uuid,
+                'run_id'            : self.run_id,
+                'lattice_constants' : self.lattice_constants,
+                'atom_types'        : self.atom_types,
+                'atom_sites'        : self.atom_sites
+            }
+
+    def __setstate__(self, state):
+        """Restore from state written by `__getstate__`, or by versions of
+        PseudoMaterial that kept the dictionary form as attributes."""
+        self.uuid = state['uuid']
+        self.run_id = state['run_id']
+        self.parent_uuid = None
+        self.parent_site_indices = None
+        self.lattice_constants = state['lattice_constants']
+        self.atom_types = state['atom_types']
+        self.atom_sites = state['atom_sites']
+
+    def copy(self, uuid=None):
+        """Copy arrays into a new PseudoMaterial, optionally with a new uuid."""
+        copy = PseudoMaterial(self.uuid if uuid is None else uuid)
+        copy.run_id = self.run_id
+        copy.lattice = self.lattice.copy()
+        copy.atom_type_parameters = self.atom_type_parameters.copy()
+        copy.fractional_coordinates = self.fractional_coordinates.copy()
+        copy.type_indices = self.type_indices.copy()
+        if uuid is None:
+            copy.parent_uuid = self.parent_uuid
+            copy.parent_site_indices = self.parent_site_indices
+        return copy
+
+    def __deepcopy__(self, memo):
+        return self.copy()
+
+    def fingerprint(self):
+        """Hash of the structure as written to framework files.
+
+        Returns:
+            fingerprint (str): SHA-1 hex digest of the lattice constants and
+                each atom-site's position, charge, epsilon and sigma, rounded
+                to `FINGERPRINT_DECIMALS` places. Atom-sites are sorted first,
+                so their order and atom-type names do not matter.
+
+        """
+        scale = 10 ** FINGERPRINT_DECIMALS
+        lattice = np.rint(self.lattice * scale).astype(np.int64)
+        atom_types = self.atom_type_parameters[self.type_indices]
+        sites = np.column_stack([
+            np.rint(self.fractional_coordinates % 1. * scale).astype(np.int64) % scale,
+            np.rint(atom_types['charge'] * scale).astype(np.int64),
+            np.rint(atom_types['epsilon'] * scale).astype(np.int64),
+            np.rint(atom_types['sigma'] * scale).astype(np.int64)
+        ]).reshape(-1, 6)
+        sites = sites[np.lexsort(sites.T[::-1])]
+        return hashlib.sha1(lattice.tobytes() + sites.tobytes()).hexdigest()
+
     def dump(self):
         htsohm_dir = os.path.dirname(os.path.dirname(htsohm.__file__))
         pseudo_materials_dir = os.path.join(
-                htsohm_dir, 
-                self.run_id, 
+                htsohm_dir,
+                self.run_id,
                 'pseudo_materials')
         if not os.path.exists(pseudo_materials_dir):
             os.makedirs(pseudo_materials_dir, exist_ok=True)
@@ -95,12 +231,12 @@ class PseudoMaterial:
         with open(pseudo_material_file, "w") as dump_file:
             yaml.dump(self, dump_file)
 
+    @property
+    def number_of_atoms(self):
+        return len(self.type_indices)
+
     def volume(self):
-        return (
-                self.lattice_constants["a"] *
-                self.lattice_constants["b"] *
-                self.lattice_constants["c"]
-            )
+        return float(np.prod(self.lattice))
 
     def number_density(self):
-        return len(self.atom_sites) / self.volume()
+        return self.number_of_atoms / self.volume()
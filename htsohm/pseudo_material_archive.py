@@ -0,0 +1,617 @@
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+import glob
+import mmap
+import os
+from uuid import uuid4
+
+import numpy as np
+import yaml
+
+import htsohm
+from htsohm import config
+from htsohm.db import session, PseudoMaterialRecord
+from htsohm.pseudo_material import ATOM_TYPE_DTYPE, PseudoMaterial
+
+# Each pseudo material is one record in a segment file: a header, then its
+# atom-types, fractional coordinates and type indices. Every worker appends to
+# its own segment and, once a record is completely written, appends the
+# record's uuid and offset to the segment's index file.
+#
+# A mutated child may instead be stored as a delta record against its parent:
+# LJ and lattice deltas, the parent atom-sites it kept, float32 displacements
+# of the kept sites and the new sites in full.
+MAGIC = b'HPM1'
+DELTA_MAGIC = b'HPD1'
+RECORD_HEADER_DTYPE = np.dtype([
+    ('magic',                   'S4'),
+    ('uuid',                    'S36'),
+    ('number_of_atom_types',    '<u4'),
+    ('number_of_atoms',         '<u4'),
+    ('lattice',                 '<f8', (3,))
+])
+ARCHIVE_ATOM_TYPE_DTYPE = np.dtype([
+    ('chemical-id', 'S32'),
+    ('charge',      '<f8'),
+    ('epsilon',     '<f8'),
+    ('sigma',       '<f8')
+])
+COORDINATE_DTYPE = np.dtype('<f8')
+TYPE_INDEX_DTYPE = np.dtype('<i4')
+DELTA_HEADER_DTYPE = np.dtype([
+    ('magic',                   'S4'),
+    ('uuid',                    'S36'),
+    ('parent_uuid',             'S36'),
+    ('depth',                   '<u4'),
+    ('number_of_atom_types',    '<u4'),
+    ('number_of_atoms',         '<u4'),
+    ('number_of_kept_atoms',    '<u4'),
+    ('lattice_delta',           '<f8', (3,))
+])
+LJ_DELTA_DTYPE = np.dtype([
+    ('epsilon', '<f8'),
+    ('sigma',   '<f8')
+])
+SITE_INDEX_DTYPE = np.dtype('<u4')
+DISPLACEMENT_DTYPE = np.dtype('<f4')
+INDEX_DTYPE = np.dtype([
+    ('uuid',    'S36'),
+    ('offset',  '<i8')
+])
+
+def pseudo_materials_directory(run_id):
+    """Directory holding a run's pseudo materials."""
+    htsohm_dir = os.path.dirname(os.path.dirname(htsohm.__file__))
+    return os.path.join(htsohm_dir, run_id, 'pseudo_materials')
+
+def encode_record(pseudo_material):
+    """Serialize a pseudo material as one archive record.
+
+    Args:
+        pseudo_material (PseudoMaterial): material to serialize.
+
+    Returns:
+        record (bytes): header, atom-types, coordinates and type indices.
+
+    """
+    header = np.zeros(1, dtype=RECORD_HEADER_DTYPE)
+    header['magic'] = MAGIC
+    header['uuid'] = pseudo_material.uuid.encode('ascii')
+    header['number_of_atom_types'] = len(pseudo_material.atom_type_parameters)
+    header['number_of_atoms'] = pseudo_material.number_of_atoms
+    header['lattice'] = pseudo_material.lattice
+    atom_types = pseudo_material.atom_type_parameters.astype(ARCHIVE_ATOM_TYPE_DTYPE)
+    return b''.join([
+        header.tobytes(),
+        atom_types.tobytes(),
+        pseudo_material.fractional_coordinates.astype(COORDINATE_DTYPE).tobytes(),
+        pseudo_material.type_indices.astype(TYPE_INDEX_DTYPE).tobytes()
+    ])
+
+def record_depth(buffer, offset):
+    """Number of delta records between a record and its nearest full record."""
+    if bytes(buffer[offset:offset + 4]) == DELTA_MAGIC:
+        return int(np.frombuffer(buffer, DELTA_HEADER_DTYPE, 1, offset)[0]['depth'])
+    return 0
+
+def record_end(buffer, offset):
+    """Position just past the record at `offset`, or None if `buffer` ends
+    within the record's header."""
+    if len(buffer) < offset + 4:
+        return None
+    if bytes(buffer[offset:offset + 4]) == DELTA_MAGIC:
+        if len(buffer) < offset + DELTA_HEADER_DTYPE.itemsize:
+            return None
+        header = np.frombuffer(buffer, DELTA_HEADER_DTYPE, 1, offset)[0]
+        number_of_kept_atoms = int(header['number_of_kept_atoms'])
+        number_of_new_atoms = int(header['number_of_atoms']) - number_of_kept_atoms
+        return (offset + DELTA_HEADER_DTYPE.itemsize +
+                LJ_DELTA_DTYPE.itemsize * int(header['number_of_atom_types']) +
+                SITE_INDEX_DTYPE.itemsize * number_of_kept_atoms +
+                DISPLACEMENT_DTYPE.itemsize * 3 * number_of_kept_atoms +
+                COORDINATE_DTYPE.itemsize * 3 * number_of_new_atoms +
+                TYPE_INDEX_DTYPE.itemsize * number_of_new_atoms)
+    if len(buffer) < offset + RECORD_HEADER_DTYPE.itemsize:
+        return None
+    header = np.frombuffer(buffer, RECORD_HEADER_DTYPE, 1, offset)[0]
+    number_of_atoms = int(header['number_of_atoms'])
+    return (offset + RECORD_HEADER_DTYPE.itemsize +
+            ARCHIVE_ATOM_TYPE_DTYPE.itemsize * int(header['number_of_atom_types']) +
+            COORDINATE_DTYPE.itemsize * 3 * number_of_atoms +
+            TYPE_INDEX_DTYPE.itemsize * number_of_atoms)
+
+def decode_record(buffer, offset, run_id=None, load_parent=None):
+    """Read one archive record.
+
+    Args:
+        buffer (buffer): segment contents (ex: an `mmap.mmap`).
+        offset (int): position of the record in `buffer`.
+        run_id (str): identification string for run.
+        load_parent (callable): returns the PseudoMaterial with a given uuid;
+            required to read delta records.
+
+    Returns:
+        pseudo_material (PseudoMaterial): material stored in the record; its
+            arrays are copies, independent of `buffer`.
+
+    """
+    if bytes(buffer[offset:offset + 4]) == DELTA_MAGIC:
+        return decode_delta_record(buffer, offset, run_id, load_parent)
+    header = np.frombuffer(buffer, RECORD_HEADER_DTYPE, 1, offset)[0]
+    if header['magic'] != MAGIC:
+        raise ValueError('No pseudo material record at offset %s.' % offset)
+    offset += RECORD_HEADER_DTYPE.itemsize
+    number_of_atom_types = int(header['number_of_atom_types'])
+    number_of_atoms = int(header['number_of_atoms'])
+
+    pseudo_material = PseudoMaterial(header['uuid'].decode('ascii'))
+    pseudo_material.run_id = run_id
+    pseudo_material.lattice = header['lattice'].astype(float)
+    pseudo_material.atom_type_parameters = np.frombuffer(buffer,
+            ARCHIVE_ATOM_TYPE_DTYPE, number_of_atom_types, offset).astype(ATOM_TYPE_DTYPE)
+    offset += ARCHIVE_ATOM_TYPE_DTYPE.itemsize * number_of_atom_types
+    pseudo_material.fractional_coordinates = np.frombuffer(buffer,
+            COORDINATE_DTYPE, 3 * number_of_atoms, offset).reshape(-1, 3).astype(float)
+    offset += COORDINATE_DTYPE.itemsize * 3 * number_of_atoms
+    pseudo_material.type_indices = np.frombuffer(buffer,
+            TYPE_INDEX_DTYPE, number_of_atoms, offset).astype(np.int64)
+    return pseudo_material
+
+def can_encode_delta(child, parent):
+    """True if `child` records how it was mutated from `parent`, and shares
+    its atom-types' chemical-ids and charges and its kept sites' types."""
+    kept_sites = child.parent_site_indices
+    return (
+        child.parent_uuid == parent.uuid and kept_sites is not None and
+        len(kept_sites) <= child.number_of_atoms and
+        (len(kept_sites) == 0 or kept_sites.max() < parent.number_of_atoms) and
+        np.array_equal(child.atom_type_parameters[['chemical-id', 'charge']],
+            parent.atom_type_parameters[['chemical-id', 'charge']]) and
+        np.array_equal(child.type_indices[:len(kept_sites)],
+            parent.type_indices[kept_sites])
+    )
+
+def encode_delta_record(child, parent, depth):
+    """Serialize a mutated pseudo material as a delta against its parent.
+
+    Args:
+        child (PseudoMaterial): material to serialize; see `can_encode_delta`.
+        parent (PseudoMaterial): material `child` was mutated from.
+        depth (int): number of delta records from `parent` back to a full
+            record, plus one.
+
+    Returns:
+        record (bytes): delta record.
+
+    `child` is snapped to the stored values (ex: its kept sites are moved to
+    the parent's sites plus the float32 displacements), so that the material
+    simulated is exactly the material reconstructed later.
+
+    """
+    kept_sites = child.parent_site_indices
+    number_of_kept_atoms = len(kept_sites)
+
+    header = np.zeros(1, dtype=DELTA_HEADER_DTYPE)
+    header['magic'] = DELTA_MAGIC
+    header['uuid'] = child.uuid.encode('ascii')
+    header['parent_uuid'] = parent.uuid.encode('ascii')
+    header['depth'] = depth
+    header['number_of_atom_types'] = len(child.atom_type_parameters)
+    header['number_of_atoms'] = child.number_of_atoms
+    header['number_of_kept_atoms'] = number_of_kept_atoms
+    header['lattice_delta'] = child.lattice - parent.lattice
+
+    lj_deltas = np.zeros(len(child.atom_type_parameters), dtype=LJ_DELTA_DTYPE)
+    for x in ['epsilon', 'sigma']:
+        lj_deltas[x] = child.atom_type_parameters[x] - parent.atom_type_parameters[x]
+
+    kept_coordinates = parent.fractional_coordinates[kept_sites]
+    displacements = child.fractional_coordinates[:number_of_kept_atoms] - kept_coordinates
+    displacements = (displacements - np.round(displacements)).astype(DISPLACEMENT_DTYPE)
+    new_coordinates = child.fractional_coordinates[number_of_kept_atoms:]
+    new_type_indices = child.type_indices[number_of_kept_atoms:]
+
+    _apply_delta(child, parent, header[0], lj_deltas, kept_sites, displacements,
+            new_coordinates, new_type_indices)
+    return b''.join([
+        header.tobytes(),
+        lj_deltas.tobytes(),
+        kept_sites.astype(SITE_INDEX_DTYPE).tobytes(),
+        displacements.tobytes(),
+        new_coordinates.astype(COORDINATE_DTYPE).tobytes(),
+        new_type_indices.astype(TYPE_INDEX_DTYPE).tobytes()
+    ])
+
+def _apply_delta(child, parent, header, lj_deltas, kept_sites, displacements,
+        new_coordinates, new_type_indices):
+    """Set `child`'s arrays to `parent` with a delta applied."""
+    child.lattice = parent.lattice + header['lattice_delta']
+    child.atom_type_parameters = parent.atom_type_parameters.copy()
+    for x in ['epsilon', 'sigma']:
+        child.atom_type_parameters[x] += lj_deltas[x]
+    child.fractional_coordinates = np.concatenate([
+        (parent.fractional_coordinates[kept_sites] + displacements) % 1.,
+        new_coordinates]).reshape(-1, 3)
+    child.type_indices = np.concatenate([
+        parent.type_indices[kept_sites], new_type_indices]).astype(np.int64)
+    child.parent_uuid = parent.uuid
+    child.parent_site_indices = kept_sites
+
+def decode_delta_record(buffer, offset, run_id, load_parent):
+    """Read one delta record; see `decode_record`."""
+    header = np.frombuffer(buffer, DELTA_HEADER_DTYPE, 1, offset)[0]
+    offset += DELTA_HEADER_DTYPE.itemsize
+    number_of_atom_types = int(header['number_of_atom_types'])
+    number_of_kept_atoms = int(header['number_of_kept_atoms'])
+    number_of_new_atoms = int(header['number_of_atoms']) - number_of_kept_atoms
+
+    lj_deltas = np.frombuffer(buffer, LJ_DELTA_DTYPE, number_of_atom_types, offset)
+    offset += LJ_DELTA_DTYPE.itemsize * number_of_atom_types
+    kept_sites = np.frombuffer(buffer, SITE_INDEX_DTYPE, number_of_kept_atoms,
+            offset).astype(np.int64)
+    offset += SITE_INDEX_DTYPE.itemsize * number_of_kept_atoms
+    displacements = np.frombuffer(buffer, DISPLACEMENT_DTYPE,
+            3 * number_of_kept_atoms, offset).reshape(-1, 3)
+    offset += DISPLACEMENT_DTYPE.itemsize * 3 * number_of_kept_atoms
+    new_coordinates = np.frombuffer(buffer, COORDINATE_DTYPE,
+            3 * number_of_new_atoms, offset).reshape(-1, 3)
+    offset += COORDINATE_DTYPE.itemsize * 3 * number_of_new_atoms
+    new_type_indices = np.frombuffer(buffer, TYPE_INDEX_DTYPE, number_of_new_atoms, offset)
+
+    pseudo_material = PseudoMaterial(header['uuid'].decode('ascii'))
+    pseudo_material.run_id = run_id
+    _apply_delta(pseudo_material, load_parent(header['parent_uuid'].decode('ascii')),
+            header, lj_deltas, kept_sites, displacements, new_coordinates,
+            new_type_indices)
+    return pseudo_material
+
+class PseudoMaterialStore(ABC):
+    """Base class for stores of a run's pseudo materials, as archive records.
+
+    Attributes:
+        run_id (str): identification string for run.
+        deltas (bool): store mutated children as delta records against their
+            parent (see `encode_delta_record`), and in full every
+            `snapshot_interval` generations of a lineage, bounding the chain
+            of records read to reconstruct one.
+        cache_size (int): number of materials kept in a least-recently-used
+            cache of reconstructed and appended materials.
+
+    Subclasses implement `_record`, `_contains`, `_write` and `uuids`.
+
+    """
+    def __init__(self, run_id, deltas=False, snapshot_interval=10, cache_size=256):
+        self.run_id = run_id
+        self.deltas = deltas
+        self.snapshot_interval = snapshot_interval
+        self.cache_size = cache_size
+        self._cache = OrderedDict()  # uuid -> (PseudoMaterial, record depth)
+
+    @abstractmethod
+    def _record(self, uuid):
+        """Find a stored record: (buffer, offset), or None if not stored."""
+
+    @abstractmethod
+    def _contains(self, uuid):
+        """True if a record is stored for `uuid`, without reading it."""
+
+    @abstractmethod
+    def _write(self, pseudo_materials, records):
+        """Store records for pseudo materials."""
+
+    @abstractmethod
+    def uuids(self):
+        """Uuids of every stored pseudo material."""
+
+    def __contains__(self, uuid):
+        return uuid in self._cache or self._contains(uuid)
+
+    def missing(self, uuids):
+        """The uuids in `uuids` that are not stored."""
+        return [uuid for uuid in uuids if uuid not in self]
+
+    def append(self, pseudo_materials):
+        """Store pseudo materials.
+
+        Args:
+            pseudo_materials (list): materials to store.
+
+        """
+        records = [self._encode(p) for p in pseudo_materials]
+        self._write(pseudo_materials, records)
+        for pseudo_material, record in zip(pseudo_materials, records):
+            self._cache_put(pseudo_material.copy(), record_depth(record, 0))
+
+    def _encode(self, pseudo_material):
+        """Encode as a delta record if enabled and possible, otherwise in full."""
+        parent_uuid = pseudo_material.parent_uuid
+        if self.deltas and parent_uuid and parent_uuid in self:
+            parent, parent_depth = self._load_entry(parent_uuid)
+            depth = parent_depth + 1
+            if depth < self.snapshot_interval and can_encode_delta(pseudo_material, parent):
+                return encode_delta_record(pseudo_material, parent, depth)
+        return encode_record(pseudo_material)
+
+    def _cache_put(self, pseudo_material, depth):
+        self._cache[pseudo_material.uuid] = (pseudo_material, depth)
+        self._cache.move_to_end(pseudo_material.uuid)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def _load_entry(self, uuid):
+        """Load a pseudo material and its record depth through the cache; do
+        not modify the material."""
+        if uuid in self._cache:
+            self._cache.move_to_end(uuid)
+            return self._cache[uuid]
+        record = self._record(uuid)
+        if record is None:
+            raise KeyError('Pseudo material %s is not stored.' % uuid)
+        pseudo_material = decode_record(*record, run_id=self.run_id, load_parent=self._load)
+        self._cache_put(pseudo_material, record_depth(*record))
+        return self._cache[uuid]
+
+    def _load(self, uuid):
+        """Load a pseudo material through the cache; do not modify the result."""
+        return self._load_entry(uuid)[0]
+
+    def load(self, uuid):
+        """Load one pseudo material.
+
+        Args:
+            uuid (str): uuid for material.
+
+        Returns:
+            pseudo_material (PseudoMaterial): the material's structure.
+
+        Raises:
+            KeyError: if no material with this uuid has been stored.
+
+        """
+        return self._load(uuid).copy()
+
+    def export(self, file_name):
+        """Write every archived pseudo material to one `.npz` file for analysis.
+
+        Args:
+            file_name (str): path to `.npz` file.
+
+        The file holds `uuid`, `lattice` (M, 3), `atom_types` (M, T) and, for
+        all materials end to end, `fractional_coordinates` (N, 3) and
+        `type_indices` (N,); material i's atom-sites are rows
+        `atom_offsets[i]` to `atom_offsets[i + 1]`. Every material must have
+        the same number of atom-types, T.
+
+        """
+        uuids = sorted(self.uuids())
+        pseudo_materials = [self.load(uuid) for uuid in uuids]
+        numbers_of_atoms = [p.number_of_atoms for p in pseudo_materials]
+        np.savez(file_name,
+            uuid=np.array(uuids),
+            lattice=np.array([p.lattice for p in pseudo_materials]).reshape(-1, 3),
+            atom_types=np.array([p.atom_type_parameters for p in pseudo_materials]),
+            atom_offsets=np.concatenate([[0], np.cumsum(numbers_of_atoms)]),
+            fractional_coordinates=np.concatenate(
+                [np.zeros((0, 3))] + [p.fractional_coordinates for p in pseudo_materials]),
+            type_indices=np.concatenate(
+                [np.zeros(0, dtype=np.int64)] + [p.type_indices for p in pseudo_materials])
+        )
+        return len(uuids)
+
+class PseudoMaterialArchive(PseudoMaterialStore):
+    """Append-only, indexed store of a run's pseudo materials.
+
+    Attributes:
+        directory (str): directory holding the archive's segment files
+            (`<name>.seg`), each with an index file (`<name>.idx`).
+
+    Records are only ever appended, by one writer per segment, so any number
+    of workers can share an archive without locks. Reads memory-map the
+    segments; the index files are reread when a uuid is not yet known. See
+    `PseudoMaterialStore` for other attributes.
+
+    """
+    def __init__(self, run_id, directory=None, **kwargs):
+        super().__init__(run_id, **kwargs)
+        self.directory = directory or pseudo_materials_directory(run_id)
+        self._segment_name = None
+        self._offsets = {}          # uuid -> (segment name, offset)
+        self._index_positions = {}  # index file -> bytes read
+        self._maps = {}             # segment name -> mmap.mmap
+
+    def _write(self, pseudo_materials, records):
+        """Append records to this process's segment."""
+        if self._segment_name is None:
+            os.makedirs(self.directory, exist_ok=True)
+            self._segment_name = 'segment_%s' % uuid4().hex
+        segment_path = os.path.join(self.directory, self._segment_name + '.seg')
+        index_path = os.path.join(self.directory, self._segment_name + '.idx')
+
+        index = np.zeros(len(records), dtype=INDEX_DTYPE)
+        index['uuid'] = [p.uuid.encode('ascii') for p in pseudo_materials]
+        with open(segment_path, 'ab') as segment_file:
+            offset = segment_file.tell()
+            index['offset'] = offset + np.cumsum([0] + [len(r) for r in records[:-1]])
+            segment_file.write(b''.join(records))
+        with open(index_path, 'ab') as index_file:
+            index_file.write(index.tobytes())
+        for uuid, offset in zip(index['uuid'], index['offset']):
+            self._offsets[uuid.decode('ascii')] = (self._segment_name, int(offset))
+
+    def _record(self, uuid):
+        if uuid not in self._offsets:
+            self._refresh()
+        if uuid not in self._offsets:
+            return None
+        segment_name, offset = self._offsets[uuid]
+        return self._map(segment_name, offset), offset
+
+    def _refresh(self):
+        """Read index entries appended since the last refresh."""
+        for index_path in glob.glob(os.path.join(self.directory, '*.idx')):
+            position = self._index_positions.get(index_path, 0)
+            with open(index_path, 'rb') as index_file:
+                index_file.seek(position)
+                data = index_file.read()
+            # ignore a partially-written trailing entry; it is read next time
+            complete = len(data) - len(data) % INDEX_DTYPE.itemsize
+            segment_name = os.path.basename(index_path)[:-len('.idx')]
+            for uuid, offset in np.frombuffer(data[:complete], INDEX_DTYPE):
+                self._offsets[uuid.decode('ascii')] = (segment_name, int(offset))
+            self._index_positions[index_path] = position + complete
+
+    def _map(self, segment_name, offset):
+        """Memory-map a segment, remapping if the record at `offset` ends past
+        the current map (the segment has grown since it was mapped)."""
+        segment_map = self._maps.get(segment_name)
+        if segment_map is not None:
+            end = record_end(segment_map, offset)
+            if end is not None and end <= len(segment_map):
+                return segment_map
+            segment_map.close()
+        segment_path = os.path.join(self.directory, segment_name + '.seg')
+        with open(segment_path, 'rb') as segment_file:
+            segment_map = mmap.mmap(segment_file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._maps[segment_name] = segment_map
+        return segment_map
+
+    def _contains(self, uuid):
+        if uuid not in self._offsets:
+            self._refresh()
+        return uuid in self._offsets
+
+    def missing(self, uuids):
+        # read other workers' index entries once, not once per uuid
+        self._refresh()
+        return [uuid for uuid in uuids if uuid not in self._offsets]
+
+    def uuids(self):
+        self._refresh()
+        return list(self._offsets)
+
+class DatabasePseudoMaterialStore(PseudoMaterialStore):
+    """Store of a run's pseudo materials in the `pseudo_materials` table, so
+    that workers need no shared filesystem. See `PseudoMaterialStore`."""
+
+    def _write(self, pseudo_materials, records):
+        session.bulk_insert_mappings(PseudoMaterialRecord, [
+            {'uuid' : p.uuid, 'run_id' : self.run_id, 'data' : record}
+            for p, record in zip(pseudo_materials, records)])
+        session.commit()
+
+    def _record(self, uuid):
+        row = session.query(PseudoMaterialRecord.data) \
+                .filter(PseudoMaterialRecord.uuid == uuid).first()
+        if row is None:
+            return None
+        return row[0], 0
+
+    def _contains(self, uuid):
+        return session.query(PseudoMaterialRecord.uuid) \
+                .filter(PseudoMaterialRecord.uuid == uuid).first() is not None
+
+    def missing(self, uuids):
+        stored = {row[0] for row in session.query(PseudoMaterialRecord.uuid)
+                .filter(PseudoMaterialRecord.uuid.in_(uuids))}
+        return [uuid for uuid in uuids if uuid not in stored]
+
+    def uuids(self):
+        return [row[0] for row in session.query(PseudoMaterialRecord.uuid)
+                .filter(PseudoMaterialRecord.run_id == self.run_id)]
+
+class _PseudoMaterialLoader(yaml.SafeLoader):
+    """Safe YAML loader that also constructs dumped PseudoMaterials."""
+
+def _construct_pseudo_material(loader, node):
+    pseudo_material = PseudoMaterial.__new__(PseudoMaterial)
+    pseudo_material.__setstate__(loader.construct_mapping(node, deep=True))
+    return pseudo_material
+
+_PseudoMaterialLoader.add_constructor(
+        'tag:yaml.org,2002:python/object:htsohm.pseudo_material.PseudoMaterial',
+        _construct_pseudo_material)
+
+def load_yaml_pseudo_material(file_name):
+    """Load a pseudo material dumped as YAML by `PseudoMaterial.dump`, without
+    constructing arbitrary Python objects."""
+    with open(file_name) as pseudo_material_file:
+        return yaml.load(pseudo_material_file, Loader=_PseudoMaterialLoader)
+
+def convert_yaml_directory(run_id, chunk_size=500):
+    """Copy a run's YAML pseudo materials into its archive, or its database
+    store when `pseudo_material_format` is 'database'.
+
+    Args:
+        run_id (str): identification string for run.
+        chunk_size (int): number of materials appended at a time.
+
+    Returns:
+        count (int): number of materials converted. Materials already stored
+            are skipped; the YAML files are left in place.
+
+    Raises:
+        ValueError: if the run's `pseudo_material_format` is 'yaml'.
+
+    """
+    if config.get('pseudo_material_format', 'archive') == 'yaml':
+        raise ValueError('Run %s stores pseudo materials as YAML; set '
+                'pseudo_material_format to archive or database to convert them.' % run_id)
+    store = _store(run_id)
+    file_names = sorted(glob.glob(os.path.join(pseudo_materials_directory(run_id), '*.yaml')))
+    count = 0
+    for i in range(0, len(file_names), chunk_size):
+        file_names_by_uuid = OrderedDict((os.path.basename(f)[:-len('.yaml')], f)
+                for f in file_names[i:i + chunk_size])
+        chunk = [file_names_by_uuid[uuid] for uuid in store.missing(list(file_names_by_uuid))]
+        if chunk:
+            store.append([load_yaml_pseudo_material(f) for f in chunk])
+        count += len(chunk)
+    return count
+
+_stores = {}
+
+def _store(run_id):
+    if run_id not in _stores:
+        if config.get('pseudo_material_format', 'archive') == 'database':
+            store_class = DatabasePseudoMaterialStore
+        else:
+            store_class = PseudoMaterialArchive
+        _stores[run_id] = store_class(run_id,
+                deltas=config.get('pseudo_material_deltas', False),
+                snapshot_interval=config.get('pseudo_material_snapshot_interval', 10),
+                cache_size=config.get('pseudo_material_cache_size', 256))
+    return _stores[run_id]
+
+def dump_pseudo_materials(pseudo_materials):
+    """Store pseudo materials in the format set by `pseudo_material_format` in
+    config: 'archive' (default), 'database' or 'yaml', one file per material."""
+    if config.get('pseudo_material_format', 'archive') == 'yaml':
+        for pseudo_material in pseudo_materials:
+            pseudo_material.dump()
+    elif pseudo_materials:
+        _store(pseudo_materials[0].run_id).append(pseudo_materials)
+
+def load_pseudo_material(run_id, uuid):
+    """Load a material's structure, as stored by `dump_pseudo_materials`.
+
+    Args:
+        run_id (str): identification string for run.
+        uuid (str): uuid for material.
+
+    Returns:
+        pseudo_material (PseudoMaterial): the material's structure, from the
+            run's archive (or database) or, failing that, its YAML file.
+
+    """
+    try:
+        return _store(run_id).load(uuid)
+    except KeyError:
+        pass
+    return load_yaml_pseudo_material(
+            os.path.join(pseudo_materials_directory(run_id), '{0}.yaml'.format(uuid)))
+
+def export_pseudo_materials(run_id, file_name):
+    """Export a run's stored pseudo materials, from the store set by
+    `pseudo_material_format` in config, to one `.npz` file; see
+    `PseudoMaterialStore.export`."""
+    return _store(run_id).export(file_name)
@@ -1,4 +1,3 @@
 import htsohm.simulation.helium_void_fraction
-import htsohm.simulation.gas_adsorption_0
-import htsohm.simulation.gas_adsorption_1
+import htsohm.simulation.gas_adsorption
 import htsohm.simulation.surface_area
@@ -0,0 +1,60 @@
+import os
+
+import numpy as np
+
+from htsohm.material_files import write_cif_file, write_mixing_rules
+from htsohm.material_files import write_pseudo_atoms, write_force_field
+from htsohm.pseudo_material import PseudoMaterial
+
+def system_prefix(system):
+    """Prefix given to a material's chemical-ids in a batch, so that atom-types
+    of different materials can share one force field."""
+    return 'S%s_' % system
+
+def prefix_pseudo_material(pseudo_material, prefix):
+    """Copy pseudo material, prefixing every chemical-id.
+
+    Args:
+        pseudo_material (PseudoMaterial): material to copy.
+        prefix (str): prefix for chemical-ids.
+
+    Returns:
+        copy (PseudoMaterial): renamed copy; `pseudo_material` is unchanged.
+
+    """
+    renamed = pseudo_material.copy()
+    renamed.atom_type_parameters['chemical-id'] = [prefix + chemical_id
+            for chemical_id in pseudo_material.chemical_ids]
+    return renamed
+
+def write_framework_files(pseudo_materials, output_dir):
+    """Writes .cif files and one shared force field for a batch of materials.
+
+    Args:
+        pseudo_materials (list): materials simulated together, one RASPA
+            system each.
+        output_dir (str): simulation directory.
+
+    A single material is written unchanged. In a batch, each material's
+    chemical-ids are prefixed with its system index (see `system_prefix`) and
+    the force field files define the atom-types of every material.
+
+    """
+    if len(pseudo_materials) == 1:
+        renamed = pseudo_materials
+    else:
+        renamed = [prefix_pseudo_material(pseudo_material, system_prefix(i))
+                for i, pseudo_material in enumerate(pseudo_materials)]
+    for pseudo_material in renamed:
+        write_cif_file(pseudo_material, output_dir)
+
+    force_field = PseudoMaterial(None)
+    force_field.atom_type_parameters = np.concatenate(
+            [pseudo_material.atom_type_parameters for pseudo_material in renamed])
+    write_mixing_rules(force_field, output_dir)
+    write_pseudo_atoms(force_field, output_dir)
+    write_force_field(output_dir)
+
+def system_output_file(output_dir, system, file_name):
+    """Path to a system's output file in a (batched) simulation."""
+    return os.path.join(output_dir, 'Output', 'System_%s' % system, file_name)
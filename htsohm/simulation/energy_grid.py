@@ -0,0 +1,166 @@
+import sys
+import os
+import shutil
+from uuid import uuid4
+
+from htsohm import config
+from htsohm.material_files import write_cif_file, write_mixing_rules
+from htsohm.material_files import write_pseudo_atoms, write_force_field
+from htsohm.simulation.execution import DEFAULT_TIMEOUT_SECONDS, PermanentSimulationError
+from htsohm.simulation.execution import run_with_retries, simulate
+from htsohm.simulation.staging import staging_directory
+
+# pseudo atoms in each adsorbate (TraPPE definitions) that interact with the
+# framework through Lennard-Jones terms, and so need a grid.
+ADSORBATE_GRID_TYPES = {
+    'methane'   : ['CH4_sp3'],
+    'helium'    : ['He'],
+    'krypton'   : ['Kr'],
+    'xenon'     : ['Xe'],
+    'hydrogen'  : ['H_com'],
+    'N2'        : ['N_n2'],
+    'CO2'       : ['C_co2', 'O_co2']
+}
+
+DEFAULT_SPACING = 0.1
+
+def grid_settings(adsorbate, spacing):
+    """Render RASPA input-file lines describing an adsorbate's energy grids.
+
+    Args:
+        adsorbate (str): molecule name (ex: 'methane').
+        spacing (float): grid spacing, Angstroms.
+
+    Returns:
+        lines (str): grid-types and spacing lines, shared by the grid-making
+            and the adsorption input-files.
+
+    """
+    if adsorbate not in ADSORBATE_GRID_TYPES:
+        raise ValueError('No energy grid types known for adsorbate %r.' % adsorbate)
+    grid_types = ADSORBATE_GRID_TYPES[adsorbate]
+    return (
+        "NumberOfGrids                  %s\n" % len(grid_types) +
+        "GridTypes                      %s\n" % ' '.join(grid_types) +
+        "SpacingVDWGrid                 %s\n" % spacing
+    )
+
+def write_raspa_file(filename, uuid, adsorbate, spacing):
+    """Writes RASPA input file for precomputing framework energy grids.
+
+    Args:
+        filename (str): path to input file.
+        uuid (str): uuid for material.
+        adsorbate (str): molecule name (ex: 'methane').
+        spacing (float): grid spacing, Angstroms.
+
+    Writes RASPA input-file.
+
+    """
+    with open(filename, "w") as raspa_input_file:
+        raspa_input_file.write(
+            "SimulationType                 MakeGrid\n" +
+            "\n" +
+            "Forcefield                     GenericMOFs\n" +
+            "CutOff                         12.8\n" +
+            "\n" +
+            "Framework                      0\n" +
+            "FrameworkName                  %s\n" % (uuid) +
+            "UnitCells                      1 1 1\n" +
+            "\n" +
+            grid_settings(adsorbate, spacing)
+        )
+
+def _link_raspa_share(raspa_dir):
+    """Make `raspa_dir` usable as $RASPA_DIR by linking the installed RASPA
+    molecule, force field and structure libraries into it. Grids are written
+    under `raspa_dir` itself.
+
+    Raises:
+        ValueError: if neither $RASPA_DIR nor `raspa2_dir` locates RASPA, or
+            the installation has no share/raspa directory.
+
+    """
+    installed_dir = os.environ.get('RASPA_DIR', config.get('raspa2_dir'))
+    if installed_dir is None:
+        raise ValueError('RASPA installation not found: set $RASPA_DIR or '
+                'raspa2_dir in the run config to make energy grids.')
+    installed_share = os.path.join(installed_dir, 'share', 'raspa')
+    if not os.path.isdir(installed_share):
+        raise ValueError('RASPA share directory not found: %s (check $RASPA_DIR '
+                'or raspa2_dir in the run config).' % installed_share)
+    share = os.path.join(raspa_dir, 'share', 'raspa')
+    os.makedirs(os.path.join(share, 'grids'), exist_ok=True)
+    for entry in os.listdir(installed_share):
+        if entry != 'grids':
+            os.symlink(os.path.join(installed_share, entry), os.path.join(share, entry))
+
+def grid_raspa_dir(run_id, uuid, adsorbate, spacing):
+    """Find $RASPA_DIR holding a material's cached energy grid.
+
+    Args:
+        run_id (str): identification string for run.
+        uuid (str): uuid for material.
+        adsorbate (str): molecule name (ex: 'methane').
+        spacing (float): grid spacing, Angstroms.
+
+    Returns:
+        path (str): directory in the material's staging area.
+
+    """
+    return os.path.join(staging_directory(run_id, uuid),
+            'grid_%s_%s' % (adsorbate, spacing))
+
+def make_grid(run_id, pseudo_material, adsorbate, spacing=DEFAULT_SPACING):
+    """Precompute a material's framework energy grid, once.
+
+    Args:
+        run_id (str): identification string for run.
+        pseudo_material (PseudoMaterial): material to make grid for.
+        adsorbate (str): molecule name (ex: 'methane').
+        spacing (float): grid spacing, Angstroms.
+
+    Returns:
+        raspa_dir (str): value for $RASPA_DIR under which RASPA finds the grid.
+
+    The grid is built in a private directory and renamed into the material's
+    staging area when complete, so workers racing to build the same grid never
+    see a partial one; the loser's copy is discarded. RASPA is killed after
+    `energy_grid_timeout_seconds` (default 600) in `gas_adsorption` config.
+
+    """
+    raspa_dir = grid_raspa_dir(run_id, pseudo_material.uuid, adsorbate, spacing)
+    if os.path.isdir(raspa_dir):
+        return raspa_dir
+
+    build_dir = '%s_%s' % (raspa_dir, uuid4())
+    work_dir = os.path.join(build_dir, 'work')
+    os.makedirs(work_dir, exist_ok=True)
+    try:
+        _link_raspa_share(build_dir)
+    except ValueError:
+        shutil.rmtree(build_dir, ignore_errors=True)
+        raise
+    write_raspa_file(os.path.join(work_dir, 'MakeGrid.input'),
+            pseudo_material.uuid, adsorbate, spacing)
+    write_cif_file(pseudo_material, work_dir)
+    write_mixing_rules(pseudo_material, work_dir)
+    write_pseudo_atoms(pseudo_material, work_dir)
+    write_force_field(work_dir)
+    print("Making %s energy grid for %s..." % (adsorbate, pseudo_material.uuid))
+    timeout = config['gas_adsorption'].get('energy_grid_timeout_seconds',
+            DEFAULT_TIMEOUT_SECONDS)
+    try:
+        run_with_retries('gas_adsorption', lambda: simulate('MakeGrid.input', work_dir,
+            timeout, dict(os.environ, RASPA_DIR=build_dir)))
+    except PermanentSimulationError:
+        shutil.rmtree(build_dir, ignore_errors=True)
+        raise
+    shutil.rmtree(work_dir, ignore_errors=True)
+    try:
+        os.rename(build_dir, raspa_dir)
+    except OSError:
+        print("Somebody beat us to making this grid. That's ok!")
+        shutil.rmtree(build_dir, ignore_errors=True)
+    sys.stdout.flush()
+    return raspa_dir
@@ -0,0 +1,121 @@
+import sys
+import subprocess
+import time
+from datetime import datetime
+
+from htsohm import config
+
+# defaults for the per-simulation execution settings in config
+DEFAULT_TIMEOUT_SECONDS = 600
+DEFAULT_TIMEOUT_SECONDS_PER_CYCLE_ATOM = 0.01
+DEFAULT_RETRIES = 3
+DEFAULT_RETRY_BACKOFF_SECONDS = 10
+
+class SimulationError(Exception):
+    """Raised when a simulation does not produce results."""
+
+class TransientSimulationError(SimulationError):
+    """Raised for failures that may not recur: a hung or killed RASPA process,
+    or missing or truncated output files."""
+
+class PermanentSimulationError(SimulationError):
+    """Raised for failures that will recur for the same input: RASPA rejecting
+    its input, or a transient failure persisting through every retry."""
+
+def simulation_timeout(simulation, cycles, number_of_atoms):
+    """Wall-clock limit for one RASPA run.
+
+    Args:
+        simulation (str): simulation name, as in config (ex: 'surface_area').
+        cycles (int): total number of cycles simulated.
+        number_of_atoms (int): number of framework atoms simulated.
+
+    Returns:
+        timeout (float): `timeout_seconds` plus
+            `timeout_seconds_per_cycle_atom` for each cycle and atom, seconds.
+
+    """
+    settings = config.get(simulation, {})
+    return (
+        settings.get('timeout_seconds', DEFAULT_TIMEOUT_SECONDS) +
+        settings.get('timeout_seconds_per_cycle_atom', DEFAULT_TIMEOUT_SECONDS_PER_CYCLE_ATOM) *
+            cycles * number_of_atoms
+    )
+
+def simulate(input_file, cwd, timeout, env=None):
+    """Run RASPA once, killing it if it runs longer than `timeout` seconds.
+
+    Args:
+        input_file (str): RASPA input-file name, in `cwd`.
+        cwd (str): simulation directory.
+        timeout (float): wall-clock limit, seconds.
+        env (dict): environment for RASPA (default: inherit).
+
+    """
+    print("Date :\t%s" % datetime.now().date().isoformat())
+    print("Time :\t%s" % datetime.now().time().isoformat())
+    sys.stdout.flush()
+    subprocess.run(['simulate', './%s' % input_file], check=True, cwd=cwd,
+            env=env, timeout=timeout)
+
+def classify_failure(err):
+    """Classify a failed simulation attempt.
+
+    Args:
+        err (Exception): exception raised by the attempt.
+
+    Returns:
+        failure (SimulationError): `PermanentSimulationError` if RASPA exited
+            with an error of its own, otherwise `TransientSimulationError`.
+
+    """
+    if isinstance(err, subprocess.TimeoutExpired):
+        return TransientSimulationError('RASPA timed out after %ss' % err.timeout)
+    if isinstance(err, subprocess.CalledProcessError):
+        if err.returncode < 0:
+            return TransientSimulationError('RASPA killed by signal %s' % -err.returncode)
+        return PermanentSimulationError('RASPA exited with status %s' % err.returncode)
+    return TransientSimulationError('%s: %s' % (err.__class__.__name__, err))
+
+def run_with_retries(simulation, attempt):
+    """Run a simulation attempt, retrying transient failures with backoff.
+
+    Args:
+        simulation (str): simulation name, as in config (ex: 'surface_area').
+        attempt (callable): runs RASPA (see `simulate`) and parses its output,
+            returning the results.
+
+    Returns:
+        results: whatever `attempt` returns.
+
+    Raises:
+        PermanentSimulationError: if RASPA rejects its input, or the attempt
+            still fails after `retries` retries.
+
+    Failures are retried after `retry_backoff_seconds`, doubling after each
+    retry. A missing `simulate` executable is not the material's fault and is
+    raised as-is.
+
+    """
+    settings = config.get(simulation, {})
+    retries = settings.get('retries', DEFAULT_RETRIES)
+    backoff = settings.get('retry_backoff_seconds', DEFAULT_RETRY_BACKOFF_SECONDS)
+    for retry in range(retries + 1):
+        try:
+            return attempt()
+        except FileNotFoundError as err:
+            if err.filename == 'simulate':
+                raise
+            failure = classify_failure(err)
+        except (subprocess.SubprocessError, IndexError, KeyError, ValueError,
+                UnboundLocalError) as err:
+            failure = classify_failure(err)
+        print('%s failed (%s): %s' % (simulation, failure.__class__.__name__, failure))
+        if isinstance(failure, PermanentSimulationError):
+            raise failure
+        if retry < retries:
+            print('retrying in %ss...' % (backoff * 2 ** retry))
+            sys.stdout.flush()
+            time.sleep(backoff * 2 ** retry)
+    raise PermanentSimulationError('%s failed %s times; last failure: %s' % (
+        simulation, retries + 1, failure))
@@ -0,0 +1,312 @@
+import sys
+import os
+import shutil
+from uuid import uuid4
+
+from htsohm import config
+from htsohm.db import GasAdsorptionPoint
+from htsohm.material_files import write_cif_file, write_mixing_rules
+from htsohm.material_files import write_pseudo_atoms, write_force_field
+from htsohm.simulation.execution import run_with_retries, simulate, simulation_timeout
+from htsohm.simulation.output_profiles import output_settings
+from htsohm.simulation.staging import simulation_path
+from htsohm.simulation import energy_grid, native
+
+# pressure for `henry_loading`, Pa
+HENRY_PRESSURE = 1.
+
+def output_file_name(uuid, external_temperature, external_pressure):
+    """Name RASPA gives the output file for one pressure point."""
+    return "output_%s_1.1.1_%f_%g.data" % (uuid, external_temperature, external_pressure)
+
+def restart_file_name(uuid, external_temperature, external_pressure):
+    """Name RASPA gives the restart file for one pressure point."""
+    return "restart_%s_1.1.1_%f_%g" % (uuid, external_temperature, external_pressure)
+
+def write_raspa_file(filename, uuid, external_pressures, helium_void_fraction=None,
+                     initialization_cycles=None, restart=False):
+    """Writes RASPA input file for simulating gas adsorption.
+
+    Args:
+        filename (str): path to input file.
+        uuid (str): uuid for material.
+        external_pressures (list): pressures to simulate, Pa. RASPA runs every
+            pressure listed in one process.
+        helium_void_fraction (float): material's calculated void fraction.
+        initialization_cycles (int): overrides number of initialization cycles
+            in config.
+        restart (bool): start from the configuration in `RestartInitial`.
+
+    Writes RASPA input-file.
+
+    """
+    simulation_cycles      = config['gas_adsorption']['simulation_cycles']
+    external_temperature   = config['gas_adsorption']['external_temperature']
+    adsorbate              = config['gas_adsorption']['adsorbate']
+    use_energy_grid        = config['gas_adsorption'].get('energy_grid', False)
+    if initialization_cycles is None:
+        initialization_cycles = config['gas_adsorption']['initialization_cycles']
+
+    with open(filename, "w") as raspa_input_file:
+        raspa_input_file.write(
+            "SimulationType                 MonteCarlo\n" +
+            "NumberOfCycles                 %s\n" % (simulation_cycles) +                  # number of MonteCarlo cycles
+            "NumberOfInitializationCycles   %s\n" % (initialization_cycles) +    # number of initialization cycles
+            output_settings('gas_adsorption', simulation_cycles + initialization_cycles) +
+            "RestartFile                    %s\n" % ('yes' if restart else 'no') +
+            "\n" +
+            "Forcefield     GenericMOFs\n" +
+            "CutOff         12.8\n" +                                            # electrostatic cut-off, Angstroms
+            "\n" +
+            "Framework              0\n" +
+            "FrameworkName          %s\n" % (uuid) +
+            "UnitCells              1 1 1\n"
+        )
+        if helium_void_fraction != None:
+            raspa_input_file.write("HeliumVoidFraction     %s\n" % (helium_void_fraction))
+        if use_energy_grid:
+            spacing = config['gas_adsorption'].get(
+                    'energy_grid_spacing', energy_grid.DEFAULT_SPACING)
+            raspa_input_file.write(
+                "UseTabularGrid                 yes\n" +
+                energy_grid.grid_settings(adsorbate, spacing)
+            )
+        raspa_input_file.write(
+            "ExternalTemperature    %s\n" % (external_temperature) +               # External temperature, K
+            "ExternalPressure       %s\n" % (' '.join(str(p) for p in external_pressures)) +   # External pressure(s), Pa
+            "\n" +
+            "Component 0 MoleculeName               %s\n" % (adsorbate) +
+            "            MoleculeDefinition         TraPPE\n" +
+            "            TranslationProbability     1.0\n" +
+            "            ReinsertionProbability     1.0\n" +
+            "            SwapProbability            1.0\n" +
+            "            CreateNumberOfMolecules    0\n"
+        )
+
+def parse_output(output_file):
+    """Parse output file for gas adsorption data.
+
+    Args:
+        output_file (str): path to simulation output file.
+
+    Returns:
+        results (dict): absolute and excess molar, gravimetric, and volumetric
+            gas loadings, as well as energy of average, van der Waals, and
+            Coulombic host-host, host-adsorbate, and adsorbate-adsorbate
+            interactions, keyed by `GasAdsorptionPoint` column.
+
+    """
+    results = {}
+    with open(output_file) as origin:
+        line_counter = 1
+        for line in origin:
+            if "absolute [mol/kg" in line:
+                results['absolute_molar_loading'] = float(line.split()[5])
+            elif "absolute [cm^3 (STP)/g" in line:
+                results['absolute_gravimetric_loading'] = float(line.split()[6])
+            elif "absolute [cm^3 (STP)/c" in line:
+                results['absolute_volumetric_loading'] = float(line.split()[6])
+            elif "excess [mol/kg" in line:
+                results['excess_molar_loading'] = float(line.split()[5])
+            elif "excess [cm^3 (STP)/g" in line:
+                results['excess_gravimetric_loading'] = float(line.split()[6])
+            elif "excess [cm^3 (STP)/c" in line:
+                results['excess_volumetric_loading'] = float(line.split()[6])
+            elif "Average Host-Host energy:" in line:
+                host_host_line = line_counter + 8
+            elif "Average Adsorbate-Adsorbate energy:" in line:
+                adsorbate_adsorbate_line = line_counter + 8
+            elif "Average Host-Adsorbate energy:" in line:
+                host_adsorbate_line = line_counter + 8
+            line_counter += 1
+
+    with open(output_file) as origin:
+        line_counter = 1
+        for line in origin:
+            if line_counter == host_host_line:
+                results['host_host_avg'] = float(line.split()[1])
+                results['host_host_vdw'] = float(line.split()[5])
+                results['host_host_cou'] = float(line.split()[7])
+            elif line_counter == adsorbate_adsorbate_line:
+                results['adsorbate_adsorbate_avg'] = float(line.split()[1])
+                results['adsorbate_adsorbate_vdw'] = float(line.split()[5])
+                results['adsorbate_adsorbate_cou'] = float(line.split()[7])
+            elif line_counter == host_adsorbate_line:
+                results['host_adsorbate_avg'] = float(line.split()[1])
+                results['host_adsorbate_vdw'] = float(line.split()[5])
+                results['host_adsorbate_cou'] = float(line.split()[7])
+            line_counter += 1
+
+    adsorbate = config['gas_adsorption']['adsorbate']
+    print(
+        "\n%s ADSORPTION\tabsolute\texcess\n" % adsorbate +
+        "mol/kg\t\t\t%s\t%s\n" % (results['absolute_molar_loading'], results['excess_molar_loading']) +
+        "cc/g\t\t\t%s\t%s\n"   % (results['absolute_gravimetric_loading'], results['excess_gravimetric_loading']) +
+        "cc/cc\t\t\t%s\t%s\n"  % (results['absolute_volumetric_loading'], results['excess_volumetric_loading']) +
+        "\nENERGIES\thost-host\tadsorbate-adsorbate\thost-adsorbate\n" +
+        "avg\t\t%s\t\t%s\t\t%s\n" % (results['host_host_avg'], results['adsorbate_adsorbate_avg'], results['host_adsorbate_avg']) +
+        "vdw\t\t%s\t\t%s\t\t%s\n" % (results['host_host_vdw'], results['adsorbate_adsorbate_vdw'], results['host_adsorbate_vdw']) +
+        "cou\t\t%s\t\t%s\t\t\t%s\n" % (results['host_host_cou'], results['adsorbate_adsorbate_cou'], results['host_adsorbate_cou'])
+    )
+
+    return results
+
+def point_results(points):
+    """Collect per-point results into material columns.
+
+    Args:
+        points (list): `GasAdsorptionPoint` for each simulated pressure.
+
+    Returns:
+        results (dict): the points themselves, plus the first two points'
+            results copied into the `ga0_` and `ga1_` material columns.
+
+    """
+    results = {'gas_adsorption_points' : points}
+    for point in points[:2]:
+        for column in GasAdsorptionPoint.__table__.columns:
+            if column.name not in ['id', 'material_id', 'point', 'external_pressure']:
+                results['ga%s_%s' % (point.point, column.name)] = getattr(point, column.name)
+    return results
+
+def binned_loading(material):
+    """Loading used to bin a material: the absolute volumetric loading for a
+    single pressure, otherwise the deliverable capacity between the first and
+    last pressures.
+
+    """
+    points = material.gas_adsorption_points
+    if len(points) == 1:
+        return points[0].absolute_volumetric_loading
+    return abs(points[0].absolute_volumetric_loading - points[-1].absolute_volumetric_loading)
+
+def henry_loading(pseudo_material, samples):
+    """Absolute volumetric loading at `HENRY_PRESSURE`, from the adsorbate's
+    Henry coefficient (see `native.henry_volumetric_loading`).
+
+    Args:
+        pseudo_material (PseudoMaterial): material to estimate.
+        samples (int): number of Widom insertions.
+
+    Returns:
+        loading (float): loading at a pressure low enough for adsorption to be
+            linear in pressure, cm^3 (STP) / cm^3.
+
+    The configured pressures are usually far outside the Henry regime, so this
+    loading is not an estimate of `binned_loading`; it ranks materials, and is
+    mapped to gas adsorption bins by `htsohm.surrogate.HenryCalibration`.
+
+    """
+    adsorbate = config['gas_adsorption']['adsorbate']
+    external_temperature = config['gas_adsorption']['external_temperature']
+    return native.henry_volumetric_loading(pseudo_material, adsorbate,
+            external_temperature, HENRY_PRESSURE, samples)
+
+def _seed_restart(output_dir, uuid, external_temperature, previous_pressure, external_pressure):
+    """Copy the restart file written for one pressure to where RASPA looks for
+    the starting configuration of the next pressure.
+
+    """
+    restart_initial = os.path.join(output_dir, 'RestartInitial', 'System_0')
+    shutil.rmtree(restart_initial, ignore_errors=True)
+    os.makedirs(restart_initial, exist_ok=True)
+    shutil.copy(
+        os.path.join(output_dir, 'Restart', 'System_0',
+                restart_file_name(uuid, external_temperature, previous_pressure)),
+        os.path.join(restart_initial,
+                restart_file_name(uuid, external_temperature, external_pressure))
+    )
+
+def run(run_id, pseudo_material, helium_void_fraction=None):
+    """Runs gas adsorption simulations at every configured pressure.
+
+    Args:
+        run_id (str): identification string for run.
+        pseudo_material (PseudoMaterial): material to simulate.
+        helium_void_fraction (float): material's calculated void fraction.
+
+    Returns:
+        results (dict): gas loading simulation results, see `point_results`.
+
+    Raises:
+        PermanentSimulationError: if the simulation keeps failing.
+
+    The framework is staged once for all pressures. By default every pressure
+    is simulated by one RASPA process; with `seed_from_previous` set, each
+    pressure is started from the previous pressure's final configuration and
+    equilibrated for `seeded_initialization_cycles` instead.
+
+    """
+    adsorbate             = config['gas_adsorption']['adsorbate']
+    external_temperature  = config['gas_adsorption']['external_temperature']
+    external_pressures    = config['gas_adsorption']['external_pressures']
+    seed_from_previous    = config['gas_adsorption'].get('seed_from_previous', False)
+    seeded_initialization_cycles = config['gas_adsorption'].get(
+            'seeded_initialization_cycles',
+            config['gas_adsorption']['initialization_cycles'])
+
+    output_dir = os.path.join(simulation_path(run_id),
+            'output_%s_%s' % (pseudo_material.uuid, uuid4()))
+    print('Output directory :\t%s' % output_dir)
+    os.makedirs(output_dir, exist_ok=True)
+    write_cif_file(pseudo_material, output_dir)
+    write_mixing_rules(pseudo_material, output_dir)
+    write_pseudo_atoms(pseudo_material, output_dir)
+    write_force_field(output_dir)
+
+    print("Simulating %s loading in %s at %s Pa..." % (adsorbate,
+        pseudo_material.uuid, ', '.join(str(p) for p in external_pressures)))
+    simulation_cycles = config['gas_adsorption']['simulation_cycles']
+    initialization_cycles = config['gas_adsorption']['initialization_cycles']
+    number_of_atoms = pseudo_material.number_of_atoms
+
+    def attempt():
+        if seed_from_previous:
+            for i, external_pressure in enumerate(external_pressures):
+                input_file = '%s_loading_%s.input' % (adsorbate, i)
+                if i == 0:
+                    write_raspa_file(os.path.join(output_dir, input_file),
+                            pseudo_material.uuid, [external_pressure],
+                            helium_void_fraction)
+                    cycles = simulation_cycles + initialization_cycles
+                else:
+                    _seed_restart(output_dir, pseudo_material.uuid, external_temperature,
+                            external_pressures[i - 1], external_pressure)
+                    write_raspa_file(os.path.join(output_dir, input_file),
+                            pseudo_material.uuid, [external_pressure],
+                            helium_void_fraction, seeded_initialization_cycles,
+                            restart=True)
+                    cycles = simulation_cycles + seeded_initialization_cycles
+                simulate(input_file, output_dir,
+                        simulation_timeout('gas_adsorption', cycles, number_of_atoms), env)
+        else:
+            input_file = '%s_loading.input' % adsorbate
+            write_raspa_file(os.path.join(output_dir, input_file),
+                    pseudo_material.uuid, external_pressures, helium_void_fraction)
+            cycles = (simulation_cycles + initialization_cycles) * len(external_pressures)
+            simulate(input_file, output_dir,
+                    simulation_timeout('gas_adsorption', cycles, number_of_atoms), env)
+
+        points = []
+        for i, external_pressure in enumerate(external_pressures):
+            output_file = os.path.join(output_dir, 'Output', 'System_0',
+                    output_file_name(pseudo_material.uuid, external_temperature,
+                        external_pressure))
+            print('OUTPUT FILE:\t%s' % output_file)
+            points.append(GasAdsorptionPoint(i, external_pressure,
+                parse_output(output_file)))
+        return points
+
+    try:
+        env = None
+        if config['gas_adsorption'].get('energy_grid', False):
+            spacing = config['gas_adsorption'].get(
+                    'energy_grid_spacing', energy_grid.DEFAULT_SPACING)
+            raspa_dir = energy_grid.make_grid(run_id, pseudo_material, adsorbate, spacing)
+            env = dict(os.environ, RASPA_DIR=raspa_dir)
+        points = run_with_retries('gas_adsorption', attempt)
+    finally:
+        shutil.rmtree(output_dir, ignore_errors=True)
+        sys.stdout.flush()
+
+    return point_results(points)
@@ -1,22 +1,26 @@
 import sys
 import os
-import subprocess
 import shutil
-from datetime import datetime
 from uuid import uuid4
 
-import htsohm
+import numpy as np
+
 from htsohm import config
-from htsohm.material_files import write_cif_file, write_mixing_rules
-from htsohm.material_files import write_pseudo_atoms, write_force_field
+from htsohm.db import session, Material
+from htsohm.pseudo_material_archive import load_pseudo_material
+from htsohm.simulation import native
+from htsohm.simulation.batch import write_framework_files, system_output_file
+from htsohm.simulation.execution import run_with_retries, simulate, simulation_timeout
+from htsohm.simulation.output_profiles import output_settings
+from htsohm.simulation.staging import simulation_path
 
-def write_raspa_file(filename, uuid):
+def write_raspa_file(filename, uuids):
     """Writes RASPA input file for calculating helium void fraction.
 
     Args:
         filename (str): path to input file.
-        run_id (str): identification string for run.
-        material_id (str): uuid for material.
+        uuids (list): uuid for each material; each material is simulated as a
+            separate RASPA system.
 
     Writes RASPA input-file.
 
@@ -26,17 +30,19 @@ def write_raspa_file(filename, uuid):
         raspa_input_file.write(
             "SimulationType         MonteCarlo\n" +
             "NumberOfCycles         %s\n" % simulation_cycles +     # number of MonteCarlo cycles
-            "PrintEvery             10\n" +
-            "PrintPropertiesEvery   10\n" +
+            output_settings('helium_void_fraction', simulation_cycles) +
             "\n" +
             "Forcefield             GenericMOFs\n" +
             "CutOff                 12.8\n" +           # LJ interaction cut-off, Angstroms
-            "\n" +
-            "Framework              0\n" +
-            "FrameworkName          %s\n" % (uuid) +
-            "UnitCells              1 1 1\n" +
-            "ExternalTemperature    298.0\n" +    # External temperature, K
-            "\n" +
+            "\n")
+        for system, uuid in enumerate(uuids):
+            raspa_input_file.write(
+                "Framework              %s\n" % (system) +
+                "FrameworkName          %s\n" % (uuid) +
+                "UnitCells              1 1 1\n" +
+                "ExternalTemperature    298.0\n" +    # External temperature, K
+                "\n")
+        raspa_input_file.write(
             "Component 0 MoleculeName               helium\n" +
             "            MoleculeDefinition         TraPPE\n" +
             "            WidomProbability           1.0\n" +
@@ -61,49 +67,121 @@ def parse_output(output_file):
         print("\nVOID FRACTION :   %s\n" % (results['vf_helium_void_fraction']))
     return results
 
-def run(run_id, pseudo_material):
-    """Runs void fraction simulation.
+DEFAULT_NATIVE_SAMPLES = 10000
+
+def run_native(pseudo_materials):
+    """Estimates void fraction in-process (see `native.helium_void_fraction`),
+    with `native_samples` helium insertions per material.
+
+    Args:
+        pseudo_materials (list): materials to simulate.
+
+    Returns:
+        results (dict): void fraction results for each material, keyed by
+            material uuid.
+
+    """
+    samples = config['helium_void_fraction'].get('native_samples', DEFAULT_NATIVE_SAMPLES)
+    results = {}
+    for pseudo_material in pseudo_materials:
+        void_fraction = native.helium_void_fraction(pseudo_material, samples)
+        print("\nVOID FRACTION :   %s\n" % void_fraction)
+        results[pseudo_material.uuid] = {'vf_helium_void_fraction' : void_fraction}
+    sys.stdout.flush()
+    return results
+
+def run_batch(run_id, pseudo_materials):
+    """Runs void fraction simulations for several materials in one RASPA
+    invocation, or in-process with `backend: 'native'` in config.
 
     Args:
         run_id (str): identification string for run.
-        material_id (str): unique identifier for material.
+        pseudo_materials (list): materials to simulate.
 
     Returns:
-        results (dict): void fraction simulation results.
+        results (dict): void fraction simulation results for each material,
+            keyed by material uuid.
+
+    Raises:
+        PermanentSimulationError: if the simulation keeps failing.
 
     """
-    simulation_directory  = config['simulations_directory']
-    if simulation_directory == 'HTSOHM':
-        htsohm_dir = os.path.dirname(os.path.dirname(htsohm.__file__))
-        path = os.path.join(htsohm_dir, run_id)
-    elif simulation_directory == 'SCRATCH':
-        path = os.environ['SCRATCH']
+    if config['helium_void_fraction'].get('backend', 'raspa') == 'native':
+        return run_native(pseudo_materials)
+
+    uuids = [pseudo_material.uuid for pseudo_material in pseudo_materials]
+    if len(uuids) == 1:
+        output_dir = os.path.join(simulation_path(run_id), 'output_%s_%s' % (uuids[0], uuid4()))
     else:
-        print('OUTPUT DIRECTORY NOT FOUND.')
-    output_dir = os.path.join(path, 'output_%s_%s' % (pseudo_material.uuid, uuid4()))
+        output_dir = os.path.join(simulation_path(run_id), 'output_batch_%s' % uuid4())
     print("Output directory :\t%s" % output_dir)
     os.makedirs(output_dir, exist_ok=True)
     filename = os.path.join(output_dir, "VoidFraction.input")
-    write_raspa_file(filename, pseudo_material.uuid)
-    write_cif_file(pseudo_material, output_dir)
-    write_mixing_rules(pseudo_material, output_dir)
-    write_pseudo_atoms(pseudo_material, output_dir)
-    write_force_field(output_dir)
-    while True:
-        try:
-            print("Date :\t%s" % datetime.now().date().isoformat())
-            print("Time :\t%s" % datetime.now().time().isoformat())
-            print("Calculating void fraction of %s..." % (pseudo_material.uuid))
-            subprocess.run(['simulate', './VoidFraction.input'], check=True, cwd=output_dir)
-            filename = "output_%s_1.1.1_298.000000_0.data" % (pseudo_material.uuid)
-            output_file = os.path.join(output_dir, 'Output', 'System_0', filename)
-            results = parse_output(output_file)
-            shutil.rmtree(output_dir, ignore_errors=True)
-            sys.stdout.flush()
-        except (FileNotFoundError, IndexError, KeyError) as err:
-            print(err)
-            print(err.args)
-            continue
-        break
+    write_raspa_file(filename, uuids)
+    write_framework_files(pseudo_materials, output_dir)
+    print("Calculating void fraction of %s..." % (', '.join(uuids)))
+    simulation_cycles = config['helium_void_fraction']['simulation_cycles']
+    number_of_atoms = sum(pseudo_material.number_of_atoms for pseudo_material in pseudo_materials)
+    timeout = simulation_timeout('helium_void_fraction', simulation_cycles, number_of_atoms)
+
+    def attempt():
+        simulate('VoidFraction.input', output_dir, timeout)
+        results = {}
+        for system, uuid in enumerate(uuids):
+            filename = "output_%s_1.1.1_298.000000_0.data" % (uuid)
+            results[uuid] = parse_output(system_output_file(output_dir, system, filename))
+        return results
+
+    try:
+        results = run_with_retries('helium_void_fraction', attempt)
+    finally:
+        shutil.rmtree(output_dir, ignore_errors=True)
+        sys.stdout.flush()
 
     return results
+
+def run(run_id, pseudo_material):
+    """Runs void fraction simulation.
+
+    Args:
+        run_id (str): identification string for run.
+        pseudo_material (PseudoMaterial): material to simulate.
+
+    Returns:
+        results (dict): void fraction simulation results.
+
+    """
+    return run_batch(run_id, [pseudo_material])[pseudo_material.uuid]
+
+def validate_native(run_id, count):
+    """Compare native void fraction estimates with a run's RASPA results.
+
+    Args:
+        run_id (str): identification string for run.
+        count (int): number of the run's materials to compare.
+
+    Returns:
+        differences (numpy.ndarray): native minus RASPA void fraction, for each
+            material compared.
+
+    Prints both values for each material, then the mean and maximum absolute
+    difference.
+
+    """
+    materials = session.query(Material) \
+            .filter(Material.run_id == run_id, Material.vf_helium_void_fraction != None) \
+            .order_by(Material.id).limit(count).all()
+    samples = config['helium_void_fraction'].get('native_samples', DEFAULT_NATIVE_SAMPLES)
+    differences = []
+    print('%-36s  %8s  %8s' % ('uuid', 'raspa', 'native'))
+    for material in materials:
+        pseudo_material = load_pseudo_material(run_id, material.uuid)
+        void_fraction = native.helium_void_fraction(pseudo_material, samples)
+        print('%-36s  %8.4f  %8.4f' % (material.uuid, material.vf_helium_void_fraction,
+                void_fraction))
+        differences.append(void_fraction - material.vf_helium_void_fraction)
+    differences = np.array(differences)
+    if len(differences):
+        print('mean absolute difference :\t%s' % np.abs(differences).mean())
+        print('max absolute difference :\t%s' % np.abs(differences).max())
+    return differences
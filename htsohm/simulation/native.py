@@ -0,0 +1,212 @@
+import numpy as np
+
+from htsohm.geometry import neighbor_pairs
+from htsohm.material_files import ADSORBATE_LJ_ATOMS
+
+# RASPA settings mirrored by the native estimators: Lennard-Jones interactions
+# are cut off (and shifted to zero) at 12.8 Angstroms, with Lorentz-Berthelot
+# mixing of the framework and probe parameters.
+CUTOFF = 12.8
+ADSORBATE_LJ_PARAMETERS = {name : (epsilon, sigma) for name, epsilon, sigma in ADSORBATE_LJ_ATOMS}
+
+# framework atom-sites are written to pseudo_atoms.def as carbon, g / mol
+FRAMEWORK_ATOM_MASS = 12.0
+AVOGADRO = 6.02214076e23
+
+# adsorbates (TraPPE definitions) that interact with the framework through one
+# Lennard-Jones site, and so whose Henry coefficient is a single Widom weight
+SINGLE_SITE_ADSORBATES = {
+    'methane'   : 'CH4_sp3',
+    'helium'    : 'He',
+    'krypton'   : 'Kr',
+    'xenon'     : 'Xe',
+    'hydrogen'  : 'H_com'
+}
+
+# STP, for loadings in cm^3 (STP) / cm^3
+STANDARD_PRESSURE = 101325.
+STANDARD_TEMPERATURE = 273.15
+
+# maximum number of probe-atom distances held in memory at once
+DEFAULT_CHUNK_SIZE = 2 ** 22
+
+def mixed_parameters(pseudo_material, probe):
+    """Lorentz-Berthelot parameters for a probe's interaction with each
+    atom-site.
+
+    Args:
+        pseudo_material (PseudoMaterial): framework.
+        probe (str): adsorbate pseudo atom (ex: 'He').
+
+    Returns:
+        epsilons, sigmas (numpy.ndarray): epsilon (K) and sigma (Angstroms) of
+            each atom-site's interaction with the probe, shape (N,).
+
+    """
+    probe_epsilon, probe_sigma = ADSORBATE_LJ_PARAMETERS[probe]
+    atom_types = pseudo_material.atom_type_parameters
+    epsilons = np.sqrt(atom_types['epsilon'] * probe_epsilon)
+    sigmas = (atom_types['sigma'] + probe_sigma) / 2
+    return epsilons[pseudo_material.type_indices], sigmas[pseudo_material.type_indices]
+
+def probe_energies(pseudo_material, points, probe, cutoff=CUTOFF,
+        chunk_size=DEFAULT_CHUNK_SIZE):
+    """Energy of a probe at each of several points in a framework.
+
+    Args:
+        pseudo_material (PseudoMaterial): framework.
+        points (numpy.ndarray): fractional coordinates of the probe, shape
+            (M, 3).
+        probe (str): adsorbate pseudo atom (ex: 'He').
+        cutoff (float): interaction cut-off, Angstroms; at most half the
+            smallest lattice constant.
+        chunk_size (int): maximum number of probe-atom distances computed at
+            once.
+
+    Returns:
+        energies (numpy.ndarray): shifted Lennard-Jones energy of the probe at
+            each point, K, shape (M,).
+
+    """
+    epsilons, sigmas = mixed_parameters(pseudo_material, probe)
+    s6_cutoff = (sigmas / cutoff) ** 6
+    shifts = 4 * epsilons * (s6_cutoff ** 2 - s6_cutoff)
+    coordinates = pseudo_material.fractional_coordinates
+    lattice = pseudo_material.lattice
+
+    energies = np.empty(len(points))
+    points_per_chunk = max(1, chunk_size // max(1, len(coordinates)))
+    for start in range(0, len(points), points_per_chunk):
+        df = points[start:start + points_per_chunk, None, :] - coordinates[None, :, :]
+        df -= np.round(df)
+        r2 = ((df * lattice) ** 2).sum(axis=2)
+        with np.errstate(divide='ignore', over='ignore', invalid='ignore'):
+            s6 = (sigmas ** 2 / r2) ** 3
+            pair_energies = 4 * epsilons * (s6 ** 2 - s6) - shifts
+        pair_energies[r2 >= cutoff ** 2] = 0.
+        pair_energies[r2 == 0.] = np.inf
+        energies[start:start + points_per_chunk] = pair_energies.sum(axis=1)
+    return energies
+
+def widom_weight(pseudo_material, probe, samples, temperature, rng=None,
+        chunk_size=DEFAULT_CHUNK_SIZE):
+    """Average Boltzmann factor of a probe inserted at random, as RASPA's
+    average Widom Rosenbluth-weight.
+
+    Args:
+        pseudo_material (PseudoMaterial): framework.
+        probe (str): adsorbate pseudo atom (ex: 'He').
+        samples (int): number of random insertions.
+        temperature (float): K.
+        rng (numpy.random.Generator): random number source.
+        chunk_size (int): see `probe_energies`.
+
+    Returns:
+        weight (float): <exp(-U / T)> over the insertions.
+
+    """
+    if rng is None:
+        rng = np.random.default_rng()
+    energies = probe_energies(pseudo_material, rng.random((samples, 3)), probe,
+            chunk_size=chunk_size)
+    with np.errstate(over='ignore'):
+        return float(np.exp(-energies / temperature).mean())
+
+def helium_void_fraction(pseudo_material, samples, temperature=298., rng=None,
+        chunk_size=DEFAULT_CHUNK_SIZE):
+    """Estimate helium void fraction by Widom insertion of helium atoms.
+
+    Args:
+        pseudo_material (PseudoMaterial): framework.
+        samples (int): number of random insertions.
+        temperature (float): K.
+        rng (numpy.random.Generator): random number source.
+        chunk_size (int): see `probe_energies`.
+
+    Returns:
+        void_fraction (float): Widom weight of helium (see `widom_weight`).
+
+    """
+    return widom_weight(pseudo_material, 'He', samples, temperature, rng, chunk_size)
+
+def henry_volumetric_loading(pseudo_material, adsorbate, temperature, pressure, samples,
+        rng=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Estimate absolute volumetric loading in the Henry (low pressure) limit.
+
+    Args:
+        pseudo_material (PseudoMaterial): framework.
+        adsorbate (str): molecule name (ex: 'methane'); must be one of
+            `SINGLE_SITE_ADSORBATES`.
+        temperature (float): K.
+        pressure (float): Pa.
+        samples (int): number of random insertions.
+        rng (numpy.random.Generator): random number source.
+        chunk_size (int): see `probe_energies`.
+
+    Returns:
+        loading (float): cm^3 (STP) / cm^3, the ideal gas density at
+            `temperature` and `pressure` times the adsorbate's Widom weight.
+            Loading is linear in pressure, so overestimates loadings where
+            the adsorbate saturates the framework.
+
+    """
+    if adsorbate not in SINGLE_SITE_ADSORBATES:
+        raise ValueError('No Henry coefficient estimate for adsorbate %r.' % adsorbate)
+    weight = widom_weight(pseudo_material, SINGLE_SITE_ADSORBATES[adsorbate], samples,
+            temperature, rng, chunk_size)
+    return weight * pressure / STANDARD_PRESSURE * STANDARD_TEMPERATURE / temperature
+
+def accessible_surface_area(pseudo_material, samples_per_atom, probe='N_n2', rng=None,
+        chunk_size=DEFAULT_CHUNK_SIZE):
+    """Estimate probe-accessible surface area by sampling points around each
+    atom-site.
+
+    Args:
+        pseudo_material (PseudoMaterial): framework.
+        samples_per_atom (int): number of random points on each atom-site's
+            sphere.
+        probe (str): adsorbate pseudo atom (ex: 'N_n2').
+        rng (numpy.random.Generator): random number source.
+        chunk_size (int): maximum number of point-neighbour distances computed
+            at once.
+
+    Returns:
+        results (dict): total unit cell (A^2), gravimetric (m^2/g), and
+            volumetric (m^2/cm^3) surface areas.
+
+    As RASPA's `SurfaceAreaProbeDistance Minimum`, each atom-site's sphere has
+    the radius of the probe's potential minimum, 2^(1/6) sigma. Points within
+    a neighbouring atom-site's sphere are rejected; neighbours are found with
+    a periodic neighbour list, so the spheres' diameters must be at most half
+    the smallest lattice constant.
+
+    """
+    if rng is None:
+        rng = np.random.default_rng()
+    _, sigmas = mixed_parameters(pseudo_material, probe)
+    radii = 2 ** (1 / 6) * sigmas
+    coordinates = pseudo_material.fractional_coordinates
+    lattice = pseudo_material.lattice
+
+    points = rng.normal(size=(len(coordinates), samples_per_atom, 3))
+    points *= (radii[:, None] / np.linalg.norm(points, axis=2))[:, :, None]
+
+    i, j, _ = neighbor_pairs(coordinates, lattice, 2 * radii.max() if len(radii) else 0.)
+    i, j = np.concatenate([i, j]), np.concatenate([j, i])
+    blocked = np.zeros(points.shape[:2], dtype=bool)
+    pairs_per_chunk = max(1, chunk_size // max(1, samples_per_atom))
+    for start in range(0, len(i), pairs_per_chunk):
+        first, second = i[start:start + pairs_per_chunk], j[start:start + pairs_per_chunk]
+        df = coordinates[second] - coordinates[first]
+        df -= np.round(df)
+        r2 = ((points[first] - (df * lattice)[:, None, :]) ** 2).sum(axis=2)
+        np.logical_or.at(blocked, first, r2 < radii[second, None] ** 2)
+
+    accessible = 1 - blocked.mean(axis=1) if len(radii) else np.zeros(0)
+    unit_cell_area = float((4 * np.pi * radii ** 2 * accessible).sum())
+    mass = FRAMEWORK_ATOM_MASS * pseudo_material.number_of_atoms / AVOGADRO
+    return {
+        'sa_unit_cell_surface_area'   : unit_cell_area,
+        'sa_gravimetric_surface_area' : unit_cell_area * 1e-20 / mass if mass else 0.,
+        'sa_volumetric_surface_area'  : unit_cell_area / pseudo_material.volume() * 1e4
+    }
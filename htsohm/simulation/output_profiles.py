@@ -0,0 +1,82 @@
+from htsohm import config
+
+# RASPA output settings for each output profile. A frequency of `None` means
+# "once per run" and is replaced by the total number of cycles when rendered.
+OUTPUT_PROFILES = {
+    'minimal' : {
+        'print_every'               : None,
+        'print_properties_every'    : None,
+        'print_definitions'         : False,
+        'movies'                    : False,
+        'write_restart_every'       : None
+    },
+    'summary' : {
+        'print_every'               : 10,
+        'print_properties_every'    : 10,
+        'print_definitions'         : False,
+        'movies'                    : False,
+        'write_restart_every'       : None
+    },
+    'debug' : {
+        'print_every'               : 1,
+        'print_properties_every'    : 1,
+        'print_definitions'         : True,
+        'movies'                    : True,
+        'write_restart_every'       : 100
+    }
+}
+
+DEFAULT_OUTPUT_PROFILE = 'summary'
+
+def _yes_no(flag):
+    return 'yes' if flag else 'no'
+
+def output_profile(simulation):
+    """Find output profile for a simulation.
+
+    Args:
+        simulation (str): simulation name, as in config (ex: 'surface_area').
+
+    Returns:
+        profile (dict): RASPA output settings, see `OUTPUT_PROFILES`.
+
+    """
+    name = config.get(simulation, {}).get('output_profile', DEFAULT_OUTPUT_PROFILE)
+    if name not in OUTPUT_PROFILES:
+        raise ValueError('Unknown output profile %r for %s; expected one of %s.' % (
+            name, simulation, ', '.join(sorted(OUTPUT_PROFILES))))
+    return OUTPUT_PROFILES[name]
+
+def output_settings(simulation, cycles):
+    """Render RASPA input-file lines controlling output volume.
+
+    Args:
+        simulation (str): simulation name, as in config (ex: 'surface_area').
+        cycles (int): total number of cycles (initialization + production).
+
+    Returns:
+        lines (str): print frequencies, definition printing, movies and
+            restart-file settings for the simulation's output profile.
+
+    """
+    profile = output_profile(simulation)
+    once = max(int(cycles), 1)
+
+    print_every = profile['print_every'] or once
+    print_properties_every = profile['print_properties_every'] or once
+    # RASPA writes a crash-recovery binary restart every N cycles; push it past
+    # the end of the run to disable it.
+    write_restart_every = profile['write_restart_every'] or once + 1
+
+    lines = (
+        "PrintEvery                      %s\n" % print_every +
+        "PrintPropertiesEvery            %s\n" % print_properties_every +
+        "PrintForceFieldToOutput         %s\n" % _yes_no(profile['print_definitions']) +
+        "PrintPseudoAtomsToOutput        %s\n" % _yes_no(profile['print_definitions']) +
+        "PrintMoleculeDefinitionToOutput %s\n" % _yes_no(profile['print_definitions']) +
+        "WriteBinaryRestartFileEvery     %s\n" % write_restart_every +
+        "Movies                          %s\n" % _yes_no(profile['movies'])
+    )
+    if profile['movies']:
+        lines += "WriteMoviesEvery                %s\n" % print_every
+    return lines
@@ -0,0 +1,54 @@
+import os
+import shutil
+
+import htsohm
+from htsohm import config
+
+def simulation_path(run_id):
+    """Find directory simulations are run in.
+
+    Args:
+        run_id (str): identification string for run.
+
+    Returns:
+        path (str): the run's directory when `simulations_directory` is
+            'HTSOHM', or `$SCRATCH` when it is 'SCRATCH'.
+
+    """
+    simulation_directory = config['simulations_directory']
+    if simulation_directory == 'HTSOHM':
+        htsohm_dir = os.path.dirname(os.path.dirname(htsohm.__file__))
+        return os.path.join(htsohm_dir, run_id)
+    elif simulation_directory == 'SCRATCH':
+        return os.environ['SCRATCH']
+    else:
+        raise ValueError('OUTPUT DIRECTORY NOT FOUND: %r' % simulation_directory)
+
+def staging_directory(run_id, uuid):
+    """Find a material's staging area.
+
+    Args:
+        run_id (str): identification string for run.
+        uuid (str): uuid for material.
+
+    Returns:
+        path (str): directory holding files that are reused by every
+            simulation (and retest) of the material, such as energy grids.
+
+    The staging area lives until the material can no longer be simulated: it is
+    removed when the material fails, is saved in excess of its generation, or
+    finishes its retests (see `remove_staging_directory`).
+
+    """
+    return os.path.join(simulation_path(run_id), 'staging', uuid)
+
+def remove_staging_directory(run_id, uuid):
+    """Remove a material's staging area, once the material will not be
+    simulated again.
+
+    Args:
+        run_id (str): identification string for run.
+        uuid (str): uuid for material.
+
+    """
+    shutil.rmtree(staging_directory(run_id, uuid), ignore_errors=True)
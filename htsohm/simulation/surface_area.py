@@ -1,22 +1,22 @@
 import sys
 import os
-import subprocess
 import shutil
-from datetime import datetime
 from uuid import uuid4
 
-import htsohm
 from htsohm import config
-from htsohm.material_files import write_cif_file, write_mixing_rules
-from htsohm.material_files import write_pseudo_atoms, write_force_field
+from htsohm.simulation import native
+from htsohm.simulation.batch import write_framework_files, system_output_file
+from htsohm.simulation.execution import run_with_retries, simulate, simulation_timeout
+from htsohm.simulation.output_profiles import output_settings
+from htsohm.simulation.staging import simulation_path
 
-def write_raspa_file(filename, uuid):
+def write_raspa_file(filename, uuids):
     """Writes RASPA input file for calculating surface area.
 
     Args:
         filename (str): path to input file.
-        run_id (str): identification string for run.
-        material_id (str): uuid for material.
+        uuids (list): uuid for each material; each material is simulated as a
+            separate RASPA system.
 
     Writes RASPA input-file.
 
@@ -26,23 +26,32 @@ def write_raspa_file(filename, uuid):
         raspa_input_file.write(
             "SimulationType         MonteCarlo\n" +
             "NumberOfCycles         %s\n" % (simulation_cycles) +             # number of MonteCarlo cycles
-            "PrintEvery             1\n" +
-            "PrintPropertiesEvery   1\n" +
+            output_settings('surface_area', simulation_cycles) +
             "\n" +
-            "Forcefield             %s" % (uuid) +
+            "Forcefield             GenericMOFs\n" +
             "CutOff                 12.8\n" +                        # electrostatic cut-off, Angstroms
-            "\n" +
-            "Framework                  0\n" +
-            "FrameworkName              %s\n" % (uuid) +
-            "UnitCells                  1 1 1\n" +
-            "SurfaceAreaProbeDistance   Minimum\n" +
-            "\n" +
+            "\n")
+        for system, uuid in enumerate(uuids):
+            raspa_input_file.write(
+                "Framework                  %s\n" % (system) +
+                "FrameworkName              %s\n" % (uuid) +
+                "UnitCells                  1 1 1\n" +
+                "SurfaceAreaProbeDistance   Minimum\n" +
+                "\n")
+        raspa_input_file.write(
             "Component 0 MoleculeName               N2\n" +
             "            StartingBead               0\n" +
             "            MoleculeDefinition         TraPPE\n" +
             "            SurfaceAreaProbability     1.0\n" +
             "            CreateNumberOfMolecules    0\n")
 
+def print_results(results):
+    print(
+        "\nSURFACE AREA\n" +
+        "%s\tA^2\n"      % (results['sa_unit_cell_surface_area']) +
+        "%s\tm^2/g\n"    % (results['sa_gravimetric_surface_area']) +
+        "%s\tm^2/cm^3"   % (results['sa_volumetric_surface_area']))
+
 def parse_output(output_file):
     """Parse output file for void fraction data.
 
@@ -54,70 +63,108 @@ def parse_output(output_file):
             areas.
 
     """
+    # Results are keyed by their units, so the averages are found no matter how
+    # much per-cycle output the output profile adds; the final averages are
+    # printed last and overwrite any earlier values.
+    columns = {
+        '[A^2]'      : 'sa_unit_cell_surface_area',
+        '[m^2/g]'    : 'sa_gravimetric_surface_area',
+        '[m^2/cm^3]' : 'sa_volumetric_surface_area'
+    }
     results = {}
     with open(output_file) as origin:
-        count = 0
         for line in origin:
             if "Surface area" in line:
-                if count == 0:
-                    results['sa_unit_cell_surface_area'] = float(line.split()[2])
-                    count = count + 1
-                elif count == 1:
-                    results['sa_gravimetric_surface_area'] = float(line.split()[2])
-                    count = count + 1
-                elif count == 2:
-                    results['sa_volumetric_surface_area'] = float(line.split()[2])
+                units = line.split()[-1]
+                if units in columns:
+                    results[columns[units]] = float(line.split()[2])
 
-    print(
-        "\nSURFACE AREA\n" +
-        "%s\tA^2\n"      % (results['sa_unit_cell_surface_area']) +
-        "%s\tm^2/g\n"    % (results['sa_gravimetric_surface_area']) +
-        "%s\tm^2/cm^3"   % (results['sa_volumetric_surface_area']))
+    print_results(results)
     return results
 
-def run(run_id, pseudo_material):
-    """Runs surface area simulation.
+DEFAULT_NATIVE_SAMPLES_PER_ATOM = 500
+
+def run_native(pseudo_materials):
+    """Estimates surface area in-process (see
+    `native.accessible_surface_area`), with `native_samples_per_atom` points
+    on each atom-site's sphere.
+
+    Args:
+        pseudo_materials (list): materials to simulate.
+
+    Returns:
+        results (dict): surface area results for each material, keyed by
+            material uuid.
+
+    """
+    samples = config['surface_area'].get('native_samples_per_atom',
+            DEFAULT_NATIVE_SAMPLES_PER_ATOM)
+    results = {}
+    for pseudo_material in pseudo_materials:
+        results[pseudo_material.uuid] = native.accessible_surface_area(pseudo_material, samples)
+        print_results(results[pseudo_material.uuid])
+    sys.stdout.flush()
+    return results
+
+def run_batch(run_id, pseudo_materials):
+    """Runs surface area simulations for several materials in one RASPA
+    invocation, or in-process with `backend: 'native'` in config.
 
     Args:
         run_id (str): identification string for run.
-        material_id (str): unique identifier for material.
+        pseudo_materials (list): materials to simulate.
 
     Returns:
-        results (dict): surface area simulation results.
+        results (dict): surface area simulation results for each material,
+            keyed by material uuid.
+
+    Raises:
+        PermanentSimulationError: if the simulation keeps failing.
 
     """
-    simulation_directory  = config['simulations_directory']
-    if simulation_directory == 'HTSOHM':
-        htsohm_dir = os.path.dirname(os.path.dirname(htsohm.__file__))
-        path = os.path.join(htsohm_dir, run_id)
-    elif simulation_directory == 'SCRATCH':
-        path = os.environ['SCRATCH']
+    if config['surface_area'].get('backend', 'raspa') == 'native':
+        return run_native(pseudo_materials)
+
+    uuids = [pseudo_material.uuid for pseudo_material in pseudo_materials]
+    if len(uuids) == 1:
+        output_dir = os.path.join(simulation_path(run_id), 'output_%s_%s' % (uuids[0], uuid4()))
     else:
-        print('OUTPUT DIRECTORY NOT FOUND.')
-    output_dir = os.path.join(path, 'output_%s_%s' % (pseudo_material.uuid, uuid4()))
+        output_dir = os.path.join(simulation_path(run_id), 'output_batch_%s' % uuid4())
     print("Output directory :\t%s" % output_dir)
     os.makedirs(output_dir, exist_ok=True)
     filename = os.path.join(output_dir, "SurfaceArea.input")
-    write_raspa_file(filename, pseudo_material.uuid)
-    write_cif_file(pseudo_material, output_dir)
-    write_mixing_rules(pseudo_material, output_dir)
-    write_pseudo_atoms(pseudo_material, output_dir)
-    write_force_field(output_dir)
-    while True:
-        try:
-            print("Date :\t%s" % datetime.now().date().isoformat())
-            print("Time :\t%s" % datetime.now().time().isoformat())
-            print("Calculating surface area of %s..." % (pseudo_material.uuid))
-            subprocess.run(['simulate', './SurfaceArea.input'], check=True, cwd=output_dir)
-            filename = "output_%s_1.1.1_298.000000_0.data" % (pseudo_material.uuid)
-            output_file = os.path.join(output_dir, 'Output', 'System_0', filename)
-            results = parse_output(output_file)
-            shutil.rmtree(output_dir, ignore_errors=True)
-            sys.stdout.flush()
-        except (FileNotFoundError, KeyError) as err:
-            print(err)
-            print(err.args)
-            continue
-        break
+    write_raspa_file(filename, uuids)
+    write_framework_files(pseudo_materials, output_dir)
+    print("Calculating surface area of %s..." % (', '.join(uuids)))
+    simulation_cycles = config['surface_area']['simulation_cycles']
+    number_of_atoms = sum(pseudo_material.number_of_atoms for pseudo_material in pseudo_materials)
+    timeout = simulation_timeout('surface_area', simulation_cycles, number_of_atoms)
+
+    def attempt():
+        simulate('SurfaceArea.input', output_dir, timeout)
+        results = {}
+        for system, uuid in enumerate(uuids):
+            filename = "output_%s_1.1.1_298.000000_0.data" % (uuid)
+            results[uuid] = parse_output(system_output_file(output_dir, system, filename))
+        return results
+
+    try:
+        results = run_with_retries('surface_area', attempt)
+    finally:
+        shutil.rmtree(output_dir, ignore_errors=True)
+        sys.stdout.flush()
 
     return results
+
+def run(run_id, pseudo_material):
+    """Runs surface area simulation.
+
+    Args:
+        run_id (str): identification string for run.
+        pseudo_material (PseudoMaterial): material to simulate.
+
+    Returns:
+        results (dict): surface area simulation results.
+
+    """
+    return run_batch(run_id, [pseudo_material])[pseudo_material.uuid]
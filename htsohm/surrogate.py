@@ -0,0 +1,206 @@
+import numpy as np
+from sqlalchemy.sql import func, or_
+
+from htsohm import config
+from htsohm.db import session, Material
+from htsohm.geometry import packing_fraction
+
+# Material columns used as surrogate model inputs, and the bins it predicts
+DESCRIPTOR_COLUMNS = [
+    'sd_lattice_a',
+    'sd_lattice_b',
+    'sd_lattice_c',
+    'sd_number_density',
+    'sd_mean_epsilon',
+    'sd_mean_sigma',
+    'sd_geometric_void_fraction'
+]
+BIN_COLUMNS = ['gas_adsorption_bin', 'surface_area_bin', 'void_fraction_bin']
+
+def structure_descriptors(pseudo_material):
+    """Cheap structural descriptors of a pseudo material.
+
+    Args:
+        pseudo_material (PseudoMaterial): material to describe.
+
+    Returns:
+        descriptors (dict): values of the material's `DESCRIPTOR_COLUMNS`.
+
+    """
+    atom_types = pseudo_material.atom_type_parameters[pseudo_material.type_indices]
+    a, b, c = pseudo_material.lattice.tolist()
+    return {
+        'sd_lattice_a'               : a,
+        'sd_lattice_b'               : b,
+        'sd_lattice_c'               : c,
+        'sd_number_density'          : pseudo_material.number_density(),
+        'sd_mean_epsilon'            : float(atom_types['epsilon'].mean()),
+        'sd_mean_sigma'              : float(atom_types['sigma'].mean()),
+        'sd_geometric_void_fraction' : 1 - packing_fraction(pseudo_material)
+    }
+
+class BinSurrogate:
+    """Ridge regression of a run's bins on structure descriptors, trained
+    online.
+
+    Attributes:
+        run_id (str): identification string for run.
+        ridge (float): regularization strength, for standardized descriptors.
+        count (int): number of materials trained on.
+
+    Only the sums needed to solve for the regression (descriptors, bins, and
+    their products) are kept, in total and for each generation. Each update
+    compares each generation's count and sum of ids with those last trained
+    on, and retrains only on the generations that changed, so materials saved
+    out of id order (ex: by workers flushing write buffers) are still trained
+    on.
+
+    """
+    def __init__(self, run_id, ridge=1.0):
+        self.run_id = run_id
+        self.ridge = ridge
+        self.count = 0
+        self._signatures = {}       # generation -> (count, sum of ids) last read
+        self._generation_sums = {}  # generation -> sums trained on (see `_sums`)
+        size = len(DESCRIPTOR_COLUMNS)
+        self._x_sum = np.zeros(size)
+        self._y_sum = np.zeros(len(BIN_COLUMNS))
+        self._xx_sum = np.zeros((size, size))
+        self._xy_sum = np.zeros((size, len(BIN_COLUMNS)))
+
+    @staticmethod
+    def _sums(descriptors, bins):
+        """Count, sums and sums of products of descriptors and bins."""
+        descriptors = np.asarray(descriptors, dtype=float).reshape(-1, len(DESCRIPTOR_COLUMNS))
+        bins = np.asarray(bins, dtype=float).reshape(-1, len(BIN_COLUMNS))
+        return (len(descriptors), descriptors.sum(axis=0), bins.sum(axis=0),
+                descriptors.T @ descriptors, descriptors.T @ bins)
+
+    def _accumulate(self, sums, sign=1):
+        """Add (or, with `sign` -1, remove) sums from `_sums`."""
+        count, x_sum, y_sum, xx_sum, xy_sum = sums
+        self.count += sign * count
+        self._x_sum += sign * x_sum
+        self._y_sum += sign * y_sum
+        self._xx_sum += sign * xx_sum
+        self._xy_sum += sign * xy_sum
+
+    def add(self, descriptors, bins):
+        """Train on materials' descriptors, shape (M, D), and bins, shape
+        (M, 3)."""
+        self._accumulate(self._sums(descriptors, bins))
+
+    def update(self):
+        """Train on the run's materials simulated since the last update."""
+        trainable = [
+            Material.run_id == self.run_id,
+            or_(Material.failed == None, Material.failed == False),
+            Material.void_fraction_bin != None,
+            Material.sd_lattice_a != None,
+        ]
+        signatures = session \
+            .query(Material.generation, func.count(Material.id), func.sum(Material.id)) \
+            .filter(*trainable) \
+            .group_by(Material.generation).all()
+        for generation, count, id_sum in signatures:
+            if self._signatures.get(generation) == (count, id_sum):
+                continue
+            rows = session \
+                .query(*[getattr(Material, c) for c in DESCRIPTOR_COLUMNS + BIN_COLUMNS]) \
+                .filter(Material.generation == generation, *trainable).all()
+            values = np.array(rows, dtype=float).reshape(-1, len(DESCRIPTOR_COLUMNS + BIN_COLUMNS))
+            # retrain on the whole generation, replacing its previous sums
+            if generation in self._generation_sums:
+                self._accumulate(self._generation_sums[generation], -1)
+            sums = self._sums(values[:, :len(DESCRIPTOR_COLUMNS)], values[:, len(DESCRIPTOR_COLUMNS):])
+            self._accumulate(sums)
+            self._generation_sums[generation] = sums
+            self._signatures[generation] = (count, id_sum)
+
+    def predict(self, descriptors):
+        """Predict bins for materials' descriptors, shape (M, D).
+
+        Returns:
+            bins (numpy.ndarray): predicted gas adsorption, surface area and
+                void fraction bins, shape (M, 3).
+
+        """
+        n = self.count
+        x_mean = self._x_sum / n
+        y_mean = self._y_sum / n
+        covariance = self._xx_sum / n - np.outer(x_mean, x_mean)
+        scale = np.sqrt(np.clip(np.diag(covariance), 0, None))
+        scale[scale == 0] = 1.
+        standardized = covariance / np.outer(scale, scale)
+        cross = (self._xy_sum / n - np.outer(x_mean, y_mean)) / scale[:, None]
+        coefficients = np.linalg.solve(
+                standardized + self.ridge / n * np.eye(len(scale)), cross)
+
+        descriptors = np.asarray(descriptors, dtype=float).reshape(-1, len(DESCRIPTOR_COLUMNS))
+        bins = y_mean + ((descriptors - x_mean) / scale) @ coefficients
+        return np.clip(np.rint(bins), 0, config['number_of_convergence_bins'] - 1).astype(int)
+
+def isotonic_fit(x, y):
+    """Least-squares non-decreasing fit of `y` on `x`, by pooling adjacent
+    violators.
+
+    Args:
+        x (numpy.ndarray): inputs, shape (M,).
+        y (numpy.ndarray): values, shape (M,).
+
+    Returns:
+        x (numpy.ndarray): inputs, sorted.
+        fitted (numpy.ndarray): non-decreasing fitted values at the sorted
+            inputs.
+
+    """
+    order = np.argsort(x, kind='mergesort')
+    means, sizes = [], []
+    for value in np.asarray(y, dtype=float)[order]:
+        means.append(value)
+        sizes.append(1)
+        while len(means) > 1 and means[-2] > means[-1]:
+            size = sizes[-2] + sizes[-1]
+            means[-2] = (means[-2] * sizes[-2] + means[-1] * sizes[-1]) / size
+            sizes[-2] = size
+            del means[-1], sizes[-1]
+    return np.asarray(x, dtype=float)[order], np.repeat(means, sizes)
+
+class HenryCalibration:
+    """Monotone map from the Henry loadings computed when prescreening a
+    run's children to the gas adsorption bins they were simulated into.
+
+    Attributes:
+        run_id (str): identification string for run.
+        count (int): number of materials fitted.
+        loadings (numpy.ndarray): fitted Henry loadings, sorted.
+        bins (numpy.ndarray): fitted (fractional) bins at `loadings`.
+
+    Adsorption leaves the Henry regime at the pressures simulated, so loading
+    is not proportional to the Henry loading, but it rises with it; the map is
+    an isotonic fit to the run's simulated materials (see `isotonic_fit`).
+
+    """
+    def __init__(self, run_id):
+        self.run_id = run_id
+        self.count = 0
+        self.loadings = np.zeros(0)
+        self.bins = np.zeros(0)
+
+    def update(self):
+        """Refit to every simulated material of the run with a Henry loading."""
+        rows = session \
+            .query(Material.ga_henry_loading, Material.gas_adsorption_bin) \
+            .filter(
+                Material.run_id == self.run_id,
+                or_(Material.failed == None, Material.failed == False),
+                Material.ga_henry_loading != None,
+                Material.gas_adsorption_bin != None,
+            ).all()
+        values = np.array(rows, dtype=float).reshape(-1, 2)
+        self.count = len(values)
+        self.loadings, self.bins = isotonic_fit(values[:, 0], values[:, 1])
+
+    def predict(self, loading):
+        """Predict the gas adsorption bin of a material's Henry loading."""
+        return int(np.rint(np.interp(loading, self.loadings, self.bins)))
@@ -0,0 +1,46 @@
+import os
+import shutil
+
+import pytest
+from sqlalchemy import create_engine
+
+# htsohm.db reads settings/database.yaml on import; tests bind the session to
+# temporary databases (see `database`), so the sample settings will do
+if not os.path.exists(os.path.join('settings', 'database.yaml')):
+    shutil.copy(os.path.join('settings', 'database.sample.yaml'),
+            os.path.join('settings', 'database.yaml'))
+
+from htsohm import config
+import htsohm.db
+from htsohm.db import Base, session
+
+@pytest.fixture
+def set_config(monkeypatch):
+    """Set config values for one test: `set_config(key=value, ...)`."""
+    def set_values(**values):
+        for key, value in values.items():
+            monkeypatch.setitem(config, key, value)
+    return set_values
+
+@pytest.fixture
+def generation_limits(set_config):
+    """Limits for generating and mutating pseudo materials."""
+    set_config(
+        lattice_constant_limits=[25.6, 51.2],
+        number_density_limits=[0.000013, 0.00075],
+        epsilon_limits=[1.258, 513.264],
+        sigma_limits=[1.052, 6.549]
+    )
+
+@pytest.fixture
+def database(tmpdir):
+    """Bind the session to an empty SQLite database for one test, instead of
+    the configured database."""
+    engine = create_engine('sqlite:///%s' % tmpdir.join('htsohm.db'))
+    Base.metadata.create_all(engine)
+    session.remove()
+    session.configure(bind=engine)
+    yield engine
+    session.remove()
+    session.configure(bind=htsohm.db.engine)
+    engine.dispose()
@@ -0,0 +1,39 @@
+import pytest
+
+from htsohm.pseudo_material import PseudoMaterial
+from htsohm.simulation import helium_void_fraction
+from htsohm.simulation.batch import prefix_pseudo_material, write_framework_files
+
+@pytest.fixture
+def pseudo_materials():
+    pseudo_materials = []
+    for uuid in ['first', 'second']:
+        pseudo_material = PseudoMaterial(uuid)
+        pseudo_material.lattice_constants = {'a' : 26., 'b' : 27., 'c' : 28.}
+        pseudo_material.atom_types = [
+            {'chemical-id' : 'A_0', 'charge' : 0., 'epsilon' : 50., 'sigma' : 3.}]
+        pseudo_material.atom_sites = [
+            {'chemical-id' : 'A_0', 'x-frac' : 0.1, 'y-frac' : 0.2, 'z-frac' : 0.3}]
+        pseudo_materials.append(pseudo_material)
+    return pseudo_materials
+
+def test_prefix_leaves_original_unchanged(pseudo_materials):
+    renamed = prefix_pseudo_material(pseudo_materials[0], 'S0_')
+    assert renamed.atom_sites[0]['chemical-id'] == 'S0_A_0'
+    assert renamed.atom_types[0]['chemical-id'] == 'S0_A_0'
+    assert pseudo_materials[0].atom_sites[0]['chemical-id'] == 'A_0'
+
+def test_batch_shares_force_field(pseudo_materials, tmpdir):
+    write_framework_files(pseudo_materials, str(tmpdir))
+    mixing_rules = tmpdir.join('force_field_mixing_rules.def').read()
+    assert 'S0_A_0' in mixing_rules and 'S1_A_0' in mixing_rules
+    assert '# number of defined interactions\n12\n' in mixing_rules
+    assert 'S1_A_0' in tmpdir.join('second.cif').read()
+
+def test_one_system_per_material(tmpdir, set_config):
+    set_config(helium_void_fraction={'simulation_cycles' : 100})
+    filename = str(tmpdir.join('VoidFraction.input'))
+    helium_void_fraction.write_raspa_file(filename, ['first', 'second'])
+    input_file = tmpdir.join('VoidFraction.input').read()
+    assert 'FrameworkName          first\n' in input_file
+    assert 'Framework              1\nFrameworkName          second\n' in input_file
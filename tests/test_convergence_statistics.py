@@ -0,0 +1,21 @@
+import numpy as np
+import pytest
+
+from htsohm.db import Material, BinCount, ConvergenceStatistics
+
+def test_statistics_match_bin_counts(database):
+    rng = np.random.default_rng(0)
+    bins = rng.integers(3, size=(60, 3))
+    for i, (ga_bin, sa_bin, vf_bin) in enumerate(bins.tolist()):
+        material = Material('run')
+        material.generation = i // 20
+        material.gas_adsorption_bin = ga_bin
+        material.surface_area_bin = sa_bin
+        material.void_fraction_bin = vf_bin
+        BinCount.record(material)
+    counts = np.unique(bins, axis=0, return_counts=True)[1]
+    materials, number_of_bins, count_squares = ConvergenceStatistics.totals('run', 3)
+    assert (materials, number_of_bins) == (60, len(counts))
+    assert ConvergenceStatistics.standard_deviation(
+            materials, number_of_bins, count_squares) == pytest.approx(counts.std())
+    assert ConvergenceStatistics.totals('run', 1)[0] == 20
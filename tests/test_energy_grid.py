@@ -0,0 +1,50 @@
+import os
+
+import numpy as np
+import pytest
+
+from htsohm import config
+from htsohm.simulation import energy_grid
+from htsohm.pseudo_material import PseudoMaterial
+from htsohm.simulation.energy_grid import grid_settings, _link_raspa_share
+
+def test_methane_grid_settings():
+    assert grid_settings('methane', 0.15) == (
+        "NumberOfGrids                  1\n"
+        "GridTypes                      CH4_sp3\n"
+        "SpacingVDWGrid                 0.15\n"
+    )
+
+def test_unknown_adsorbate_raises():
+    with pytest.raises(ValueError):
+        grid_settings('argon', 0.1)
+
+def test_missing_raspa_installation_raises(tmpdir, monkeypatch):
+    monkeypatch.delenv('RASPA_DIR', raising=False)
+    monkeypatch.delitem(config, 'raspa2_dir', raising=False)
+    with pytest.raises(ValueError):
+        _link_raspa_share(str(tmpdir))
+
+def test_missing_raspa_share_raises(tmpdir, monkeypatch):
+    monkeypatch.setenv('RASPA_DIR', str(tmpdir.mkdir('raspa')))
+    with pytest.raises(ValueError, match='share directory'):
+        _link_raspa_share(str(tmpdir.mkdir('grid')))
+
+def test_grid_timeout_is_configured_separately(tmpdir, monkeypatch, set_config):
+    tmpdir.mkdir('raspa').mkdir('share').mkdir('raspa').mkdir('molecules')
+    monkeypatch.setenv('RASPA_DIR', str(tmpdir.join('raspa')))
+    monkeypatch.setenv('SCRATCH', str(tmpdir.mkdir('scratch')))
+    set_config(simulations_directory='SCRATCH', gas_adsorption={
+        'timeout_seconds' : 5000, 'energy_grid_timeout_seconds' : 60})
+    timeouts = []
+    monkeypatch.setattr(energy_grid, 'simulate',
+            lambda input_file, cwd, timeout, env: timeouts.append(timeout))
+    pseudo_material = PseudoMaterial('%036d' % 0)
+    pseudo_material.lattice_constants = {'a' : 26., 'b' : 26., 'c' : 26.}
+    pseudo_material.atom_types = [
+        {'chemical-id' : 'A_0', 'charge' : 0., 'epsilon' : 50., 'sigma' : 3.}]
+    pseudo_material.fractional_coordinates = np.random.random((4, 3))
+    pseudo_material.type_indices = np.zeros(4, dtype=int)
+    raspa_dir = energy_grid.make_grid('run', pseudo_material, 'methane')
+    assert timeouts == [60]
+    assert os.path.isdir(os.path.join(raspa_dir, 'share', 'raspa', 'molecules'))
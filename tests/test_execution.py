@@ -0,0 +1,37 @@
+import subprocess
+
+import pytest
+
+from htsohm.simulation.execution import PermanentSimulationError, run_with_retries
+
+@pytest.fixture
+def no_backoff(set_config):
+    set_config(surface_area={'retries' : 2, 'retry_backoff_seconds' : 0})
+
+def test_transient_failures_are_retried(no_backoff):
+    attempts = []
+    def attempt():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise subprocess.TimeoutExpired('simulate', 1)
+        return 'results'
+    assert run_with_retries('surface_area', attempt) == 'results'
+    assert len(attempts) == 3
+
+def test_retries_are_bounded(no_backoff):
+    attempts = []
+    def attempt():
+        attempts.append(1)
+        raise FileNotFoundError('output file missing')
+    with pytest.raises(PermanentSimulationError):
+        run_with_retries('surface_area', attempt)
+    assert len(attempts) == 3
+
+def test_raspa_errors_are_not_retried(no_backoff):
+    attempts = []
+    def attempt():
+        attempts.append(1)
+        raise subprocess.CalledProcessError(1, 'simulate')
+    with pytest.raises(PermanentSimulationError):
+        run_with_retries('surface_area', attempt)
+    assert len(attempts) == 1
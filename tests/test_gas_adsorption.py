@@ -0,0 +1,25 @@
+from htsohm.db import GasAdsorptionPoint, Material
+from htsohm.simulation.gas_adsorption import binned_loading, output_file_name
+from htsohm.simulation.gas_adsorption import point_results
+
+def test_output_file_name_matches_raspa_formatting():
+    assert output_file_name('uuid', 298, 3500000) == \
+            'output_uuid_1.1.1_298.000000_3.5e+06.data'
+    assert output_file_name('uuid', 298, 580000) == \
+            'output_uuid_1.1.1_298.000000_580000.data'
+
+def test_first_two_points_fill_material_columns():
+    points = [GasAdsorptionPoint(i, p, {'absolute_volumetric_loading' : loading})
+            for i, (p, loading) in enumerate([(3500000, 180.), (580000, 60.), (100000, 15.)])]
+    material = Material('run')
+    material.update_from_dict(point_results(points))
+    assert material.ga0_absolute_volumetric_loading == 180.
+    assert material.ga1_absolute_volumetric_loading == 60.
+    assert len(material.gas_adsorption_points) == 3
+    assert binned_loading(material) == 165.
+
+def test_single_point_bins_on_loading():
+    material = Material('run')
+    material.update_from_dict(point_results(
+        [GasAdsorptionPoint(0, 3500000, {'absolute_volumetric_loading' : 180.})]))
+    assert binned_loading(material) == 180.
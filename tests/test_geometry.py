@@ -0,0 +1,33 @@
+import numpy as np
+
+from htsohm.geometry import neighbor_pairs, periodic_distances
+
+def brute_force_pairs(fractional_coordinates, lattice, cutoff):
+    i, j = np.triu_indices(len(fractional_coordinates), k=1)
+    distances = periodic_distances(fractional_coordinates, lattice, i, j)
+    return set(zip(i[distances < cutoff].tolist(), j[distances < cutoff].tolist()))
+
+def test_cell_list_matches_brute_force():
+    rng = np.random.default_rng(0)
+    fractional_coordinates = rng.random((1000, 3))
+    lattice = np.array([51.2, 40., 30.])
+    i, j, distances = neighbor_pairs(fractional_coordinates, lattice, 4.)
+    assert set(zip(i.tolist(), j.tolist())) == \
+            brute_force_pairs(fractional_coordinates, lattice, 4.)
+    assert (distances < 4.).all()
+
+def test_tiny_cutoff_in_large_cell_matches_brute_force():
+    rng = np.random.default_rng(1)
+    fractional_coordinates = rng.random((500, 3))
+    lattice = np.array([51.2, 51.2, 51.2])
+    fractional_coordinates[1] = fractional_coordinates[0] + 0.05 / 51.2
+    i, j, distances = neighbor_pairs(fractional_coordinates, lattice, 0.1)
+    assert set(zip(i.tolist(), j.tolist())) == \
+            brute_force_pairs(fractional_coordinates, lattice, 0.1)
+    assert (0, 1) in set(zip(i.tolist(), j.tolist()))
+
+def test_pairs_across_periodic_boundary():
+    fractional_coordinates = np.array([[0.01, 0.5, 0.5], [0.99, 0.5, 0.5], [0.5, 0.5, 0.5]])
+    i, j, distances = neighbor_pairs(fractional_coordinates, np.array([30., 30., 30.]), 2.)
+    assert list(zip(i.tolist(), j.tolist())) == [(0, 1)]
+    assert np.allclose(distances, [0.6])
@@ -0,0 +1,51 @@
+import pytest
+
+from htsohm.db import session, GasAdsorptionPoint, Material
+
+def add_material(material_id, generation, bin, parent_id=None, run_id='run'):
+    material = Material(run_id)
+    material.id = material_id
+    material.generation = generation
+    material.parent_id = parent_id
+    material.gas_adsorption_bin, material.surface_area_bin, material.void_fraction_bin = bin
+    session.add(material)
+    return material
+
+def test_children_in_parent_bin_fractions(database):
+    add_material(1, 0, (0, 0, 0))
+    add_material(2, 0, (0, 0, 0))
+    add_material(3, 0, (1, 2, 3))
+    add_material(4, 0, (4, 4, 4))
+    # bin (0, 0, 0): 2 of 3 children, across both parents, stay in the bin
+    child = add_material(5, 1, (0, 0, 0), parent_id=1)
+    add_material(6, 1, (0, 0, 1), parent_id=1)
+    add_material(7, 1, (0, 0, 0), parent_id=2)
+    # bin (1, 2, 3): a child differing in one bin only has left it
+    add_material(8, 1, (1, 2, 4), parent_id=3)
+    # a later generation, and another run, are not counted
+    add_material(9, 2, (0, 0, 1), parent_id=5)
+    add_material(10, 1, (9, 9, 9), parent_id=3, run_id='other run')
+    session.commit()
+
+    fractions = Material.children_in_parent_bin_fractions('run', 1)
+    assert fractions == {(0, 0, 0) : pytest.approx(2 / 3), (1, 2, 3) : 0.}
+    # among the children in the material's own generation
+    assert child.calculate_percent_children_in_bin() == pytest.approx(2 / 3)
+    with pytest.raises(ZeroDivisionError):
+        session.query(Material).get(4).calculate_percent_children_in_bin()
+
+def test_retest_checks_first_and_last_gas_adsorption_points(set_config):
+    set_config(material_properties=['gas_adsorption'], number_of_convergence_bins=10,
+            gas_adsorption={'limits' : [0., 100.], 'external_pressures' : [1e5, 1e6, 1e7]})
+    material = Material('run')
+    material.gas_adsorption_points = [GasAdsorptionPoint(i, p, {'absolute_volumetric_loading' : loading})
+            for i, (p, loading) in enumerate(zip([1e5, 1e6, 1e7], [10., 50., 90.]))]
+    material.ga0_absolute_volumetric_loading = 10.
+    material.ga1_absolute_volumetric_loading = 50.
+    material.retest_num = 2
+    material.retest_gas_adsorption_0_sum = 2 * 10.5
+    material.retest_gas_adsorption_1_sum = 2 * 90.5
+    assert material.calculate_retest_result(0.1)
+    # the last point moved by more than a tenth of a bin
+    material.retest_gas_adsorption_1_sum = 2 * 80.
+    assert not material.calculate_retest_result(0.1)
@@ -1,7 +1,12 @@
 from random import choice, random, randrange, uniform
+import numpy as np
 import pytest
 
-from htsohm.material_files import random_number_density
+from htsohm.db import session, Material, StructureRejection
+from htsohm.material_files import closest_distance, generate_pseudo_materials, mutate_pseudo_materials
+from htsohm.material_files import random_number_density, random_position, render_cif_file
+from htsohm.material_files import REPAIRED, validate_pseudo_material
+from htsohm.pseudo_material import PseudoMaterial
 
 @pytest.fixture
 def LCs():
@@ -14,3 +19,82 @@ def test_number_density_bounds():
 def test_two_site_constraint():
     assert random_number_density((1, 2), LCs()) == 2
 
+def test_random_position_crosses_periodic_boundary():
+    assert random_position(0.9, 0.1, 0.25) == pytest.approx(0.95)
+    assert random_position(0.2, 0.8, 0.25) == pytest.approx(0.1)
+    assert random_position(0.2, 0.4, 0.5) == pytest.approx(0.3)
+
+def test_random_position_on_arrays():
+    x_o = np.array([[0.9, 0.2, 0.2]])
+    x_r = np.array([[0.1, 0.8, 0.4]])
+    assert np.allclose(random_position(x_o, x_r, 0.25), [[0.95, 0.1, 0.25]])
+    assert np.allclose(closest_distance(x_o, x_r), [[0.2, 0.4, 0.2]])
+
+def test_generate_pseudo_materials_within_limits(database, generation_limits):
+    pseudo_materials = generate_pseudo_materials('run', 4, 50, np.random.default_rng(0))
+    assert len(pseudo_materials) == 50
+    assert len(set(p.uuid for p in pseudo_materials)) == 50
+    for pseudo_material in pseudo_materials:
+        assert pseudo_material.number_of_atoms >= 2
+        assert pseudo_material.fractional_coordinates.shape == (pseudo_material.number_of_atoms, 3)
+        assert pseudo_material.type_indices.max() < 4
+        assert 25.6 <= pseudo_material.lattice.min() <= pseudo_material.lattice.max() <= 51.2
+        assert pseudo_material.chemical_ids == ['A_0', 'A_1', 'A_2', 'A_3']
+
+def test_generate_pseudo_materials_gives_up(database, generation_limits, set_config):
+    set_config(structure_validation={'max_packing_fraction' : 0.})
+    with pytest.raises(ValueError):
+        generate_pseudo_materials('run', 4, 1, np.random.default_rng(0))
+
+def test_structure_rejections_are_counted(database):
+    StructureRejection.record('run', 'overlap')
+    StructureRejection.record('run', 'overlap', 2)
+    session.commit()
+    assert session.query(StructureRejection.count).filter(
+            StructureRejection.reason == 'overlap').scalar() == 3
+
+def test_mutate_brood_of_children(database, generation_limits):
+    rng = np.random.default_rng(0)
+    parent_pseudo_material = generate_pseudo_materials('run', 4, 1, rng)[0]
+    parent_material = Material('run')
+    children = mutate_pseudo_materials(parent_material, parent_pseudo_material,
+            0.1, 1, 20, rng)
+    assert 0 < len(children) <= 20
+    assert len(set(m.uuid for m, p in children)) == len(children)
+    for material, pseudo_material in children:
+        assert material.uuid == pseudo_material.uuid
+        assert pseudo_material.parent_uuid == parent_pseudo_material.uuid
+        kept = pseudo_material.parent_site_indices
+        assert np.array_equal(pseudo_material.type_indices[:len(kept)],
+                parent_pseudo_material.type_indices[kept])
+        assert (np.abs(closest_distance(pseudo_material.fractional_coordinates[:len(kept)],
+                parent_pseudo_material.fractional_coordinates[kept])) <= 0.05 + 1e-9).all()
+
+def test_render_cif_file():
+    pseudo_material = PseudoMaterial('uuid')
+    pseudo_material.lattice_constants = {'a' : 26.123456, 'b' : 27., 'c' : 28.}
+    pseudo_material.atom_types = [
+        {'chemical-id' : 'A_0', 'charge' : 0., 'epsilon' : 50., 'sigma' : 3.},
+        {'chemical-id' : 'S10_A_1', 'charge' : 0., 'epsilon' : 150., 'sigma' : 2.5}]
+    pseudo_material.fractional_coordinates = np.array([[0.12345, 0.5, 0.99996], [0., 0.25, 1e-9]])
+    pseudo_material.type_indices = np.array([1, 0])
+    cif = render_cif_file(pseudo_material)
+    assert cif.startswith(b'\nloop_\n_symmetry_equiv_pos_as_xyz\n  x,y,z\n_cell_length_a    26.1235\n')
+    assert cif.endswith(b'_atom_site_fract_z\n'
+            b'S10_A_1 C 0.123500 0.500000 1.000000\n'
+            b'A_0   C 0.000000 0.250000 0.000000\n')
+
+def test_validate_repairs_overlapping_sites(set_config):
+    pseudo_material = PseudoMaterial('uuid')
+    pseudo_material.lattice_constants = {'a' : 30., 'b' : 30., 'c' : 30.}
+    pseudo_material.atom_types = [
+        {'chemical-id' : 'A_0', 'charge' : 0., 'epsilon' : 50., 'sigma' : 3.}]
+    pseudo_material.fractional_coordinates = np.concatenate([
+        np.random.default_rng(0).random((40, 3)) * 0.8 + 0.1,
+        [[0.001, 0.5, 0.5], [0.999, 0.5, 0.5]]])
+    pseudo_material.type_indices = np.zeros(42, dtype=int)
+    set_config(structure_validation={'overlap_fraction' : 0.1, 'max_repaired_fraction' : 0.05})
+    assert validate_pseudo_material(pseudo_material) == REPAIRED
+    assert pseudo_material.number_of_atoms == 41
+    set_config(structure_validation={'max_packing_fraction' : 0.0001})
+    assert validate_pseudo_material(pseudo_material) == 'packing_fraction'
@@ -0,0 +1,63 @@
+import pytest
+import sqlalchemy.exc
+
+from htsohm.db import session, Material, BinCount, ConvergenceStatistics, MaterialWriteBuffer
+
+def make_materials(count):
+    materials = []
+    for i in range(count):
+        material = Material('run')
+        material.generation = 0
+        material.failed = False
+        material.gas_adsorption_bin, material.surface_area_bin, material.void_fraction_bin = 0, 0, i
+        materials.append(material)
+    return materials
+
+def test_buffer_saves_materials_in_batches(database, set_config):
+    set_config(children_per_generation=2)
+    materials = make_materials(3)
+    write_buffer = MaterialWriteBuffer(size=3, interval=3600)
+    assert write_buffer.add(materials[:2]) == []
+    assert write_buffer.pending_in_generation(0) == 2
+    assert session.query(Material).count() == 0
+    assert write_buffer.add(materials[2:]) == [materials[2]]
+    assert write_buffer.materials == []
+    assert [m.generation_index for m in materials] == [0, 1, 2]
+    assert ConvergenceStatistics.totals('run', 1)[:2] == (2, 2)
+
+def test_failed_flush_keeps_materials(database, set_config, monkeypatch):
+    set_config(children_per_generation=2)
+    materials = make_materials(2)
+    write_buffer = MaterialWriteBuffer(size=2, interval=3600)
+    record = BinCount.record
+    def fail_to_record(*materials):
+        raise sqlalchemy.exc.OperationalError('UPDATE bin_counts', {}, Exception())
+    monkeypatch.setattr(BinCount, 'record', fail_to_record)
+    with pytest.raises(sqlalchemy.exc.OperationalError):
+        write_buffer.add(materials)
+    assert write_buffer.materials == materials
+    session.rollback()
+    monkeypatch.setattr(BinCount, 'record', record)
+    write_buffer.flush()
+    assert write_buffer.materials == []
+    assert session.query(Material).count() == 2
+    assert ConvergenceStatistics.totals('run', 1)[:2] == (2, 2)
+
+def test_lost_bin_race_retries_one_material(database, monkeypatch):
+    materials = make_materials(2)
+    materials[1].void_fraction_bin = 0
+    increment = BinCount._increment.__func__
+    attempts = []
+    def increment_then_lose_race(cls, material):
+        count = increment(cls, material)
+        attempts.append(material)
+        if len(attempts) == 2:
+            raise sqlalchemy.exc.IntegrityError('INSERT INTO bin_counts', {}, Exception())
+        return count
+    monkeypatch.setattr(BinCount, '_increment', classmethod(increment_then_lose_race))
+    BinCount.record(*materials)
+    session.commit()
+    assert attempts == [materials[0], materials[1], materials[1]]
+    assert session.query(BinCount.count).scalar() == 2
+    materials_counted, bins, count_squares = ConvergenceStatistics.totals('run', 1)
+    assert (materials_counted, bins, count_squares) == (2, 1, 4)
@@ -0,0 +1,54 @@
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from htsohm.db import Material
+from htsohm.db.migrate import check_indexes, migrate, missing_columns, missing_indexes
+
+# materials and mutation_strengths, as created before any columns or indexes
+# were added
+BASELINE_SCHEMA = [
+    """CREATE TABLE materials (
+        id INTEGER NOT NULL PRIMARY KEY, run_id VARCHAR(50), uuid VARCHAR(40),
+        parent_id INTEGER, generation INTEGER, generation_index INTEGER,
+        retest_num INTEGER, retest_gas_adsorption_0_sum FLOAT,
+        retest_gas_adsorption_1_sum FLOAT, retest_surface_area_sum FLOAT,
+        retest_void_fraction_sum FLOAT, retest_passed BOOLEAN, %s,
+        sa_unit_cell_surface_area FLOAT, sa_volumetric_surface_area FLOAT,
+        sa_gravimetric_surface_area FLOAT, vf_helium_void_fraction FLOAT,
+        gas_adsorption_bin INTEGER, surface_area_bin INTEGER,
+        void_fraction_bin INTEGER)""" % ', '.join(
+            'ga%s_%s FLOAT' % (point, name) for point in [0, 1] for name in [
+                'absolute_volumetric_loading', 'absolute_gravimetric_loading',
+                'absolute_molar_loading', 'excess_volumetric_loading',
+                'excess_gravimetric_loading', 'excess_molar_loading',
+                'host_host_avg', 'host_host_vdw', 'host_host_cou',
+                'adsorbate_adsorbate_avg', 'adsorbate_adsorbate_vdw',
+                'adsorbate_adsorbate_cou', 'host_adsorbate_avg',
+                'host_adsorbate_vdw', 'host_adsorbate_cou']),
+    """CREATE TABLE mutation_strengths (
+        run_id VARCHAR(50) NOT NULL, generation INTEGER NOT NULL,
+        gas_adsorption_bin INTEGER NOT NULL, surface_area_bin INTEGER NOT NULL,
+        void_fraction_bin INTEGER NOT NULL, strength FLOAT,
+        PRIMARY KEY (run_id, generation, gas_adsorption_bin, surface_area_bin,
+            void_fraction_bin))""",
+    "INSERT INTO materials (id, run_id, uuid, generation) VALUES (1, 'run', 'uuid', 0)",
+]
+
+def test_migrate_baseline_database(tmpdir):
+    engine = create_engine('sqlite:///%s' % tmpdir.join('baseline.db'))
+    for statement in BASELINE_SCHEMA:
+        engine.execute(statement)
+    assert {'failed', 'fingerprint', 'sd_lattice_a'} <= \
+            set(c.name for c in missing_columns(engine))
+
+    columns, indexes = migrate(engine)
+    assert 'materials.fingerprint' in columns
+    assert 'ix_materials_run_id_fingerprint' in indexes
+    assert missing_columns(engine) == []
+    assert missing_indexes(engine) == []
+    assert check_indexes(engine) == []
+
+    session = sessionmaker(bind=engine)()
+    material = session.query(Material).filter(Material.fingerprint == None).one()
+    assert material.uuid == 'uuid' and not material.failed
+    session.close()
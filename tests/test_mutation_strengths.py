@@ -0,0 +1,56 @@
+import pytest
+
+import htsohm.htsohm
+from htsohm.db import session, Material, MutationStrength
+from htsohm.htsohm import adjusted_strength, calculate_mutation_strengths, mutation_strengths
+
+def add_material(material_id, generation, bin, parent_id=None):
+    material = Material('run')
+    material.id = material_id
+    material.generation = generation
+    material.parent_id = parent_id
+    material.gas_adsorption_bin, material.surface_area_bin, material.void_fraction_bin = bin
+    session.add(material)
+
+def add_strength(generation, bin, strength):
+    session.add(MutationStrength('run', generation, *bin, strength))
+
+def test_adjusted_strength():
+    assert adjusted_strength(0.4, 0.05) == 0.2
+    assert adjusted_strength(0.4, 0.3) == 0.4
+    assert adjusted_strength(0.4, 0.6) == 0.8
+    assert adjusted_strength(0.8, 0.6) == 0.8
+
+def test_strengths_adjust_latest_prior(database, set_config):
+    set_config(initial_mutation_strength=0.5)
+    add_material(1, 0, (0, 0, 0))
+    add_material(2, 0, (1, 1, 1))
+    add_material(3, 0, (2, 2, 2))
+    add_material(4, 1, (0, 0, 0), parent_id=1)
+    add_material(5, 1, (0, 0, 0), parent_id=1)
+    add_material(6, 1, (3, 3, 3), parent_id=2)
+    add_strength(0, (0, 0, 0), 0.1)
+    add_strength(1, (0, 0, 0), 0.2)
+    add_strength(0, (1, 1, 1), 0.8)
+    add_strength(1, (1, 1, 1), 0.6)
+    # not yet a prior
+    add_strength(2, (0, 0, 0), 0.9)
+    session.commit()
+    assert calculate_mutation_strengths('run', 2) == {
+        (0, 0, 0) : 0.4,  # every child stayed in its parent's bin
+        (1, 1, 1) : 0.3,  # no child did
+        (2, 2, 2) : 0.5,  # no children, no prior
+        (3, 3, 3) : 0.5,  # first occupied in generation 1
+    }
+
+def test_strengths_saved_by_another_worker(database, monkeypatch):
+    def calculate_while_another_worker_saves(run_id, generation):
+        database.execute(MutationStrength.__table__.insert(), run_id=run_id,
+                generation=generation, gas_adsorption_bin=0, surface_area_bin=0,
+                void_fraction_bin=0, strength=0.25)
+        return {(0, 0, 0) : 0.25}
+    monkeypatch.setattr(htsohm.htsohm, '_mutation_strengths', {})
+    monkeypatch.setattr(htsohm.htsohm, 'calculate_mutation_strengths',
+            calculate_while_another_worker_saves)
+    assert mutation_strengths('run', 1) == {(0, 0, 0) : 0.25}
+    assert session.query(MutationStrength).count() == 1
@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+from htsohm.pseudo_material import PseudoMaterial
+from htsohm.simulation.native import accessible_surface_area, helium_void_fraction
+from htsohm.simulation.native import henry_volumetric_loading, probe_energies
+
+def pseudo_material(fractional_coordinates):
+    pseudo_material = PseudoMaterial('uuid')
+    pseudo_material.lattice_constants = {'a' : 30., 'b' : 30., 'c' : 30.}
+    pseudo_material.atom_types = [
+        {'chemical-id' : 'A_0', 'charge' : 0., 'epsilon' : 50., 'sigma' : 3.}]
+    pseudo_material.fractional_coordinates = np.array(fractional_coordinates)
+    pseudo_material.type_indices = np.zeros(len(fractional_coordinates), dtype=int)
+    return pseudo_material
+
+def test_sparse_framework_is_nearly_void():
+    void_fraction = helium_void_fraction(pseudo_material([[0.5, 0.5, 0.5]]), 2000,
+            rng=np.random.default_rng(0))
+    assert 0.95 < void_fraction <= 1.05
+
+def test_energies_do_not_depend_on_chunk_size():
+    framework = pseudo_material(np.random.default_rng(0).random((50, 3)))
+    points = np.random.default_rng(1).random((100, 3))
+    assert np.allclose(probe_energies(framework, points, 'He'),
+            probe_energies(framework, points, 'He', chunk_size=7))
+
+def test_energy_is_zero_beyond_cutoff():
+    framework = pseudo_material([[0., 0., 0.]])
+    assert probe_energies(framework, np.array([[0.5, 0.5, 0.5]]), 'He') == 0.
+
+def test_isolated_atom_surface_area_is_its_sphere():
+    framework = pseudo_material([[0.5, 0.5, 0.5]])
+    radius = 2 ** (1 / 6) * (3. + 3.31) / 2
+    results = accessible_surface_area(framework, 100)
+    assert results['sa_unit_cell_surface_area'] == pytest.approx(4 * np.pi * radius ** 2)
+    assert results['sa_volumetric_surface_area'] == pytest.approx(
+            4 * np.pi * radius ** 2 / 30. ** 3 * 1e4)
+
+def test_overlapping_atoms_hide_surface_area():
+    isolated = accessible_surface_area(pseudo_material([[0.4, 0.5, 0.5], [0.6, 0.5, 0.5]]), 500)
+    touching = accessible_surface_area(pseudo_material([[0.49, 0.5, 0.5], [0.51, 0.5, 0.5]]), 500,
+            chunk_size=50)
+    assert touching['sa_unit_cell_surface_area'] < 0.7 * isolated['sa_unit_cell_surface_area']
+
+def test_henry_loading_of_empty_framework_is_ideal_gas():
+    framework = pseudo_material([[0., 0., 0.]])
+    framework.atom_types = [
+        {'chemical-id' : 'A_0', 'charge' : 0., 'epsilon' : 0., 'sigma' : 3.}]
+    loading = henry_volumetric_loading(framework, 'methane', 298., 101325., 100)
+    assert loading == pytest.approx(273.15 / 298.)
+    with pytest.raises(ValueError):
+        henry_volumetric_loading(framework, 'CO2', 298., 101325., 100)
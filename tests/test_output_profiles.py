@@ -0,0 +1,37 @@
+import pytest
+
+from htsohm.simulation.output_profiles import output_settings
+from htsohm.simulation.surface_area import parse_output
+
+@pytest.fixture
+def minimal_profile(set_config):
+    set_config(surface_area={'output_profile' : 'minimal'})
+
+def test_minimal_profile_prints_once(minimal_profile):
+    lines = output_settings('surface_area', 10)
+    assert "PrintEvery                      10\n" in lines
+    assert "Movies                          no\n" in lines
+    assert "WriteBinaryRestartFileEvery     11\n" in lines
+
+def test_unknown_profile_raises(set_config):
+    set_config(surface_area={'output_profile' : 'verbose'})
+    with pytest.raises(ValueError):
+        output_settings('surface_area', 10)
+
+def test_parse_minimal_surface_area_output(tmpdir):
+    output_file = tmpdir.join('output.data')
+    output_file.write(
+        "Current cycle: 0 out of 10\n"
+        "\tSurface area:   0.00000 [A^2]\n"
+        "Average Surface Area:\n"
+        "=====================\n"
+        "\tSurface area:   1234.50000 +/- 1.00000 [A^2]\n"
+        "\tSurface area:   2345.60000 +/- 2.00000 [m^2/g]\n"
+        "\tSurface area:   1456.70000 +/- 3.00000 [m^2/cm^3]\n"
+    )
+    results = parse_output(str(output_file))
+    assert results == {
+        'sa_unit_cell_surface_area'   : 1234.5,
+        'sa_gravimetric_surface_area' : 2345.6,
+        'sa_volumetric_surface_area'  : 1456.7
+    }
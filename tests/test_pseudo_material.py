@@ -0,0 +1,54 @@
+import yaml
+
+import numpy as np
+
+from htsohm.pseudo_material import PseudoMaterial
+
+LEGACY_YAML = """!!python/object:htsohm.pseudo_material.PseudoMaterial
+atom_sites:
+- {chemical-id: A_1, x-frac: 0.1, y-frac: 0.2, z-frac: 0.3}
+- {chemical-id: A_0, x-frac: 0.4, y-frac: 0.5, z-frac: 0.6}
+atom_types:
+- {charge: 0.0, chemical-id: A_0, epsilon: 50.0, sigma: 3.0}
+- {charge: 0.0, chemical-id: A_1, epsilon: 150.0, sigma: 2.5}
+lattice_constants: {a: 26.0, b: 27.0, c: 28.0}
+number_of_atoms: 2
+run_id: run
+uuid: legacy
+"""
+
+def test_loads_legacy_yaml():
+    pseudo_material = yaml.load(LEGACY_YAML)
+    assert pseudo_material.uuid == 'legacy'
+    assert pseudo_material.type_indices.tolist() == [1, 0]
+    assert pseudo_material.fractional_coordinates.shape == (2, 3)
+    assert pseudo_material.atom_sites[0] == {
+            'chemical-id' : 'A_1', 'x-frac' : 0.1, 'y-frac' : 0.2, 'z-frac' : 0.3}
+    assert pseudo_material.atom_type_parameters['epsilon'].tolist() == [50., 150.]
+    assert pseudo_material.volume() == 26. * 27. * 28.
+
+def test_yaml_round_trip():
+    pseudo_material = yaml.load(LEGACY_YAML)
+    reloaded = yaml.load(yaml.dump(pseudo_material))
+    assert reloaded.lattice_constants == pseudo_material.lattice_constants
+    assert reloaded.atom_types == pseudo_material.atom_types
+    assert np.array_equal(reloaded.fractional_coordinates,
+            pseudo_material.fractional_coordinates)
+
+def test_copy_does_not_share_arrays():
+    pseudo_material = yaml.load(LEGACY_YAML)
+    copy = pseudo_material.copy('child')
+    copy.fractional_coordinates[0, 0] = 0.9
+    copy.atom_type_parameters['sigma'][0] = 4.
+    assert copy.uuid == 'child'
+    assert pseudo_material.fractional_coordinates[0, 0] == 0.1
+    assert pseudo_material.atom_types[0]['sigma'] == 3.
+
+def test_fingerprint_ignores_site_order_and_rounding():
+    pseudo_material = yaml.load(LEGACY_YAML)
+    twin = pseudo_material.copy('twin')
+    twin.fractional_coordinates = twin.fractional_coordinates[::-1] + 1e-6
+    twin.type_indices = twin.type_indices[::-1]
+    assert twin.fingerprint() == pseudo_material.fingerprint()
+    twin.fractional_coordinates[0, 0] += 0.001
+    assert twin.fingerprint() != pseudo_material.fingerprint()
@@ -0,0 +1,166 @@
+import os
+from uuid import uuid4
+
+import numpy as np
+import yaml
+
+from htsohm.db import Material
+from htsohm.htsohm import store_pseudo_materials
+from htsohm.pseudo_material import PseudoMaterial
+from htsohm import pseudo_material_archive
+from htsohm.pseudo_material_archive import DatabasePseudoMaterialStore, PseudoMaterialArchive
+from htsohm.pseudo_material_archive import encode_record, load_yaml_pseudo_material
+from htsohm.pseudo_material_archive import INDEX_DTYPE
+from htsohm.surrogate import structure_descriptors
+
+def make_pseudo_material(uuid, number_of_atoms):
+    pseudo_material = PseudoMaterial(uuid)
+    pseudo_material.run_id = 'run'
+    pseudo_material.lattice_constants = {'a' : 26., 'b' : 27., 'c' : 28.}
+    pseudo_material.atom_types = [
+        {'chemical-id' : 'A_0', 'charge' : 0., 'epsilon' : 50., 'sigma' : 3.},
+        {'chemical-id' : 'A_1', 'charge' : 0., 'epsilon' : 150., 'sigma' : 2.5}]
+    pseudo_material.fractional_coordinates = np.random.random((number_of_atoms, 3))
+    pseudo_material.type_indices = np.arange(number_of_atoms) % 2
+    return pseudo_material
+
+def assert_same(a, b):
+    assert a.uuid == b.uuid
+    assert np.array_equal(a.lattice, b.lattice)
+    assert a.atom_types == b.atom_types
+    assert np.array_equal(a.fractional_coordinates, b.fractional_coordinates)
+    assert np.array_equal(a.type_indices, b.type_indices)
+
+def test_archive_round_trip(tmpdir):
+    pseudo_materials = [make_pseudo_material('%036d' % i, i) for i in range(5)]
+    writer = PseudoMaterialArchive('run', str(tmpdir))
+    writer.append(pseudo_materials[:2])
+    reader = PseudoMaterialArchive('run', str(tmpdir))
+    assert_same(reader.load(pseudo_materials[1].uuid), pseudo_materials[1])
+    # appended after the reader mapped the segment
+    writer.append(pseudo_materials[2:])
+    for pseudo_material in pseudo_materials:
+        assert_same(reader.load(pseudo_material.uuid), pseudo_material)
+    assert '%036d' % 9 not in reader
+
+def test_record_written_while_segment_was_mapped(tmpdir):
+    pseudo_materials = [make_pseudo_material('%036d' % i, 4) for i in range(2)]
+    writer = PseudoMaterialArchive('run', str(tmpdir))
+    writer.append(pseudo_materials[:1])
+    segment_path = str(tmpdir.join(writer._segment_name + '.seg'))
+    index_path = str(tmpdir.join(writer._segment_name + '.idx'))
+    record = encode_record(pseudo_materials[1])
+    offset = os.path.getsize(segment_path)
+    with open(segment_path, 'ab') as segment_file:
+        segment_file.write(record[:len(record) // 2])
+    # the reader maps the segment part way through the second record
+    reader = PseudoMaterialArchive('run', str(tmpdir))
+    assert_same(reader.load(pseudo_materials[0].uuid), pseudo_materials[0])
+    with open(segment_path, 'ab') as segment_file:
+        segment_file.write(record[len(record) // 2:])
+    index = np.zeros(1, dtype=INDEX_DTYPE)
+    index['uuid'], index['offset'] = pseudo_materials[1].uuid.encode('ascii'), offset
+    with open(index_path, 'ab') as index_file:
+        index_file.write(index.tobytes())
+    assert_same(reader.load(pseudo_materials[1].uuid), pseudo_materials[1])
+
+def test_export(tmpdir):
+    pseudo_materials = [make_pseudo_material('%036d' % i, i + 2) for i in range(3)]
+    archive = PseudoMaterialArchive('run', str(tmpdir))
+    archive.append(pseudo_materials)
+    assert archive.export(str(tmpdir.join('export.npz'))) == 3
+    export = np.load(str(tmpdir.join('export.npz')))
+    assert export['atom_offsets'].tolist() == [0, 2, 5, 9]
+    assert np.array_equal(export['fractional_coordinates'][2:5],
+            pseudo_materials[1].fractional_coordinates)
+
+def test_load_yaml_without_unsafe_loader(tmpdir):
+    pseudo_material = make_pseudo_material('legacy', 3)
+    tmpdir.join('legacy.yaml').write(yaml.dump(pseudo_material))
+    assert_same(load_yaml_pseudo_material(str(tmpdir.join('legacy.yaml'))), pseudo_material)
+
+def make_child(parent, uuid, rng):
+    child = parent.copy(uuid)
+    kept_sites = rng.choice(parent.number_of_atoms, parent.number_of_atoms - 1, replace=False)
+    child.lattice = parent.lattice + rng.normal(size=3)
+    child.atom_type_parameters['epsilon'] += rng.normal(size=2)
+    child.fractional_coordinates = np.concatenate([
+        (parent.fractional_coordinates[kept_sites] + 0.01 * rng.normal(size=(len(kept_sites), 3))) % 1.,
+        rng.random((3, 3))])
+    child.type_indices = np.concatenate([parent.type_indices[kept_sites], [0, 1, 0]])
+    child.parent_uuid = parent.uuid
+    child.parent_site_indices = kept_sites
+    return child
+
+def test_delta_lineage(tmpdir):
+    rng = np.random.default_rng(0)
+    lineage = [make_pseudo_material('%036d' % 0, 100)]
+    for i in range(1, 8):
+        lineage.append(make_child(lineage[-1], '%036d' % i, rng))
+    original = lineage[-1].fractional_coordinates.copy()
+
+    archive = PseudoMaterialArchive('run', str(tmpdir), deltas=True, snapshot_interval=3)
+    for pseudo_material in lineage:
+        archive.append([pseudo_material])
+    # children are snapped to the float32 displacements stored
+    assert np.allclose(lineage[-1].fractional_coordinates, original, atol=1e-6)
+
+    reader = PseudoMaterialArchive('run', str(tmpdir), cache_size=2)
+    for pseudo_material in lineage:
+        assert_same(reader.load(pseudo_material.uuid), pseudo_material)
+
+    full = PseudoMaterialArchive('run', str(tmpdir.mkdir('full')))
+    full.append(lineage)
+    segment_size = lambda a: sum(f.size() for f in tmpdir.join(
+        '' if a is archive else 'full').listdir() if f.ext == '.seg')
+    assert segment_size(archive) < segment_size(full)
+
+def test_stored_fingerprint_matches_reloaded_structure(tmpdir, monkeypatch):
+    rng = np.random.default_rng(1)
+    parent = make_pseudo_material('%036d' % 0, 100)
+    child = make_child(parent, '%036d' % 1, rng)
+    # put a kept site next to a fingerprint rounding boundary, on the other
+    # side from where the float32 displacement stored will snap it
+    boundary = 0.50005
+    kept = parent.fractional_coordinates[child.parent_site_indices[0], 0]
+    displacement = boundary - kept - np.round(boundary - kept)
+    snapped = (kept + float(np.float32(displacement))) % 1.
+    assert snapped != boundary
+    child.fractional_coordinates[0, 0] = boundary + (1e-12 if snapped < boundary else -1e-12)
+    archive = PseudoMaterialArchive('run', str(tmpdir), deltas=True)
+    monkeypatch.setitem(pseudo_material_archive._stores, 'run', archive)
+    archive.append([parent])
+
+    material = Material('run')
+    store_pseudo_materials([material], [child])
+    reloaded = PseudoMaterialArchive('run', str(tmpdir)).load(child.uuid)
+    assert material.fingerprint == reloaded.fingerprint()
+    assert material.sd_geometric_void_fraction == \
+            structure_descriptors(reloaded)['sd_geometric_void_fraction']
+
+def test_database_store(database):
+    pseudo_materials = [make_pseudo_material(str(uuid4()), 4) for i in range(3)]
+    DatabasePseudoMaterialStore('run').append(pseudo_materials)
+    store = DatabasePseudoMaterialStore('run', cache_size=1)
+    assert sorted(store.uuids()) == sorted(p.uuid for p in pseudo_materials)
+    assert pseudo_materials[0].uuid in store
+    for pseudo_material in pseudo_materials:
+        assert_same(store.load(pseudo_material.uuid), pseudo_material)
+    assert str(uuid4()) not in store
+
+def test_convert_yaml_directory_into_database(database, tmpdir, monkeypatch, set_config):
+    set_config(pseudo_material_format='database')
+    monkeypatch.setattr(pseudo_material_archive, '_stores', {})
+    monkeypatch.setattr(pseudo_material_archive, 'pseudo_materials_directory',
+            lambda run_id: str(tmpdir))
+    pseudo_materials = [make_pseudo_material(str(uuid4()), 4) for i in range(3)]
+    for pseudo_material in pseudo_materials:
+        tmpdir.join(pseudo_material.uuid + '.yaml').write(yaml.dump(pseudo_material))
+    DatabasePseudoMaterialStore('run').append(pseudo_materials[:1])
+
+    assert pseudo_material_archive.convert_yaml_directory('run', chunk_size=2) == 2
+    store = DatabasePseudoMaterialStore('run')
+    assert sorted(store.uuids()) == sorted(p.uuid for p in pseudo_materials)
+    for pseudo_material in pseudo_materials:
+        assert_same(store.load(pseudo_material.uuid), pseudo_material)
+    assert not tmpdir.listdir(lambda f: f.ext in ['.seg', '.idx'])
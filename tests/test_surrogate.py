@@ -0,0 +1,71 @@
+import numpy as np
+
+from htsohm.db import session, Material
+from htsohm.surrogate import BinSurrogate, BIN_COLUMNS, DESCRIPTOR_COLUMNS
+from htsohm.surrogate import HenryCalibration, isotonic_fit
+
+def test_surrogate_recovers_linear_bins(set_config):
+    rng = np.random.default_rng(0)
+    descriptors = rng.random((500, len(DESCRIPTOR_COLUMNS))) * [30, 30, 30, 1e-3, 500, 6, 1]
+    bins = np.stack([
+        descriptors[:, 0] / 3,
+        descriptors[:, 4] / 50,
+        descriptors[:, 6] * 9], axis=1)
+    surrogate = BinSurrogate('run', ridge=1e-6)
+    for i in range(0, 500, 100):
+        surrogate.add(descriptors[i:i + 100], bins[i:i + 100])
+    set_config(number_of_convergence_bins=10)
+    predicted = surrogate.predict(descriptors[:20])
+    assert np.abs(predicted - np.clip(bins[:20], 0, 9)).max() <= 0.5 + 1e-9
+
+def add_trainable_material(material_id, generation):
+    material = Material('run')
+    material.id = material_id
+    material.generation = generation
+    for column in DESCRIPTOR_COLUMNS + BIN_COLUMNS:
+        setattr(material, column, material_id)
+    session.add(material)
+    session.commit()
+
+def test_surrogate_trains_on_materials_saved_out_of_order(database):
+    add_trainable_material(10, 0)
+    add_trainable_material(11, 1)
+    surrogate = BinSurrogate('run')
+    surrogate.update()
+    # saved by a slower worker, after higher ids were trained on
+    add_trainable_material(5, 0)
+    surrogate.update()
+    surrogate.update()
+    assert surrogate.count == 3
+    assert np.allclose(surrogate._x_sum, 5 + 10 + 11)
+    # a material trained on fails permanently when retested
+    material = session.query(Material).get(10)
+    material.failed = True
+    session.commit()
+    surrogate.update()
+    assert surrogate.count == 2
+    assert np.allclose(surrogate._x_sum, 5 + 11)
+
+def test_isotonic_fit_pools_violators():
+    x, fitted = isotonic_fit([3., 1., 2., 4.], [1., 0., 2., 5.])
+    assert x.tolist() == [1., 2., 3., 4.]
+    assert fitted.tolist() == [0., 1.5, 1.5, 5.]
+
+def test_henry_calibration_maps_loadings_to_bins(database):
+    # loading saturates, so bins rise ever more slowly with Henry loading
+    for i, henry in enumerate(np.linspace(0., 100., 50)):
+        material = Material('run')
+        material.ga_henry_loading = henry
+        material.gas_adsorption_bin = int(np.rint(9 * henry / (henry + 10.)))
+        session.add(material)
+    material = Material('run')
+    material.ga_henry_loading = 50.
+    material.failed = True
+    session.add(material)
+    session.commit()
+    calibration = HenryCalibration('run')
+    calibration.update()
+    assert calibration.count == 50
+    assert calibration.predict(90.) == 8
+    assert calibration.predict(10.) in [4, 5]
+    assert calibration.predict(1000.) == calibration.predict(100.)